@@ -3,13 +3,13 @@ import base64
 import io
 import json
 import os
-import requests
 from typing import Dict, Any, Optional, List
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from PIL import Image
 import uvicorn
+from utils.http_client import get_client
 
 app = FastAPI(title="NV-CLIP Adapter for Ollama")
 
@@ -23,16 +23,17 @@ app.add_middleware(
 )
 
 NVCLIP_URL = os.environ.get("NVCLIP_URL", "http://nvclip:3456")
+nvclip = get_client("nvclip", NVCLIP_URL)
 
-def process_image(image_data: bytes) -> Dict[str, Any]:
+async def process_image(image_data: bytes) -> Dict[str, Any]:
     """Process an image through NV-CLIP and return embeddings"""
     try:
         # Convert to base64 for API call
         encoded_image = base64.b64encode(image_data).decode('utf-8')
         
         # Call NV-CLIP API
-        response = requests.post(
-            f"{NVCLIP_URL}/v1/embeddings",
+        response = await nvclip.apost(
+            "/v1/embeddings",
             json={
                 "input": [
                     {
@@ -63,7 +64,7 @@ async def ollama_completions_proxy(
     if image:
         image_data = await image.read()
         try:
-            image_embedding = process_image(image_data)
+            image_embedding = await process_image(image_data)
         except Exception as e:
             return JSONResponse(
                 status_code=500,
@@ -78,8 +79,8 @@ async def ollama_completions_proxy(
     
     # Call NV-CLIP's text analysis endpoint with the formatted prompt
     try:
-        response = requests.post(
-            f"{NVCLIP_URL}/v1/analyze",
+        response = await nvclip.apost(
+            "/v1/analyze",
             json={
                 "text": formatted_prompt,
                 "image_embedding": image_embedding["embeddings"][0] if image_embedding else None
@@ -1,8 +1,9 @@
 # src/backend/ai/adapters/custom_embeddings.py
-import requests
 import logging
 from typing import List
 from langchain_core.embeddings import Embeddings
+from utils import tracing
+from utils.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -12,14 +13,17 @@ class InternalEmbeddingService(Embeddings):
     def __init__(self, base_url: str):
         self.base_url = base_url
         self.embed_endpoint = f"{base_url}/embed"
+        # Embedding is idempotent, so timed-out requests are safe to retry
+        self.client = get_client("embedding", base_url, idempotent=True)
         
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of documents using the internal embedding service."""
         try:
-            response = requests.post(
-                self.embed_endpoint,
-                json={"texts": texts}
-            )
+            with tracing.span("embed", {"embedding.texts": len(texts)}):
+                response = self.client.post(
+                    self.embed_endpoint,
+                    json={"texts": texts}
+                )
             response.raise_for_status()
             return response.json()["embeddings"]
         except Exception as e:
@@ -28,12 +32,22 @@ class InternalEmbeddingService(Embeddings):
     
     def embed_query(self, text: str) -> List[float]:
         """Embed a query using the internal embedding service."""
+        return self.embed_documents([text])[0]
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents without blocking the event loop."""
         try:
-            response = requests.post(
-                self.embed_endpoint,
-                json={"texts": [text]}
-            )
+            with tracing.span("embed", {"embedding.texts": len(texts)}):
+                response = await self.client.apost(
+                    self.embed_endpoint,
+                    json={"texts": texts}
+                )
             response.raise_for_status()
-            return response.json()["embeddings"][0]
+            return response.json()["embeddings"]
         except Exception as e:
-            logger.error(f"Error embedding query: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error embedding documents: {str(e)}")
+            raise
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query without blocking the event loop."""
+        return (await self.aembed_documents([text]))[0]
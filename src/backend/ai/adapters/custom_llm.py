@@ -1,24 +1,53 @@
 # src/backend/ai/adapters/custom_llm.py
-import requests
+import json
 import logging
-from typing import Any, List, Mapping, Optional
+from typing import Any, AsyncIterator, Iterator, List, Mapping, Optional
 from langchain_core.language_models import LLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.outputs import GenerationChunk
+from utils.http_client import ServiceClient, get_client
 
 logger = logging.getLogger(__name__)
 
 class InternalLLMService(LLM):
     """Adapter for internal LLM service."""
     
-    def __init__(self, base_url: str):
-        super().__init__()
-        self.base_url = base_url
-        self.generate_endpoint = f"{base_url}/generate"
+    base_url: str
+    
+    def __init__(self, base_url: str, **kwargs: Any):
+        super().__init__(base_url=base_url, **kwargs)
+    
+    @property
+    def generate_endpoint(self) -> str:
+        return f"{self.base_url}/generate"
+    
+    @property
+    def stream_endpoint(self) -> str:
+        return f"{self.base_url}/generate/stream"
+    
+    @property
+    def client(self) -> ServiceClient:
+        # Generation is slow and not idempotent: a long read timeout, and
+        # timed-out requests are not retried
+        return get_client("llm", self.base_url, timeout=300)
     
     @property
     def _llm_type(self) -> str:
         return "internal_llm_service"
     
+    def _payload(self, prompt: str, stop: Optional[List[str]], **kwargs: Any) -> dict:
+        return {
+            "prompt": prompt,
+            "stop": stop if stop else [],
+            **kwargs
+        }
+    
+    def _event_text(self, event: Optional[str], data: str) -> Optional[str]:
+        """Text delta carried by one server-sent event from /generate/stream, if any."""
+        if event == "error":
+            raise RuntimeError(json.loads(data).get("detail", data))
+        return json.loads(data).get("text")
+    
     def _call(
         self,
         prompt: str,
@@ -28,18 +57,108 @@ class InternalLLMService(LLM):
     ) -> str:
         """Call the internal LLM service."""
         try:
-            payload = {
-                "prompt": prompt,
-                "stop": stop if stop else [],
-                **kwargs
-            }
-            
-            response = requests.post(
+            response = self.client.post(
                 self.generate_endpoint,
-                json=payload
+                json=self._payload(prompt, stop, **kwargs)
             )
             response.raise_for_status()
             return response.json()["generated_text"]
         except Exception as e:
             logger.error(f"Error calling LLM service: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the internal LLM service without blocking the event loop."""
+        try:
+            response = await self.client.apost(
+                self.generate_endpoint,
+                json=self._payload(prompt, stop, **kwargs)
+            )
+            response.raise_for_status()
+            return response.json()["generated_text"]
+        except Exception as e:
+            logger.error(f"Error calling LLM service: {str(e)}")
+            raise
+    
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """Stream text from the internal LLM service as it is decoded."""
+        try:
+            response = self.client.post(
+                self.stream_endpoint,
+                json=self._payload(prompt, stop, **kwargs),
+                stream=True
+            )
+            with response:
+                response.raise_for_status()
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                        continue
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    text = self._event_text(event, data)
+                    event = None
+                    if text:
+                        chunk = GenerationChunk(text=text)
+                        if run_manager:
+                            run_manager.on_llm_new_token(text, chunk=chunk)
+                        yield chunk
+        except Exception as e:
+            logger.error(f"Error streaming from LLM service: {str(e)}")
+            raise
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Stream text from the internal LLM service without blocking the event loop."""
+        try:
+            response = await self.client.arequest(
+                "POST",
+                self.stream_endpoint,
+                stream=True,
+                json=self._payload(prompt, stop, **kwargs)
+            )
+            try:
+                response.raise_for_status()
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                        continue
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    text = self._event_text(event, data)
+                    event = None
+                    if text:
+                        chunk = GenerationChunk(text=text)
+                        if run_manager:
+                            await run_manager.on_llm_new_token(text, chunk=chunk)
+                        yield chunk
+            finally:
+                await response.aclose()
+        except Exception as e:
+            logger.error(f"Error streaming from LLM service: {str(e)}")
+            raise
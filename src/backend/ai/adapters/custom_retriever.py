@@ -0,0 +1,51 @@
+# src/backend/ai/adapters/custom_retriever.py
+import asyncio
+import logging
+from typing import List
+from langchain_core.callbacks.manager import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from adapters.retrieval_cache import RetrievalCache
+
+logger = logging.getLogger(__name__)
+
+class CachedRetriever(BaseRetriever):
+    """Top-k similarity retriever that skips the embedding and search calls for recent queries."""
+
+    vector_store: VectorStore
+    cache: RetrievalCache
+    model: str
+    index: str
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embedding = self.cache.get_embedding(self.model, query)
+        if embedding is None:
+            embedding = self.vector_store.embeddings.embed_query(query)
+            self.cache.set_embedding(self.model, query, embedding)
+
+        documents = self.cache.get_documents(self.index, self.k, embedding)
+        if documents is None:
+            # Same hybrid (BM25 + vector) query as an uncached similarity_search,
+            # with the vector passed in instead of embedded again
+            documents = self.vector_store.similarity_search(query, k=self.k, vector=embedding)
+            self.cache.set_documents(self.index, self.k, embedding, documents)
+        return documents
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embedding = self.cache.get_embedding(self.model, query)
+        if embedding is None:
+            embedding = await self.vector_store.embeddings.aembed_query(query)
+            self.cache.set_embedding(self.model, query, embedding)
+
+        documents = self.cache.get_documents(self.index, self.k, embedding)
+        if documents is None:
+            # The Weaviate store only searches synchronously
+            documents = await asyncio.to_thread(self.vector_store.similarity_search, query, k=self.k, vector=embedding)
+            self.cache.set_documents(self.index, self.k, embedding, documents)
+        return documents
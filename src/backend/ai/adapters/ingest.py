@@ -6,11 +6,26 @@ from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_weaviate import WeaviateVectorStore
 from adapters.custom_embeddings import InternalEmbeddingService
+from utils.http_client import get_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Adapter replicas (comma-separated) whose retrieval caches go stale on ingest
+LANGCHAIN_ADAPTER_URL = os.getenv("LANGCHAIN_ADAPTER_URL", "http://langchain-adapter:7100")
+
+def invalidate_retrieval_caches():
+    """Tell every adapter replica to drop its cached retrieval results"""
+    for url in [url.strip() for url in LANGCHAIN_ADAPTER_URL.split(",") if url.strip()]:
+        try:
+            response = get_client("langchain_adapter", url).post("/cache/invalidate")
+            response.raise_for_status()
+            logger.info(f"Invalidated retrieval cache at {url}")
+        except Exception as e:
+            # Cached results still expire after RAG_RETRIEVAL_CACHE_TTL
+            logger.warning(f"Failed to invalidate retrieval cache at {url}: {str(e)}")
+
 def main():
     parser = argparse.ArgumentParser(description="Ingest documents into the vector store")
     parser.add_argument("--data-dir", type=str, required=True, help="Directory containing documents to ingest")
@@ -64,6 +79,7 @@ def main():
     )
     
     logger.info("Documents successfully ingested")
+    invalidate_retrieval_caches()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
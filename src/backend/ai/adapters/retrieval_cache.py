@@ -0,0 +1,75 @@
+# src/backend/ai/adapters/retrieval_cache.py
+import hashlib
+import json
+import logging
+import unicodedata
+from typing import Any, List, Optional
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class RetrievalCache:
+    """Two-level cache in front of the vector store.
+
+    The first level maps a query to its embedding, keyed by the embedding
+    model so a model change never reuses old vectors. The second maps an
+    embedding, ``k`` and the index to the retrieved documents. Documents go
+    stale when the index is written to, so ``invalidate`` drops the second
+    level; embeddings stay valid.
+    """
+
+    def __init__(self, max_entries: int, embedding_ttl: float, retrieval_ttl: float):
+        self.embeddings = LRUCache(max_entries, embedding_ttl)
+        self.documents = LRUCache(max_entries, retrieval_ttl)
+        self.hits = {"embedding": 0, "documents": 0}
+        self.misses = {"embedding": 0, "documents": 0}
+
+    @staticmethod
+    def _query_key(model: str, query: str) -> str:
+        return _digest(model, unicodedata.normalize("NFC", query).strip())
+
+    @staticmethod
+    def _documents_key(index: str, k: int, embedding: List[float]) -> str:
+        return _digest(index, k, embedding)
+
+    def get_embedding(self, model: str, query: str) -> Optional[List[float]]:
+        embedding = self.embeddings.get(self._query_key(model, query))
+        self._count("embedding", embedding)
+        return embedding
+
+    def set_embedding(self, model: str, query: str, embedding: List[float]):
+        self.embeddings.set(self._query_key(model, query), list(embedding))
+
+    def get_documents(self, index: str, k: int, embedding: List[float]) -> Optional[list]:
+        documents = self.documents.get(self._documents_key(index, k, embedding))
+        self._count("documents", documents)
+        return list(documents) if documents is not None else None
+
+    def set_documents(self, index: str, k: int, embedding: List[float], documents: list):
+        self.documents.set(self._documents_key(index, k, embedding), list(documents))
+
+    def invalidate(self):
+        """Drop retrieved documents after the index changed."""
+        self.documents.clear()
+        logger.info("Retrieval cache invalidated")
+
+    def _count(self, level: str, value):
+        if value is None:
+            self.misses[level] += 1
+        else:
+            self.hits[level] += 1
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "embeddings": len(self.embeddings),
+            "documents": len(self.documents),
+        }
@@ -1,14 +1,23 @@
 # src/backend/ai/adapters/service.py
 import os
+import json
+import asyncio
 import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+from dotenv import dotenv_values
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from langchain_core.runnables import Runnable
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 from langchain.globals import set_debug
 from langchain_core.output_parsers import StrOutputParser
 from langchain_weaviate import WeaviateVectorStore
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.chat_models import ChatOllama
+from adapters.retrieval_cache import RetrievalCache
+from utils import tracing
+from utils.metrics import instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,32 +28,81 @@ if os.getenv("LANGCHAIN_DEBUG", "false").lower() == "true":
     set_debug(True)
 
 app = FastAPI(title="LangChain MCP Adapter Service")
+instrument(app, "langchain_adapter")
+tracing.trace_app(app, "langchain_adapter")
 
-# Initialize vector store
-def init_vector_store():
+# The chain is built once and rebuilt when its settings change: they come
+# from the environment, overridden by RAG_CONFIG_FILE, which is re-read
+# every RAG_CONFIG_POLL_INTERVAL seconds (0 disables hot reload)
+RAG_CONFIG_FILE = os.getenv("RAG_CONFIG_FILE", "/app/configs/rag.env")
+RAG_CONFIG_POLL_INTERVAL = float(os.getenv("RAG_CONFIG_POLL_INTERVAL", "10"))
+
+RAG_SETTINGS = {
+    "WEAVIATE_URL": "http://weaviate:8080",
+    "WEAVIATE_INDEX": "LangChainDocs",
+    "USE_INTERNAL_EMBEDDING": "true",
+    "EMBEDDING_SERVICE_URL": "http://embedding-layer:9000",
+    "EMBEDDING_MODEL": "BAAI/bge-small-en-v1.5",
+    "USE_INTERNAL_LLM": "true",
+    "LLM_SERVICE_URL": "http://llm-layer:5000",
+    "LLM_MODEL": "llama3",
+    "OLLAMA_URL": "http://ollama:11434",
+    "RAG_TOP_K": "5",
+}
+
+# Query embeddings and retrieved documents are cached across chain reloads;
+# ingest.py invalidates the documents after writing to the index
+RAG_CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", "1024"))  # 0 disables caching
+RAG_EMBEDDING_CACHE_TTL = float(os.getenv("RAG_EMBEDDING_CACHE_TTL", "3600"))
+RAG_RETRIEVAL_CACHE_TTL = float(os.getenv("RAG_RETRIEVAL_CACHE_TTL", "300"))
+
+retrieval_cache = (
+    RetrievalCache(RAG_CACHE_SIZE, RAG_EMBEDDING_CACHE_TTL, RAG_RETRIEVAL_CACHE_TTL) if RAG_CACHE_SIZE > 0 else None
+)
+rag_chain: Optional["RAGChain"] = None
+rag_settings: Optional[Dict[str, str]] = None
+reload_lock = asyncio.Lock()
+watch_task: Optional[asyncio.Task] = None
+
+def load_settings() -> Dict[str, str]:
+    """Chain settings from the environment, overridden by RAG_CONFIG_FILE if it exists"""
+    settings = {key: os.getenv(key, default) for key, default in RAG_SETTINGS.items()}
+    if os.path.exists(RAG_CONFIG_FILE):
+        overrides = dotenv_values(RAG_CONFIG_FILE)
+        settings.update({key: value for key, value in overrides.items() if key in RAG_SETTINGS and value is not None})
+    return settings
+
+# Connect to Weaviate; a chain rebuilt for the same URL reuses the connection
+def init_weaviate_client(settings: Dict[str, str]):
     try:
         import weaviate
-        client = weaviate.Client(
-            url=os.getenv("WEAVIATE_URL", "http://weaviate:8080"),
+        return weaviate.Client(
+            url=settings["WEAVIATE_URL"],
         )
-        
+    except Exception as e:
+        logger.error(f"Failed to connect to Weaviate: {str(e)}")
+        raise
+
+# Initialize vector store
+def init_vector_store(settings: Dict[str, str], client):
+    try:
         # Initialize embedding model (use internal embedding service or local)
-        if os.getenv("USE_INTERNAL_EMBEDDING", "true").lower() == "true":
+        if settings["USE_INTERNAL_EMBEDDING"].lower() == "true":
             # Using internal embedding service
             from adapters.custom_embeddings import InternalEmbeddingService
             embeddings = InternalEmbeddingService(
-                base_url=os.getenv("EMBEDDING_SERVICE_URL", "http://embedding-layer:9000")
+                base_url=settings["EMBEDDING_SERVICE_URL"]
             )
         else:
             # Using local embedding model
             embeddings = HuggingFaceEmbeddings(
-                model_name=os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+                model_name=settings["EMBEDDING_MODEL"]
             )
         
         # Initialize vector store
         return WeaviateVectorStore(
             client=client,
-            index_name=os.getenv("WEAVIATE_INDEX", "LangChainDocs"),
+            index_name=settings["WEAVIATE_INDEX"],
             text_key="content",
             embedding=embeddings,
         )
@@ -53,33 +111,100 @@ def init_vector_store():
         raise
 
 # Initialize LLM
-def init_llm():
+def init_llm(settings: Dict[str, str]):
     try:
         # Use internal LLM service or local model
-        if os.getenv("USE_INTERNAL_LLM", "true").lower() == "true":
+        if settings["USE_INTERNAL_LLM"].lower() == "true":
             # Using internal LLM service
             from adapters.custom_llm import InternalLLMService
             return InternalLLMService(
-                base_url=os.getenv("LLM_SERVICE_URL", "http://llm-layer:5000")
+                base_url=settings["LLM_SERVICE_URL"]
             )
         else:
             # Using local LLM via Ollama
             return ChatOllama(
-                model=os.getenv("LLM_MODEL", "llama3"),
-                base_url=os.getenv("OLLAMA_URL", "http://ollama:11434"),
+                model=settings["LLM_MODEL"],
+                base_url=settings["OLLAMA_URL"],
             )
     except Exception as e:
         logger.error(f"Failed to initialize LLM: {str(e)}")
         raise
 
+# Wrap a chain step in a span, so each stage of a query shows up in its trace
+def traced(name: str, step: Runnable) -> Runnable:
+    def invoke(value, config: RunnableConfig):
+        with tracing.span(name):
+            return step.invoke(value, config)
+
+    async def ainvoke(value, config: RunnableConfig):
+        with tracing.span(name):
+            return await step.ainvoke(value, config)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+@dataclass
+class RAGChain:
+    """The RAG steps, composed for /query and run one at a time for /query/stream"""
+    retriever: Runnable
+    prompt: Runnable
+    llm: Runnable
+    client: Any = None
+    runnable: Runnable = field(init=False)
+
+    def __post_init__(self):
+        self.runnable = (
+            {"context": traced("vector_search", self.retriever), "question": lambda x: x}
+            | traced("prompt_build", self.prompt)
+            | traced("generate", self.llm)
+            | StrOutputParser()
+        )
+
+    def close(self):
+        """Close the chain's Weaviate connection"""
+        # Not every weaviate-client version has close()
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    async def ainvoke(self, query: str) -> str:
+        return await self.runnable.ainvoke(query)
+
+    async def astream(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the retrieved documents as {"sources": [...]}, then each {"text": token} of the answer"""
+        with tracing.span("vector_search"):
+            documents = await self.retriever.ainvoke(query)
+        yield {"sources": documents}
+        with tracing.span("prompt_build"):
+            prompt_value = await self.prompt.ainvoke({"context": documents, "question": query})
+        with tracing.span("generate"):
+            # Completion LLMs stream strings, chat models (e.g. ChatOllama) message chunks
+            async for chunk in self.llm.astream(prompt_value):
+                text = chunk if isinstance(chunk, str) else chunk.content
+                if text:
+                    yield {"text": text}
+
 # Create the chain
-def get_rag_chain():
-    vector_store = init_vector_store()
-    llm = init_llm()
+def get_rag_chain(settings: Optional[Dict[str, str]] = None, client=None) -> RAGChain:
+    settings = settings or load_settings()
+    if client is None:
+        client = init_weaviate_client(settings)
+    vector_store = init_vector_store(settings, client)
+    llm = init_llm(settings)
     
-    retriever = vector_store.as_retriever(
-        search_kwargs={"k": int(os.getenv("RAG_TOP_K", "5"))}
-    )
+    if retrieval_cache is not None:
+        from adapters.custom_retriever import CachedRetriever
+        internal = settings["USE_INTERNAL_EMBEDDING"].lower() == "true"
+        retriever = CachedRetriever(
+            vector_store=vector_store,
+            cache=retrieval_cache,
+            model=settings["EMBEDDING_SERVICE_URL"] if internal else settings["EMBEDDING_MODEL"],
+            index=f"{settings['WEAVIATE_URL']}/{settings['WEAVIATE_INDEX']}",
+            k=int(settings["RAG_TOP_K"]),
+        )
+    else:
+        retriever = vector_store.as_retriever(
+            search_kwargs={"k": int(settings["RAG_TOP_K"])}
+        )
     
     from langchain_core.prompts import ChatPromptTemplate
     
@@ -93,14 +218,59 @@ def get_rag_chain():
     
     prompt = ChatPromptTemplate.from_template(template)
     
-    chain = (
-        {"context": retriever, "question": lambda x: x}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
-    
-    return chain
+    return RAGChain(retriever=retriever, prompt=prompt, llm=llm, client=client)
+
+async def reload_chain(force: bool = False) -> bool:
+    """Rebuild the chain if its settings changed; queries keep using the old one until the new one is ready"""
+    global rag_chain, rag_settings
+    async with reload_lock:
+        settings = load_settings()
+        if not force and rag_chain is not None and settings == rag_settings:
+            return False
+        # Keep the Weaviate connection unless it moved or a fresh one was asked for
+        previous = rag_chain
+        client = None
+        if not force and previous is not None and settings["WEAVIATE_URL"] == rag_settings["WEAVIATE_URL"]:
+            client = previous.client
+        # Building may load a local embedding model, so keep it off the event loop
+        chain = await asyncio.to_thread(get_rag_chain, settings, client)
+        rag_chain, rag_settings = chain, settings
+        logger.info("RAG chain built")
+        if previous is not None and previous.client is not chain.client:
+            try:
+                await asyncio.to_thread(previous.close)
+            except Exception as e:
+                logger.warning(f"Failed to close the previous Weaviate client: {str(e)}")
+        return True
+
+async def get_chain() -> RAGChain:
+    if rag_chain is None:
+        await reload_chain()
+    return rag_chain
+
+async def watch_config(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_chain()
+        except Exception as e:
+            logger.error(f"Failed to reload RAG chain, keeping the current one: {str(e)}")
+
+@app.on_event("startup")
+async def startup_event():
+    global watch_task
+    try:
+        await reload_chain()
+    except Exception as e:
+        # Queries retry the build, so the service can start before its dependencies
+        logger.error(f"Failed to build RAG chain: {str(e)}")
+    if RAG_CONFIG_POLL_INTERVAL > 0:
+        watch_task = asyncio.create_task(watch_config(RAG_CONFIG_POLL_INTERVAL))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if watch_task is not None:
+        watch_task.cancel()
 
 # Query model
 class QueryRequest(BaseModel):
@@ -112,16 +282,69 @@ class QueryResponse(BaseModel):
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     try:
-        chain = get_rag_chain()
-        response = chain.invoke(request.query)
+        chain = await get_chain()
+        response = await chain.ainvoke(request.query)
         return {"response": response}
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def source(document) -> Dict[str, Any]:
+    return {"content": document.page_content, "metadata": document.metadata}
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """Stream the answer as Server-Sent Events: a "sources" event with the retrieved documents, then tokens"""
+    try:
+        chain = await get_chain()
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        try:
+            async for item in chain.astream(request.query):
+                if "sources" in item:
+                    sources = [source(document) for document in item["sources"]]
+                    yield f"event: sources\ndata: {json.dumps(sources, default=str)}\n\n"
+                else:
+                    yield f"data: {json.dumps(item)}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/reload")
+async def reload():
+    """Rebuild the chain now, e.g. after the vector store or LLM moved"""
+    try:
+        await reload_chain(force=True)
+        return {"status": "reloaded"}
+    except Exception as e:
+        logger.error(f"Error reloading RAG chain: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/cache")
+async def cache_stats():
+    """Hit rates of the query-embedding and retrieval caches"""
+    return retrieval_cache.stats if retrieval_cache is not None else {"enabled": False}
+
+@app.post("/cache/invalidate")
+async def invalidate_cache():
+    """Drop cached retrieval results, called by ingest.py after it writes to the index"""
+    if retrieval_cache is not None:
+        retrieval_cache.invalidate()
+    return {"status": "invalidated"}
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "chain_loaded": rag_chain is not None}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,107 @@
+# src/backend/ai/api_gateway/coalesce.py
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BufferedResponse:
+    """A complete upstream response that can be replayed to many clients."""
+    status_code: int
+    headers: List[Tuple[str, str]]
+    content: bytes
+
+    @property
+    def cacheable(self) -> bool:
+        if not 200 <= self.status_code < 300:
+            return False
+        cache_control = ",".join(value for name, value in self.headers if name.lower() == "cache-control")
+        return "no-store" not in cache_control.lower()
+
+
+def request_key(method: str, url: str, body: bytes, headers: Dict[str, str]) -> str:
+    """Identity of a request: method, full URL, body and the headers that change the answer."""
+    digest = hashlib.sha256()
+    for part in (method.upper(), url, headers.get("authorization", ""), headers.get("accept", "")):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """Share one upstream call between identical concurrent requests.
+
+    The first request for a key starts the upstream call as its own task;
+    requests arriving while it runs wait for the same result, so a client
+    disconnecting does not cancel the call for the others. Successful
+    responses are kept for ``ttl`` seconds, at most ``max_entries`` of them
+    and only up to ``max_bytes`` each.
+    """
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._cache: "OrderedDict[str, Tuple[float, BufferedResponse]]" = OrderedDict()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def _get(self, key: str) -> Optional[BufferedResponse]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if time.monotonic() >= expires:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _store(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        response = task.result()
+        if self.ttl <= 0 or not response.cacheable or len(response.content) > self.max_bytes:
+            return
+        self._cache[key] = (time.monotonic() + self.ttl, response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[BufferedResponse]]) -> Tuple[BufferedResponse, str]:
+        """Return the response for ``key`` and whether it was a cache hit, coalesced or fetched."""
+        cached = self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, "HIT"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), "COALESCED"
+
+        self.misses += 1
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._store(key, done))
+        return await asyncio.shield(task), "MISS"
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "in_flight": len(self._inflight),
+            "cached": len(self._cache),
+        }
@@ -1,16 +1,25 @@
 # src/backend/api_gateway/service.py
 import os
 import logging
+from typing import List, Optional, Tuple
 from fastapi import FastAPI, HTTPException, Request
+import time
+from fastapi.responses import Response, StreamingResponse
 import httpx
+from api_gateway.coalesce import BufferedResponse, SingleFlight, request_key
+from api_gateway.upstream import UpstreamPool, parse_replicas
+from utils import tracing
+from utils.metrics import instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="AI Infrastructure API Gateway")
+instrument(app, "api_gateway")
+tracing.trace_app(app, "api_gateway")
 
-# Service endpoints
+# Service endpoints; each accepts a comma-separated list of replicas
 INFERENCE_ENDPOINT = os.getenv("INFERENCE_ENDPOINT", "http://triton-server:8000")
 TRAINING_ENDPOINT = os.getenv("TRAINING_ENDPOINT", "http://pytorch-training:7000")
 DATA_PROCESSING_ENDPOINT = os.getenv("DATA_PROCESSING_ENDPOINT", "http://rapids-processing:7500")
@@ -18,61 +27,272 @@ ASR_ENDPOINT = os.getenv("ASR_ENDPOINT", "http://riva-asr:8001")
 TTS_ENDPOINT = os.getenv("TTS_ENDPOINT", "http://riva-tts:8002")
 LLM_ROUTER_ENDPOINT = os.getenv("LLM_ROUTER_ENDPOINT", "http://llm-router:6060")
 
+# Upstream connection pool, shared by every route for the app's lifetime
+GATEWAY_TIMEOUT = float(os.getenv("GATEWAY_TIMEOUT", "60"))  # Max wait per read, not per request
+GATEWAY_CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "5"))
+GATEWAY_MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "200"))
+GATEWAY_MAX_KEEPALIVE = int(os.getenv("GATEWAY_MAX_KEEPALIVE", "50"))
+GATEWAY_HTTP2 = os.getenv("GATEWAY_HTTP2", "true").lower() == "true"
+
+# Headers that describe one connection rather than the message (RFC 9110 7.6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+}
+
+# Opt-in request coalescing: route prefixes (e.g. "data,inference") whose
+# POSTs are idempotent, so identical concurrent requests can share one call
+GATEWAY_COALESCE_ROUTES = {
+    route.strip() for route in os.getenv("GATEWAY_COALESCE_ROUTES", "").split(",") if route.strip()
+}
+GATEWAY_COALESCE_TTL = float(os.getenv("GATEWAY_COALESCE_TTL", "2"))
+GATEWAY_COALESCE_CACHE_SIZE = int(os.getenv("GATEWAY_COALESCE_CACHE_SIZE", "1024"))
+GATEWAY_COALESCE_MAX_BYTES = int(os.getenv("GATEWAY_COALESCE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+client: Optional[httpx.AsyncClient] = None
+single_flight = SingleFlight(GATEWAY_COALESCE_TTL, GATEWAY_COALESCE_CACHE_SIZE, GATEWAY_COALESCE_MAX_BYTES)
+
+# Active health checks hit <NAME>_HEALTH_PATH on every replica; an empty
+# path leaves only passive checks (the RouteLLM server has no health route)
+upstreams = {
+    name: UpstreamPool(name, parse_replicas(endpoint), health_path=os.getenv(f"{name.upper()}_HEALTH_PATH", health_path))
+    for name, endpoint, health_path in [
+        ("inference", INFERENCE_ENDPOINT, "/v2/health/ready"),
+        ("training", TRAINING_ENDPOINT, "/health"),
+        ("data_processing", DATA_PROCESSING_ENDPOINT, "/health"),
+        ("asr", ASR_ENDPOINT, "/health"),
+        ("tts", TTS_ENDPOINT, "/health"),
+        ("llm_router", LLM_ROUTER_ENDPOINT, ""),
+    ]
+}
+
+def create_client() -> httpx.AsyncClient:
+    """Pooled upstream client; HTTP/2 is negotiated with upstreams that offer it over TLS"""
+    http2 = GATEWAY_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("h2 is not installed, falling back to HTTP/1.1 upstream connections")
+            http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(GATEWAY_TIMEOUT, connect=GATEWAY_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=GATEWAY_MAX_CONNECTIONS,
+            max_keepalive_connections=GATEWAY_MAX_KEEPALIVE,
+        ),
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    global client
+    client = create_client()
+    for pool in upstreams.values():
+        if pool.health_path:
+            pool.start_health_checks(client)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for pool in upstreams.values():
+        await pool.stop_health_checks()
+    if client is not None:
+        await client.aclose()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/upstreams")
+async def upstream_status():
+    """Load-balancing state of every replica"""
+    return {
+        "upstreams": {name: pool.stats for name, pool in upstreams.items()},
+        "coalescing": single_flight.stats,
+    }
+
 @app.post("/inference/{path:path}")
 async def inference_proxy(path: str, request: Request):
     """Proxy requests to inference service"""
-    return await proxy_request(f"{INFERENCE_ENDPOINT}/{path}", request)
+    return await proxy_request(upstreams["inference"], path, request)
 
 @app.post("/training/{path:path}")
 async def training_proxy(path: str, request: Request):
     """Proxy requests to training service"""
-    return await proxy_request(f"{TRAINING_ENDPOINT}/{path}", request)
+    return await proxy_request(upstreams["training"], path, request)
 
 @app.post("/data/{path:path}")
 async def data_proxy(path: str, request: Request):
     """Proxy requests to data processing service"""
-    return await proxy_request(f"{DATA_PROCESSING_ENDPOINT}/{path}", request)
+    return await proxy_request(upstreams["data_processing"], path, request)
 
 @app.post("/asr/{path:path}")
 async def asr_proxy(path: str, request: Request):
     """Proxy requests to ASR service"""
-    return await proxy_request(f"{ASR_ENDPOINT}/{path}", request)
+    return await proxy_request(upstreams["asr"], path, request)
 
 @app.post("/tts/{path:path}")
 async def tts_proxy(path: str, request: Request):
     """Proxy requests to TTS service"""
-    return await proxy_request(f"{TTS_ENDPOINT}/{path}", request)
+    return await proxy_request(upstreams["tts"], path, request)
 
 @app.post("/v1/completions")
 async def completions(request: Request):
     """Route to the appropriate LLM based on complexity"""
-    return await proxy_request(f"{LLM_ROUTER_ENDPOINT}/v1/chat/completions", request)
+    return await proxy_request(upstreams["llm_router"], "v1/chat/completions", request)
+
+def forward_headers(headers: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Drop hop-by-hop headers, including any named in the Connection header"""
+    connection = {
+        token.strip().lower()
+        for name, value in headers
+        if name.lower() == "connection"
+        for token in value.split(",")
+    }
+    return [
+        (name, value)
+        for name, value in headers
+        if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() not in connection
+    ]
 
-async def proxy_request(url: str, request: Request):
-    """Proxy a request to a service"""
+async def send_upstream(pool: UpstreamPool, path: str, request: Request, content) -> httpx.Response:
+    """Send a request to the least loaded replica and return the response with its body unread
+
+    The replica counts the request as outstanding until the response is
+    closed, so long streams weigh on its load for as long as they run. The
+    upstream call gets its own client span, ended on close as well, and its
+    trace context replaces the caller's in the forwarded headers.
+    """
+    replica = pool.acquire()
+    url = f"{replica.url}/{path}"
+    span = tracing.start_span(
+        f"{request.method} {pool.name}",
+        {"http.request.method": request.method, "server.address": replica.url, "url.path": f"/{path}"},
+    )
+    start = time.perf_counter()
     try:
-        body = await request.body()
-        headers = dict(request.headers)
-        
-        # Remove headers that might cause issues
-        headers.pop("host", None)
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method=request.method,
-                url=url,
-                content=body,
-                headers=headers,
-                params=request.query_params,
-                timeout=60.0
-            )
-            
-            return response.json()
+        upstream_request = client.build_request(
+            method=request.method,
+            url=url,
+            content=content,
+            headers=tracing.inject_list(forward_headers(request.headers.items()), span),
+            params=request.query_params,
+        )
+        response = await client.send(upstream_request, stream=True)
+    except httpx.TimeoutException as e:
+        pool.observe(replica, None, None)
+        pool.release(replica)
+        tracing.end_span(span, error=e)
+        logger.error(f"Timed out proxying request to {url}: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except httpx.TransportError as e:
+        pool.observe(replica, None, None)
+        pool.release(replica)
+        tracing.end_span(span, error=e)
+        logger.error(f"Error proxying request to {url}: {str(e)}")
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
+        pool.release(replica)
+        tracing.end_span(span, error=e)
         logger.error(f"Error proxying request: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    except BaseException as e:
+        pool.release(replica)
+        tracing.end_span(span, error=e)
+        raise
+
+    pool.observe(replica, time.perf_counter() - start, response.status_code)
+    close = response.aclose
+    released = False
+
+    async def aclose():
+        # Both the relay and the response close it; release the replica once
+        nonlocal released
+        if released:
+            return
+        released = True
+        try:
+            await close()
+        finally:
+            pool.release(replica)
+            tracing.end_span(span, response.status_code)
+
+    response.aclose = aclose
+    return response
+
+def encode_headers(headers: List[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+async def proxy_request(pool: UpstreamPool, path: str, request: Request):
+    """Proxy a request to a service, streaming both bodies
+
+    The upstream status code and headers are passed through unchanged, and
+    the response body is relayed as it arrives, still encoded, so audio
+    files and server-sent events work and large payloads are never held in
+    memory. Routes listed in GATEWAY_COALESCE_ROUTES go through
+    coalesced_request instead.
+    """
+    if request.url.path.strip("/").split("/")[0] in GATEWAY_COALESCE_ROUTES:
+        return await coalesced_request(pool, path, request)
+
+    response = await send_upstream(pool, path, request, request.stream())
+    return ProxiedResponse(response)
+
+async def relay(response: httpx.Response):
+    """Yield the raw upstream body and close the response however the stream ends
+
+    A client disconnect raises out of, or cancels, the send loop, so the
+    close cannot be left to a background task that would never run.
+    """
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+
+class ProxiedResponse(StreamingResponse):
+    """Streams an upstream response and closes it as soon as the client is done or gone
+
+    Closing after the send loop, rather than only in relay, also covers a
+    disconnect before the first chunk and releases the replica right away
+    instead of whenever the abandoned generator is collected.
+    """
+
+    def __init__(self, upstream: httpx.Response):
+        super().__init__(relay(upstream), status_code=upstream.status_code)
+        self.upstream = upstream
+        self.raw_headers = encode_headers(forward_headers(upstream.headers.multi_items()))
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.upstream.aclose()
+
+async def coalesced_request(pool: UpstreamPool, path: str, request: Request):
+    """Proxy an idempotent request, sharing one upstream call between identical requests
+
+    Requests with the same method, URL, body and credentials that arrive
+    while a call is in flight wait for its response instead of sending
+    their own, and successful responses are reused for GATEWAY_COALESCE_TTL
+    seconds. The X-Gateway-Cache header tells which of these happened.
+    """
+    body = await request.body()
+    key = request_key(request.method, f"{pool.name}/{path}?{request.url.query}", body, request.headers)
+
+    async def fetch() -> BufferedResponse:
+        response = await send_upstream(pool, path, request, body)
+        try:
+            content = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        return BufferedResponse(response.status_code, forward_headers(response.headers.multi_items()), content)
+
+    result, outcome = await single_flight.do(key, fetch)
+    proxied = Response(content=result.content, status_code=result.status_code)
+    proxied.raw_headers = encode_headers(
+        [(name, value) for name, value in result.headers if name.lower() != "content-length"]
+        + [("content-length", str(len(result.content))), ("x-gateway-cache", outcome)]
+    )
+    return proxied
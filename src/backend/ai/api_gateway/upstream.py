@@ -0,0 +1,251 @@
+# src/backend/ai/api_gateway/upstream.py
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import List, Optional
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# "least_outstanding" sends each request to the replica with the fewest in
+# flight; "ewma" also weighs in each replica's recent response latency
+GATEWAY_LB_STRATEGY = os.getenv("GATEWAY_LB_STRATEGY", "least_outstanding")
+GATEWAY_EWMA_DECAY = float(os.getenv("GATEWAY_EWMA_DECAY", "0.3"))
+GATEWAY_HEALTH_INTERVAL = float(os.getenv("GATEWAY_HEALTH_INTERVAL", "10"))  # 0 disables active checks
+GATEWAY_HEALTH_TIMEOUT = float(os.getenv("GATEWAY_HEALTH_TIMEOUT", "2"))
+GATEWAY_UNHEALTHY_THRESHOLD = int(os.getenv("GATEWAY_UNHEALTHY_THRESHOLD", "2"))
+GATEWAY_EJECT_FAILURES = int(os.getenv("GATEWAY_EJECT_FAILURES", "5"))
+GATEWAY_EJECT_TIME = float(os.getenv("GATEWAY_EJECT_TIME", "30"))
+GATEWAY_EJECT_MAX_TIME = float(os.getenv("GATEWAY_EJECT_MAX_TIME", "300"))
+GATEWAY_EJECT_MAX_PERCENT = float(os.getenv("GATEWAY_EJECT_MAX_PERCENT", "50"))
+
+REQUESTS = Counter(
+    "gateway_upstream_requests_total",
+    "Requests proxied to each replica",
+    ["upstream", "replica", "outcome"],
+)
+LATENCY = Histogram(
+    "gateway_upstream_response_seconds",
+    "Time until each replica returned response headers",
+    ["upstream", "replica"],
+)
+OUTSTANDING = Gauge(
+    "gateway_upstream_outstanding",
+    "Requests in flight per replica",
+    ["upstream", "replica"],
+)
+AVAILABLE = Gauge(
+    "gateway_upstream_available",
+    "Whether a replica is healthy and not ejected",
+    ["upstream", "replica"],
+)
+EJECTIONS = Counter(
+    "gateway_upstream_ejections_total",
+    "Times a replica was ejected for consecutive failures",
+    ["upstream", "replica"],
+)
+
+
+def parse_replicas(value: str) -> List[str]:
+    """Replica base URLs from a comma-separated endpoint setting."""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class Replica:
+    """One instance of an upstream service and what the gateway has observed about it."""
+
+    def __init__(self, upstream: str, url: str):
+        self.upstream = upstream
+        self.url = url
+        self.outstanding = 0
+        self.ewma: Optional[float] = None
+        self.healthy = True
+        self.failed_checks = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.labels = {"upstream": upstream, "replica": url}
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def available(self, now: float) -> bool:
+        return self.healthy and not self.ejected(now)
+
+    def update_gauges(self, now: Optional[float] = None):
+        OUTSTANDING.labels(**self.labels).set(self.outstanding)
+        AVAILABLE.labels(**self.labels).set(int(self.available(now if now is not None else time.monotonic())))
+
+    @property
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "ewma_latency": self.ewma,
+            "healthy": self.healthy,
+            "ejected_for": max(0.0, self.ejected_until - now),
+            "ejections": self.ejections,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class UpstreamPool:
+    """Load-balanced set of replicas behind one gateway route.
+
+    Each request goes to the available replica with the fewest requests in
+    flight, or with ``strategy="ewma"`` the lowest latency-weighted load,
+    with ties broken at random. Replicas are taken out of rotation when
+    active health checks fail ``unhealthy_threshold`` times in a row, and
+    ejected when ``eject_failures`` proxied requests in a row fail; each
+    further ejection lasts longer. At most ``eject_max_percent`` of the
+    replicas are ejected at once, and if no replica is available the pool
+    falls back to all of them rather than failing every request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        urls: List[str],
+        strategy: str = GATEWAY_LB_STRATEGY,
+        health_path: str = "/health",
+        eject_failures: int = GATEWAY_EJECT_FAILURES,
+        eject_time: float = GATEWAY_EJECT_TIME,
+        eject_max_time: float = GATEWAY_EJECT_MAX_TIME,
+        eject_max_percent: float = GATEWAY_EJECT_MAX_PERCENT,
+        unhealthy_threshold: int = GATEWAY_UNHEALTHY_THRESHOLD,
+    ):
+        if not urls:
+            raise ValueError(f"Upstream {name} has no replicas")
+        if strategy not in ("least_outstanding", "ewma"):
+            raise ValueError(f"Invalid balancing strategy {strategy}. Use least_outstanding or ewma.")
+        self.name = name
+        self.replicas = [Replica(name, url) for url in urls]
+        self.strategy = strategy
+        self.health_path = health_path
+        self.eject_failures = eject_failures
+        self.eject_time = eject_time
+        self.eject_max_time = eject_max_time
+        self.eject_max_percent = eject_max_percent
+        self.unhealthy_threshold = unhealthy_threshold
+        self._health_task: Optional[asyncio.Task] = None
+        for replica in self.replicas:
+            replica.update_gauges()
+
+    def _load(self, replica: Replica) -> float:
+        if self.strategy == "ewma":
+            # Unmeasured replicas look as fast as the fastest known one, so they get traffic
+            known = [r.ewma for r in self.replicas if r.ewma is not None]
+            latency = replica.ewma if replica.ewma is not None else min(known, default=1.0)
+            return latency * (replica.outstanding + 1)
+        return replica.outstanding
+
+    def pick(self) -> Replica:
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica.available(now)]
+        if not candidates:
+            logger.warning(f"No available replicas for {self.name}, trying all of them")
+            candidates = self.replicas
+        lowest = min(self._load(replica) for replica in candidates)
+        return random.choice([replica for replica in candidates if self._load(replica) == lowest])
+
+    def acquire(self) -> Replica:
+        """Pick a replica and count the request against it until release."""
+        replica = self.pick()
+        replica.outstanding += 1
+        replica.update_gauges()
+        return replica
+
+    def observe(self, replica: Replica, latency: Optional[float], status_code: Optional[int]):
+        """Record the upstream's answer: its latency, or ``None`` values for a transport error."""
+        if latency is not None:
+            LATENCY.labels(**replica.labels).observe(latency)
+            if replica.ewma is None:
+                replica.ewma = latency
+            else:
+                replica.ewma = GATEWAY_EWMA_DECAY * latency + (1 - GATEWAY_EWMA_DECAY) * replica.ewma
+
+        failed = status_code is None or status_code >= 500
+        REQUESTS.labels(**replica.labels, outcome="error" if status_code is None else f"{status_code // 100}xx").inc()
+        if not failed:
+            replica.consecutive_failures = 0
+            return
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.eject_failures:
+            self._eject(replica)
+
+    def release(self, replica: Replica):
+        replica.outstanding -= 1
+        replica.update_gauges()
+
+    def _eject(self, replica: Replica):
+        now = time.monotonic()
+        if replica.ejected(now):
+            return
+        ejected = sum(r.ejected(now) for r in self.replicas)
+        if ejected + 1 > max(1, int(len(self.replicas) * self.eject_max_percent / 100)):
+            return
+        replica.ejections += 1
+        duration = min(self.eject_time * replica.ejections, self.eject_max_time)
+        replica.ejected_until = now + duration
+        replica.consecutive_failures = 0
+        EJECTIONS.labels(**replica.labels).inc()
+        replica.update_gauges(now)
+        logger.warning(f"Ejected {replica.url} from {self.name} for {duration:.0f}s after repeated failures")
+
+    async def check(self, client: httpx.AsyncClient):
+        """Run one round of active health checks."""
+        async def probe(replica: Replica):
+            try:
+                response = await client.get(f"{replica.url}{self.health_path}", timeout=GATEWAY_HEALTH_TIMEOUT)
+                ok = response.is_success
+            except Exception:
+                ok = False
+            if ok:
+                if not replica.healthy:
+                    logger.info(f"{replica.url} in {self.name} is healthy again")
+                replica.healthy = True
+                replica.failed_checks = 0
+            else:
+                replica.failed_checks += 1
+                if replica.healthy and replica.failed_checks >= self.unhealthy_threshold:
+                    logger.warning(f"{replica.url} in {self.name} failed {replica.failed_checks} health checks")
+                    replica.healthy = False
+            replica.update_gauges()
+
+        await asyncio.gather(*(probe(replica) for replica in self.replicas))
+
+    def start_health_checks(self, client: httpx.AsyncClient, interval: Optional[float] = None):
+        interval = GATEWAY_HEALTH_INTERVAL if interval is None else interval
+        if interval <= 0 or self._health_task is not None:
+            return
+
+        async def loop():
+            while True:
+                try:
+                    await self.check(client)
+                except Exception as e:
+                    logger.error(f"Health checks for {self.name} failed: {str(e)}")
+                await asyncio.sleep(interval)
+
+        self._health_task = asyncio.create_task(loop())
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "replicas": [replica.stats for replica in self.replicas],
+        }
@@ -12,12 +12,16 @@ import json
 import aiofiles
 import numpy as np
 from datetime import datetime
+from utils import tracing
+from utils.metrics import AUDIO_SECONDS, instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="ASR Service")
+instrument(app, "asr")
+tracing.trace_app(app, "asr")
 
 # Models for requests and responses
 class TranscriptionRequest(BaseModel):
@@ -102,6 +106,8 @@ async def transcribe_audio(request: TranscriptionRequest):
                 })
         
         processing_time = (datetime.now() - start_time).total_seconds()
+        # Riva reports the seconds of audio it has consumed so far
+        AUDIO_SECONDS.labels(service="asr").inc(getattr(response.results[-1], "audio_processed", 0.0))
         
         return TranscriptionResponse(
             text=text,
@@ -8,12 +8,16 @@ import cudf
 import cuml
 import numpy as np
 from pydantic import BaseModel
+from utils import tracing
+from utils.metrics import ROWS_PROCESSED, instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="RAPIDS Data Processing Service")
+instrument(app, "data_processing")
+tracing.trace_app(app, "data_processing")
 
 class DataProcessRequest(BaseModel):
     data: List[Dict[str, Any]]
@@ -64,7 +68,8 @@ async def process_data(request: DataProcessRequest):
         else:
             # Default to JSON if format not recognized
             result = df.to_pandas().to_dict(orient="records")
-            
+        
+        ROWS_PROCESSED.labels(service="data_processing", operation="process").inc(len(request.data))
         return {"processed_data": result, "row_count": len(result)}
     
     except Exception as e:
@@ -82,6 +87,7 @@ async def analyze_dataset(request: DatasetAnalysisRequest, background_tasks: Bac
         else:
             raise HTTPException(status_code=400, detail="Unsupported file format")
         
+        ROWS_PROCESSED.labels(service="data_processing", operation="analyze").inc(len(df))
         if request.analysis_type == "statistics":
             # Calculate basic statistics
             stats = {}
@@ -121,6 +127,7 @@ async def prepare_for_llm(data_path: str):
         else:
             raise HTTPException(status_code=400, detail="Unsupported file format")
         
+        ROWS_PROCESSED.labels(service="data_processing", operation="prepare_for_llm").inc(len(df))
         # Perform common preprocessing steps:
         # 1. Drop duplicates
         df = df.drop_duplicates()
@@ -1,8 +1,13 @@
 from fastapi import FastAPI, File, UploadFile
-import requests
+from utils.http_client import get_client
+from utils import tracing
+from utils.metrics import instrument
 
 app = FastAPI()
+instrument(app, "embedding")
+tracing.trace_app(app, "embedding")
 NIM_ENDPOINT = "http://localhost:8000/v1/embeddings"
+nim = get_client("nim_embedding", NIM_ENDPOINT, idempotent=True)
 
 @app.post("/embed")
 async def embed_data(text: str = None, image: UploadFile = File(None)):
@@ -17,7 +22,7 @@ async def embed_data(text: str = None, image: UploadFile = File(None)):
         "encoding_format": "float"
     }
     
-    response = requests.post(NIM_ENDPOINT, json=payload)
+    response = await nim.apost(NIM_ENDPOINT, json=payload)
     return response.json()
 
 @app.post("/embed/batch")
@@ -28,5 +33,5 @@ async def embed_batch_data(inputs: list):
         "encoding_format": "float"
     }
     
-    response = requests.post(NIM_ENDPOINT, json=payload)
+    response = await nim.apost(NIM_ENDPOINT, json=payload)
     return response.json()
\ No newline at end of file
@@ -0,0 +1,79 @@
+# src/backend/ai/llm/batch.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one prompt in a batch; exactly one of ``response`` and ``error`` is set."""
+    index: int
+    response: Optional[str] = None
+    model: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_batch(
+    call: Callable[[int], str],
+    size: int,
+    concurrency: int = BATCH_CONCURRENCY,
+    groups: Optional[Dict[Optional[str], Sequence[int]]] = None,
+) -> List[BatchResult]:
+    """Run ``call(i)`` for every index of a batch and return results in index order.
+
+    ``groups`` maps a model name to the indices routed to it. Each group
+    gets its own pool of ``concurrency`` workers and all groups run at the
+    same time, so a slow backend never holds back the other one. A failing
+    item is reported in its result instead of failing the batch.
+    """
+    if groups is None:
+        groups = {None: range(size)}
+    results: List[Optional[BatchResult]] = [None] * size
+
+    def run(model: Optional[str], index: int):
+        try:
+            results[index] = BatchResult(index, response=call(index), model=model)
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {str(e)}")
+            results[index] = BatchResult(index, model=model, error=f"{type(e).__name__}: {str(e)}")
+
+    pools = [
+        ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(indices))), thread_name_prefix="llm-batch")
+        for indices in groups.values()
+    ]
+    try:
+        futures = [
+            pool.submit(run, model, index)
+            for pool, (model, indices) in zip(pools, groups.items())
+            for index in indices
+        ]
+        for future in futures:
+            future.result()
+    finally:
+        for pool in pools:
+            pool.shutdown(wait=True)
+    return results
+
+
+def group_by_model(decisions) -> Dict[str, List[int]]:
+    """Indices of a batch keyed by the model their routing decision picked."""
+    groups: Dict[str, List[int]] = {}
+    for index, decision in enumerate(decisions):
+        groups.setdefault(decision.model, []).append(index)
+    return groups
+
+
+def failed_batch(size: int, error: Exception) -> List[BatchResult]:
+    """Results for a batch that failed before any item was dispatched."""
+    message = f"{type(error).__name__}: {str(error)}"
+    return [BatchResult(index, error=message) for index in range(size)]
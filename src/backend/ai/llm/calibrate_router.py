@@ -0,0 +1,188 @@
+# src/backend/ai/llm/calibrate_router.py
+import os
+import json
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from llm.router_scoring import ROUTER_THRESHOLDS_FILE, prompt_text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def read_prompts(path: str) -> Iterator[str]:
+    """Yield the routed prompt of every line of a JSONL request log.
+
+    Lines carry either a ``prompt`` string or OpenAI-style ``messages``, in
+    which case the last turn is used, as the router does.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield record["prompt"] if "prompt" in record else prompt_text(record["messages"])
+
+def chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+def score_prompts(
+    score_batch: Callable[[List[str]], List[float]],
+    prompts: Iterable[str],
+    chunk_size: int = 2048,
+    workers: int = 4,
+) -> np.ndarray:
+    """Score a stream of prompts in parallel chunks, keeping at most ``2 * workers`` chunks in memory."""
+    scores: List[float] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for i, chunk in enumerate(chunked(prompts, chunk_size)):
+            pending.append(pool.submit(score_batch, chunk))
+            if len(pending) >= 2 * workers:
+                scores.extend(pending.pop(0).result())
+            if i and i % 100 == 0:
+                logger.info(f"Scored {len(scores)} prompts")
+        for future in pending:
+            scores.extend(future.result())
+    return np.asarray(scores, dtype=np.float64)
+
+def strong_fraction(scores: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Fraction of prompts routed to the strong model (score >= threshold) at each threshold."""
+    ordered = np.sort(scores)
+    return (len(ordered) - np.searchsorted(ordered, thresholds, side="left")) / len(ordered)
+
+def threshold_for_fraction(scores: np.ndarray, max_fraction: float) -> float:
+    """Lowest threshold that sends at most ``max_fraction`` of prompts to the strong model."""
+    if max_fraction >= 1.0:
+        return 0.0
+    descending = np.sort(scores)[::-1]
+    k = int(np.floor(max(max_fraction, 0.0) * len(descending)))
+    # Just above the (k+1)-th highest score, so ties never push us over budget
+    return float(min(1.0, np.nextafter(descending[k], np.inf)))
+
+def max_strong_fraction(
+    budget: Optional[float],
+    strong: Optional[float],
+    weak: Optional[float],
+) -> float:
+    """Largest strong-model fraction whose mixed per-request cost stays within budget."""
+    if budget is None:
+        return 1.0
+    if strong is None or weak is None:
+        raise ValueError("A budget needs both the strong and the weak model cost")
+    if strong <= weak:
+        return 1.0
+    return min(1.0, max(0.0, (budget - weak) / (strong - weak)))
+
+def calibrate(
+    scores: np.ndarray,
+    target_fraction: Optional[float] = None,
+    cost_budget: Optional[float] = None,
+    strong_cost: Optional[float] = None,
+    weak_cost: Optional[float] = None,
+    latency_budget: Optional[float] = None,
+    strong_latency: Optional[float] = None,
+    weak_latency: Optional[float] = None,
+) -> dict:
+    """Pick the threshold that uses the strong model as much as the budgets allow."""
+    fraction = min(
+        1.0 if target_fraction is None else target_fraction,
+        max_strong_fraction(cost_budget, strong_cost, weak_cost),
+        max_strong_fraction(latency_budget, strong_latency, weak_latency),
+    )
+    threshold = threshold_for_fraction(scores, fraction)
+    achieved = float(strong_fraction(scores, np.array([threshold]))[0])
+
+    result = {
+        "threshold": threshold,
+        "strong_fraction": achieved,
+        "num_prompts": int(len(scores)),
+    }
+    if strong_cost is not None and weak_cost is not None:
+        result["expected_cost"] = achieved * strong_cost + (1 - achieved) * weak_cost
+    if strong_latency is not None and weak_latency is not None:
+        result["expected_latency"] = achieved * strong_latency + (1 - achieved) * weak_latency
+    return result
+
+def write_threshold(path: str, name: str, result: dict):
+    """Store a calibrated threshold under ``name`` in the shared thresholds file."""
+    thresholds = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            thresholds = json.load(f)
+    thresholds[name] = result
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(thresholds, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate a router threshold against a cost or latency budget")
+    parser.add_argument("--log", type=str, required=True, help="JSONL log of prompts to replay")
+    parser.add_argument("--router", type=str, default="mf", help="RouteLLM router to calibrate")
+    parser.add_argument("--strong-model", type=str, default="gpt-4-1106-preview")
+    parser.add_argument("--weak-model", type=str, default="ollama_chat/llama3")
+    parser.add_argument("--name", type=str, default="text", help="Threshold name, e.g. text or image")
+    parser.add_argument("--strong-fraction", type=float, help="Target fraction of prompts for the strong model")
+    parser.add_argument("--cost-budget", type=float, help="Average cost per request")
+    parser.add_argument("--strong-cost", type=float, help="Cost per strong-model request")
+    parser.add_argument("--weak-cost", type=float, help="Cost per weak-model request")
+    parser.add_argument("--latency-budget", type=float, help="Average latency per request in seconds")
+    parser.add_argument("--strong-latency", type=float, help="Latency of a strong-model request in seconds")
+    parser.add_argument("--weak-latency", type=float, help="Latency of a weak-model request in seconds")
+    parser.add_argument("--chunk-size", type=int, default=2048, help="Prompts per scoring batch")
+    parser.add_argument("--workers", type=int, default=4, help="Scoring batches in flight")
+    parser.add_argument("--curve", type=str, help="Write the strong fraction at every threshold to this CSV")
+    parser.add_argument("--output", type=str, default=ROUTER_THRESHOLDS_FILE, help="Thresholds file to update")
+    args = parser.parse_args()
+
+    from llm.router_pool import get_controller, get_scorer
+    controller = get_controller([args.router], args.strong_model, args.weak_model)
+    scorer = get_scorer(controller, args.router)
+
+    logger.info(f"Scoring prompts from {args.log}")
+    scores = score_prompts(scorer.score_uncached, read_prompts(args.log), args.chunk_size, args.workers)
+    if len(scores) == 0:
+        parser.error(f"No prompts found in {args.log}")
+    logger.info(f"Scored {len(scores)} prompts")
+
+    if args.curve:
+        thresholds = np.linspace(0.0, 1.0, 1001)
+        fractions = strong_fraction(scores, thresholds)
+        np.savetxt(
+            args.curve,
+            np.column_stack([thresholds, fractions]),
+            delimiter=",",
+            header="threshold,strong_fraction",
+            comments="",
+            fmt="%.6f",
+        )
+        logger.info(f"Wrote threshold curve to {args.curve}")
+
+    result = calibrate(
+        scores,
+        target_fraction=args.strong_fraction,
+        cost_budget=args.cost_budget,
+        strong_cost=args.strong_cost,
+        weak_cost=args.weak_cost,
+        latency_budget=args.latency_budget,
+        strong_latency=args.strong_latency,
+        weak_latency=args.weak_latency,
+    )
+    write_threshold(args.output, args.name, result)
+    logger.info(f"Wrote {args.name} threshold to {args.output}")
+    print(json.dumps({args.name: result}, indent=2))
+    print(f"ROUTER_{args.name.upper()}_THRESHOLD={result['threshold']}")
+
+if __name__ == "__main__":
+    main()
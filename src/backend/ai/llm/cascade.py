@@ -0,0 +1,247 @@
+# src/backend/ai/llm/cascade.py
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import litellm
+
+logger = logging.getLogger(__name__)
+
+CASCADE_CONFIDENCE_THRESHOLD = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.6"))
+CASCADE_WEAK_TIMEOUT = float(os.getenv("CASCADE_WEAK_TIMEOUT", "15"))
+CASCADE_WEAK_MAX_TOKENS = int(os.getenv("CASCADE_WEAK_MAX_TOKENS", "1024"))
+# Confidence of a weak answer when the backend returns no logprobs; set it
+# below the threshold to always escalate such answers
+CASCADE_HEURISTIC_CONFIDENCE = float(os.getenv("CASCADE_HEURISTIC_CONFIDENCE", "0.7"))
+
+# Phrases with which small models signal they could not really answer
+HEDGING = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|i cannot answer|"
+    r"i can'?t answer|i'?m unable to|i am unable to|as an ai)\b",
+    re.IGNORECASE,
+)
+
+# Softer signs of doubt, each of which halves the heuristic confidence
+TENTATIVE = re.compile(
+    r"\b(maybe|perhaps|probably|possibly|might|i think|i believe|i guess|not certain|unclear)\b",
+    re.IGNORECASE,
+)
+
+DRAFT_INSTRUCTION = (
+    "A smaller model drafted the answer below. Use it where it is correct, "
+    "fix anything wrong or missing, and reply with the final answer only.\n\n"
+    "Draft answer:\n{draft}"
+)
+
+
+@dataclass
+class CascadeResult:
+    """Outcome of a cascaded request."""
+    content: str
+    model: str
+    escalated: bool
+    confidence: float
+    reason: str
+    weak_latency: float
+    strong_latency: float = 0.0
+    draft: Optional[str] = None
+
+
+def draft_confidence(response) -> Tuple[float, str]:
+    """Cheap confidence signal for a weak-model response, with the reason behind it.
+
+    Empty, truncated or hedging answers get zero confidence. Otherwise the
+    geometric-mean token probability is used when the backend returned
+    logprobs. Without them, confidence starts at CASCADE_HEURISTIC_CONFIDENCE
+    and halves for every tentative phrase in the answer.
+    """
+    choice = response.choices[0]
+    text = choice.message.content or ""
+    if not text.strip():
+        return 0.0, "empty"
+    if choice.finish_reason == "length":
+        return 0.0, "truncated"
+    if HEDGING.search(text):
+        return 0.0, "hedging"
+
+    logprobs = getattr(choice, "logprobs", None)
+    content = getattr(logprobs, "content", None) if logprobs is not None else None
+    if content:
+        mean = sum(token.logprob for token in content) / len(content)
+        return math.exp(mean), "logprobs"
+    return CASCADE_HEURISTIC_CONFIDENCE * 0.5 ** len(TENTATIVE.findall(text)), "heuristic"
+
+
+def escalation_messages(messages: List[Dict[str, Any]], draft: Optional[str]) -> List[Dict[str, Any]]:
+    """The original conversation with the weak model's draft added to its last user turn.
+
+    The draft is model output, so it travels in a user turn rather than a
+    system message, and the caller's system prompt stays the only one.
+    """
+    if not draft:
+        return messages
+    note = DRAFT_INSTRUCTION.format(draft=draft)
+    messages = list(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i]["role"] != "user":
+            continue
+        content = messages[i]["content"]
+        if isinstance(content, list):
+            content = content + [{"type": "text", "text": note}]
+        else:
+            content = f"{content}\n\n{note}"
+        messages[i] = {**messages[i], "content": content}
+        return messages
+    return messages + [{"role": "user", "content": note}]
+
+
+class CascadeStats:
+    """Process-wide escalation counters, logged as requests complete."""
+
+    def __init__(self):
+        self.requests = 0
+        self.escalations = 0
+        self.added_latency = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, result: CascadeResult):
+        with self._lock:
+            self.requests += 1
+            if result.escalated:
+                self.escalations += 1
+                self.added_latency += result.weak_latency
+            rate = self.escalations / self.requests
+        if result.escalated:
+            logger.info(
+                f"Cascade escalated to {result.model} ({result.reason}, confidence={result.confidence:.3f}); "
+                f"added latency {result.weak_latency:.3f}s, escalation rate {rate:.1%}"
+            )
+        else:
+            logger.info(
+                f"Cascade answered locally ({result.reason}, confidence={result.confidence:.3f}) "
+                f"in {result.weak_latency:.3f}s, escalation rate {rate:.1%}"
+            )
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "escalations": self.escalations,
+                "escalation_rate": self.escalations / self.requests if self.requests else None,
+                "avg_added_latency": self.added_latency / self.escalations if self.escalations else None,
+            }
+
+
+cascade_stats = CascadeStats()
+
+
+class Cascade:
+    """Local-first generation: the weak model answers, the strong model only on low confidence.
+
+    The weak model gets at most ``weak_timeout`` seconds and
+    ``weak_max_tokens`` tokens, which bounds the latency an escalation adds.
+    """
+
+    def __init__(
+        self,
+        controller,
+        confidence_threshold: float = CASCADE_CONFIDENCE_THRESHOLD,
+        weak_timeout: float = CASCADE_WEAK_TIMEOUT,
+        weak_max_tokens: int = CASCADE_WEAK_MAX_TOKENS,
+    ):
+        self.controller = controller
+        self.confidence_threshold = confidence_threshold
+        self.weak_timeout = weak_timeout
+        self.weak_max_tokens = weak_max_tokens
+
+    def _weak_kwargs(self, messages, kwargs) -> dict:
+        return {
+            **kwargs,
+            "model": self.controller.model_pair.weak,
+            "messages": messages,
+            "api_base": self.controller.api_base,
+            "api_key": self.controller.api_key,
+            "timeout": self.weak_timeout,
+            "max_tokens": min(kwargs.get("max_tokens", self.weak_max_tokens), self.weak_max_tokens),
+            "logprobs": True,
+            "drop_params": True,
+        }
+
+    def _strong_kwargs(self, messages, draft, kwargs) -> dict:
+        return {
+            **kwargs,
+            "model": self.controller.model_pair.strong,
+            "messages": escalation_messages(messages, draft),
+            "api_base": self.controller.api_base,
+            "api_key": self.controller.api_key,
+        }
+
+    def _judge(self, response, error: Optional[Exception]) -> Tuple[float, str, Optional[str]]:
+        if error is not None:
+            logger.warning(f"Weak model failed, escalating: {str(error)}")
+            return 0.0, "weak_error", None
+        confidence, reason = draft_confidence(response)
+        return confidence, reason, response.choices[0].message.content
+
+    def _finish(self, result: CascadeResult) -> CascadeResult:
+        self.controller.model_counts["cascade"][result.model] += 1
+        cascade_stats.record(result)
+        return result
+
+    def run(self, messages: List[Dict[str, Any]], **kwargs) -> CascadeResult:
+        start = time.perf_counter()
+        response, error = None, None
+        try:
+            response = litellm.completion(**self._weak_kwargs(messages, kwargs))
+        except Exception as e:
+            error = e
+        weak_latency = time.perf_counter() - start
+
+        confidence, reason, draft = self._judge(response, error)
+        if confidence >= self.confidence_threshold:
+            return self._finish(CascadeResult(draft, self.controller.model_pair.weak, False, confidence, reason, weak_latency))
+
+        start = time.perf_counter()
+        response = litellm.completion(**self._strong_kwargs(messages, draft, kwargs))
+        return self._finish(CascadeResult(
+            response.choices[0].message.content,
+            self.controller.model_pair.strong,
+            True,
+            confidence,
+            reason,
+            weak_latency,
+            time.perf_counter() - start,
+            draft,
+        ))
+
+    async def arun(self, messages: List[Dict[str, Any]], **kwargs) -> CascadeResult:
+        start = time.perf_counter()
+        response, error = None, None
+        try:
+            response = await litellm.acompletion(**self._weak_kwargs(messages, kwargs))
+        except Exception as e:
+            error = e
+        weak_latency = time.perf_counter() - start
+
+        confidence, reason, draft = self._judge(response, error)
+        if confidence >= self.confidence_threshold:
+            return self._finish(CascadeResult(draft, self.controller.model_pair.weak, False, confidence, reason, weak_latency))
+
+        start = time.perf_counter()
+        response = await litellm.acompletion(**self._strong_kwargs(messages, draft, kwargs))
+        return self._finish(CascadeResult(
+            response.choices[0].message.content,
+            self.controller.model_pair.strong,
+            True,
+            confidence,
+            reason,
+            weak_latency,
+            time.perf_counter() - start,
+            draft,
+        ))
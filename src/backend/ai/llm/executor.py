@@ -0,0 +1,58 @@
+# src/backend/ai/llm/executor.py
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a request arrives while the inference queue is full."""
+
+
+class InferenceExecutor:
+    """Thread pool and admission control for blocking inference work.
+
+    Tokenization and other CPU-bound calls are run on the pool instead of
+    the event loop. ``acquire`` bounds the number of requests in flight so
+    that a burst is rejected up front rather than queueing without limit.
+    """
+
+    def __init__(self, max_workers: int, max_in_flight: int):
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-inference")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """Admit one request, raising QueueFullError when at capacity."""
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise QueueFullError(f"Inference queue is full (max {self.max_in_flight} requests in flight)")
+            self.in_flight += 1
+
+    def release(self):
+        """Mark an admitted request as finished."""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    async def run(self, fn, *args):
+        """Run a blocking callable on the pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn, *args)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rejected": self.rejected,
+        }
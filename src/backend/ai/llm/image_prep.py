@@ -0,0 +1,108 @@
+# src/backend/ai/llm/image_prep.py
+import base64
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+from utils.cache import LRUCache
+
+# Defaults match the high-detail input size of vision models: anything
+# larger is downscaled by the provider anyway
+IMAGE_MAX_LONG_SIDE = int(os.getenv("IMAGE_MAX_LONG_SIDE", "2048"))
+IMAGE_MAX_SHORT_SIDE = int(os.getenv("IMAGE_MAX_SHORT_SIDE", "768"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_PASSTHROUGH_MAX_BYTES = int(os.getenv("IMAGE_PASSTHROUGH_MAX_BYTES", str(512 * 1024)))
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "256"))
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", "3600"))
+
+# Formats accepted as-is when they are already small enough
+PASSTHROUGH_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp", "GIF": "image/gif"}
+
+_cache = LRUCache(IMAGE_CACHE_SIZE, IMAGE_CACHE_TTL)
+
+
+@dataclass
+class PreparedImage:
+    """An image ready to inline into a chat message."""
+    mime_type: str
+    data: str
+    width: int
+    height: int
+    source_bytes: int
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.data}"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def target_size(width: int, height: int, max_long: int, max_short: int):
+    scale = min(1.0, max_long / max(width, height), max_short / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_image(
+    path: str,
+    max_long_side: int = IMAGE_MAX_LONG_SIDE,
+    max_short_side: int = IMAGE_MAX_SHORT_SIDE,
+    quality: int = IMAGE_JPEG_QUALITY,
+) -> PreparedImage:
+    """Load, downscale and re-encode an image, reusing earlier work for identical content.
+
+    The format is detected from the file contents rather than the name.
+    Small images that are already within the target size in a format
+    vision models accept are passed through untouched; others are decoded at
+    reduced size where the codec allows it, resized, and re-encoded as
+    JPEG, or PNG when they have transparency.
+    """
+    key = f"{file_digest(path)}:{max_long_side}:{max_short_side}:{quality}"
+    prepared = _cache.get(key)
+    if prepared is not None:
+        return prepared
+
+    source_bytes = os.path.getsize(path)
+    with Image.open(path) as image:
+        width, height = image.size
+        size = target_size(width, height, max_long_side, max_short_side)
+        orientation = image.getexif().get(0x0112, 1)
+
+        if (
+            size == (width, height)
+            and image.format in PASSTHROUGH_FORMATS
+            and orientation == 1
+            and source_bytes <= IMAGE_PASSTHROUGH_MAX_BYTES
+        ):
+            with open(path, "rb") as f:
+                data = base64.b64encode(f.read()).decode("utf-8")
+            prepared = PreparedImage(PASSTHROUGH_FORMATS[image.format], data, width, height, source_bytes)
+        else:
+            # JPEG can decode straight to a smaller scale, skipping most of the work
+            if image.format == "JPEG":
+                image.draft("RGB", size)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(target_size(*image.size, max_long_side, max_short_side), Image.Resampling.LANCZOS)
+
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            buffer = io.BytesIO()
+            if has_alpha:
+                image.save(buffer, format="PNG", optimize=True)
+                mime_type = "image/png"
+            else:
+                image.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+                mime_type = "image/jpeg"
+            data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+            prepared = PreparedImage(mime_type, data, image.width, image.height, source_bytes)
+
+    _cache.set(key, prepared)
+    return prepared
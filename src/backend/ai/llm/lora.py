@@ -0,0 +1,109 @@
+# src/backend/ai/llm/lora.py
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from llm.model_registry import MODEL_NAME_PATTERN, ModelNotFoundError
+
+logger = logging.getLogger(__name__)
+
+BASE_ADAPTER = "__base__"
+
+
+class AdapterNotFoundError(ModelNotFoundError):
+    """Raised when an adapter name does not resolve to a saved LoRA adapter."""
+
+
+class AdapterCache:
+    """LoRA adapters attached by name to a single resident base model.
+
+    Adapters are the ``<checkpoints_dir>/<job_id>/final`` directories written
+    by ``ModelTrainer.train``. They are loaded into one PEFT model on first
+    use and the least recently used ones are unloaded beyond
+    ``max_adapters``. Forward passes take one adapter name per batch row,
+    so requests for different adapters, and for the bare base model, decode
+    in the same batch.
+
+    ``ensure`` and ``forward`` change the model's modules and must only be
+    called from the thread that runs the model.
+    """
+
+    def __init__(self, model, checkpoints_dir: str = "/app/checkpoints", max_adapters: int = 8):
+        self.base_model = model
+        self.checkpoints_dir = checkpoints_dir
+        self.max_adapters = max_adapters
+        self.peft_model = None
+
+        self._loaded: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def resolve(self, name: str) -> str:
+        """Map an adapter name to its saved adapter directory."""
+        if not MODEL_NAME_PATTERN.match(name):
+            raise AdapterNotFoundError(f"Invalid adapter name: {name}")
+        path = os.path.join(self.checkpoints_dir, name, "final")
+        if not os.path.isfile(os.path.join(path, "adapter_config.json")):
+            raise AdapterNotFoundError(f"Adapter {name} not found")
+        return path
+
+    def ensure(self, names: Iterable[Optional[str]], in_use: Iterable[Optional[str]] = ()):
+        """Load any of ``names`` that are not attached yet.
+
+        Adapters in ``names`` or ``in_use`` are never unloaded to make room.
+        """
+        names = [name for name in dict.fromkeys(names) if name]
+        keep = set(names) | {name for name in in_use if name}
+        for name in names:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                continue
+
+            path = self.resolve(name)
+            logger.info(f"Loading LoRA adapter {name} from {path}")
+            if self.peft_model is None:
+                from peft import PeftModel
+                self.peft_model = PeftModel.from_pretrained(self.base_model, path, adapter_name=name)
+                self.peft_model.eval()
+            else:
+                self.peft_model.load_adapter(path, adapter_name=name)
+            with self._lock:
+                self._loaded[name] = path
+            self.loads += 1
+
+        # Unload after loading so the model always keeps one adapter attached
+        for name in list(self._loaded):
+            if len(self._loaded) <= self.max_adapters:
+                break
+            if name in keep:
+                continue
+            logger.info(f"Unloading LoRA adapter {name}")
+            self.peft_model.delete_adapter(name)
+            with self._lock:
+                del self._loaded[name]
+            self.evictions += 1
+
+    def forward(self, adapter_names: List[Optional[str]], **kwargs):
+        """Run the model with one adapter, or ``None`` for the base model, per row."""
+        if self.peft_model is None:
+            return self.base_model(**kwargs)
+        return self.peft_model(
+            adapter_names=[name or BASE_ADAPTER for name in adapter_names],
+            **kwargs,
+        )
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded(),
+            "max_adapters": self.max_adapters,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,53 @@
+# src/backend/ai/llm/metrics.py
+import time
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Histogram
+
+from llm.scheduler import GenerationJob
+
+PROMPT_TOKENS = Counter(
+    "llm_prompt_tokens_total",
+    "Prompt tokens processed",
+    ["model", "adapter"],
+)
+COMPLETION_TOKENS = Counter(
+    "llm_completion_tokens_total",
+    "Completion tokens generated",
+    ["model", "adapter"],
+)
+GENERATIONS = Counter(
+    "llm_generations_total",
+    "Finished generation requests",
+    ["model", "adapter", "finish_reason"],
+)
+
+TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "Completion tokens per second of each request, queueing included",
+    ["model"],
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500),
+)
+
+
+def usage(job: GenerationJob) -> Dict[str, int]:
+    """Token usage of a job, counted from the ids the scheduler actually ran."""
+    prompt_tokens = len(job.input_ids)
+    completion_tokens = len(job.output_ids)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def record_usage(model_name: str, job: GenerationJob, adapter: Optional[str] = None):
+    """Add a finished or cancelled job to the per-model token counters."""
+    labels = {"model": model_name, "adapter": adapter or ""}
+    PROMPT_TOKENS.labels(**labels).inc(len(job.input_ids))
+    COMPLETION_TOKENS.labels(**labels).inc(len(job.output_ids))
+    finish_reason = job.finish_reason or ("cancelled" if job.cancelled else "error")
+    GENERATIONS.labels(finish_reason=finish_reason, **labels).inc()
+    elapsed = time.perf_counter() - job.submitted_at
+    if job.output_ids and elapsed > 0:
+        TOKENS_PER_SECOND.labels(model=model_name).observe(len(job.output_ids) / elapsed)
@@ -0,0 +1,178 @@
+# src/backend/ai/llm/model_registry.py
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9._-]*$")
+
+
+class ModelNotFoundError(KeyError):
+    """Raised when a model name does not resolve to a checkpoint on disk."""
+
+
+@dataclass
+class ModelEntry:
+    """A resident model with its tokenizer and decode loop."""
+    name: str
+    path: str
+    model: Any
+    tokenizer: Any
+    scheduler: Any
+    prefix_cache: Any = None
+    adapters: Any = None
+    size_bytes: int = 0
+    loaded_at: float = field(default_factory=time.time)
+    in_flight: int = 0
+
+    def close(self):
+        self.scheduler.stop()
+        self.model = None
+        self.prefix_cache = None
+        self.adapters = None
+
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "size_mb": round(self.size_bytes / (1024 * 1024), 2),
+            "in_flight": self.in_flight,
+            "scheduler": self.scheduler.stats,
+            "prefix_cache": self.prefix_cache.stats if self.prefix_cache else None,
+            "adapters": self.adapters.stats if self.adapters else None,
+        }
+
+
+class ModelRegistry:
+    """Loads models by name on first use and keeps the most recently used resident.
+
+    A name resolves to an explicit alias first, then to a fine-tuned
+    checkpoint at ``<checkpoints_dir>/<name>/final``, then to
+    ``<models_dir>/<name>``. When more than ``max_resident`` models are
+    loaded, or their combined size exceeds ``max_bytes``, the least
+    recently used models without requests in flight are unloaded.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str], ModelEntry],
+        run_blocking: Callable,
+        aliases: Optional[Dict[str, str]] = None,
+        checkpoints_dir: str = "/app/checkpoints",
+        models_dir: str = "/app/model_registry",
+        max_resident: int = 2,
+        max_bytes: int = 0,
+    ):
+        self.loader = loader
+        self.run_blocking = run_blocking
+        self.aliases = aliases or {}
+        self.checkpoints_dir = checkpoints_dir
+        self.models_dir = models_dir
+        self.max_resident = max_resident
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self.loads = 0
+        self.evictions = 0
+
+    def resolve(self, name: str) -> str:
+        """Map a model name to a checkpoint directory."""
+        if name in self.aliases:
+            return self.aliases[name]
+        if not MODEL_NAME_PATTERN.match(name):
+            raise ModelNotFoundError(f"Invalid model name: {name}")
+        for path in (
+            os.path.join(self.checkpoints_dir, name, "final"),
+            os.path.join(self.models_dir, name),
+        ):
+            if os.path.isdir(path):
+                return path
+        raise ModelNotFoundError(f"Model {name} not found")
+
+    async def acquire(self, name: str) -> ModelEntry:
+        """Return a resident model, loading it first if needed.
+
+        The entry is pinned against eviction until ``release`` is called.
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            # Resolve first so unknown names never leave a lock behind
+            path = self.resolve(name)
+            lock = self._locks.setdefault(name, asyncio.Lock())
+            async with lock:
+                entry = self._entries.get(name)
+                if entry is None:
+                    logger.info(f"Loading model {name} from {path}")
+                    entry = await self.run_blocking(self.loader, name, path)
+                    self._entries[name] = entry
+                    self.loads += 1
+                    entry.in_flight += 1
+                    for evicted in self._evict():
+                        await asyncio.to_thread(evicted.close)
+                    return entry
+        entry.in_flight += 1
+        self._entries.move_to_end(name)
+        return entry
+
+    def release(self, entry: ModelEntry):
+        entry.in_flight = max(0, entry.in_flight - 1)
+        # Unload models kept over the limit while every resident model was busy
+        for evicted in self._evict():
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(evicted.close))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def _evict(self) -> List[ModelEntry]:
+        """Remove idle models over the limits and return them for closing.
+
+        Closing joins the model's scheduler thread, so callers do it off the
+        event loop.
+        """
+        evicted = []
+        while len(self._entries) > self.max_resident or (
+            self.max_bytes and self.resident_bytes > self.max_bytes
+        ):
+            idle = [name for name, entry in self._entries.items() if entry.in_flight == 0]
+            if not idle:
+                logger.warning("All resident models are busy; exceeding model residency limits")
+                break
+            entry = self._entries.pop(idle[0])
+            logger.info(f"Unloading model {entry.name}")
+            evicted.append(entry)
+            self.evictions += 1
+        return evicted
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def resident(self) -> List[str]:
+        return list(self._entries)
+
+    def close(self):
+        for entry in self._entries.values():
+            entry.close()
+        self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "resident": {name: entry.stats for name, entry in self._entries.items()},
+            "max_resident": self.max_resident,
+            "resident_mb": round(self.resident_bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2) if self.max_bytes else None,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
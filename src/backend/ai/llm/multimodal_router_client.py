@@ -1,22 +1,33 @@
 # src/backend/ai/llm/multimodal_router_client.py
-import base64
+import asyncio
 import os
-from typing import Optional, Dict, Any, Union
-from routellm.controller import Controller
+from typing import Optional, Dict, Any, List, Sequence, Union
+import litellm
+from llm.batch import BATCH_CONCURRENCY, BatchResult, failed_batch, group_by_model, run_batch
+from llm.image_prep import prepare_image
+from llm.router_pool import decide, decide_batch, get_controller, get_router_client
+from llm.router_scoring import RoutingDecision, load_threshold, prompt_text
 
 class MultimodalLLMRouter:
     """Router client that supports both text and multimodal inputs"""
     
     def __init__(self):
-        self.client = Controller(
+        # Controllers are shared per configuration, so constructing a router
+        # per request does not reload the router model
+        self.client = get_controller(
             routers=["mf"],  # Use the "mf" (model family) router
             strong_model="gpt-4-vision-preview",  # Strong multimodal model
             weak_model="ollama_chat/nvclip",      # NV-CLIP as weak model through Ollama
         )
+        self.async_client = get_router_client(
+            routers=["mf"],
+            strong_model="gpt-4-vision-preview",
+            weak_model="ollama_chat/nvclip",
+        )
         
-        # Configure thresholds - may need calibration for your specific use case
-        self.text_threshold = 0.11593  # Default threshold for text
-        self.image_threshold = 0.05    # Lower threshold for images (prefers strong model)
+        # Thresholds come from llm.calibrate_router output or ROUTER_*_THRESHOLD
+        self.text_threshold = load_threshold("text")
+        self.image_threshold = load_threshold("image")  # Lower by default: prefers the strong model
         
     def generate_response(self, prompt: str, image_path: Optional[str] = None) -> str:
         """
@@ -37,21 +48,100 @@ class MultimodalLLMRouter:
         # Handle text-only input
         return self._process_text(prompt)
     
-    def _process_text(self, prompt: str) -> str:
-        """Process text-only input"""
-        response = self.client.chat.completions.create(
-            model=f"router-mf-{self.text_threshold}",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+    async def agenerate_response(self, prompt: str, image_path: Optional[str] = None) -> str:
+        """
+        Async variant of generate_response for use from request handlers
+        """
+        if image_path and os.path.exists(image_path):
+            messages = await asyncio.to_thread(self._multimodal_messages, prompt, image_path)
+            threshold = self.image_threshold
+        else:
+            messages = [{"role": "user", "content": prompt}]
+            threshold = self.text_threshold
+        
+        response = await self.async_client.acompletion(messages, router="mf", threshold=threshold)
+        return response.choices[0].message.content
+    
+    def route(self, prompt: str, has_image: bool = False) -> RoutingDecision:
+        """
+        Decide between the strong and weak model, returning the win-rate score used
+        """
+        threshold = self.image_threshold if has_image else self.text_threshold
+        return decide(self.client, prompt, router="mf", threshold=threshold)
+    
+    def generate_batch(
+        self,
+        prompts: Sequence[str],
+        image_paths: Optional[Sequence[Optional[str]]] = None,
+        concurrency: int = BATCH_CONCURRENCY,
+    ) -> List[BatchResult]:
+        """
+        Generate responses for many prompts, each with an optional image
+        All prompts are routed in one scoring pass, each against the text or
+        image threshold, then the weak and strong groups run side by side with
+        at most ``concurrency`` requests each. Results keep the input order and
+        a failing prompt or unreadable image only fails its own result
+        """
+        prompts = list(prompts)
+        image_paths = list(image_paths) if image_paths is not None else [None] * len(prompts)
+        if len(image_paths) != len(prompts):
+            raise ValueError(f"Got {len(image_paths)} image paths for {len(prompts)} prompts")
+        
+        messages, errors = [], {}
+        for i, (prompt, image_path) in enumerate(zip(prompts, image_paths)):
+            try:
+                if image_path and os.path.exists(image_path):
+                    messages.append(self._multimodal_messages(prompt, image_path))
+                else:
+                    messages.append([{"role": "user", "content": prompt}])
+            except Exception as e:
+                errors[i] = e
+                messages.append(None)
+        
+        ready = [i for i in range(len(prompts)) if i not in errors]
+        thresholds = [
+            self.image_threshold if isinstance(messages[i][-1]["content"], list) else self.text_threshold
+            for i in ready
+        ]
+        try:
+            decisions = decide_batch(
+                self.client, [prompt_text(messages[i]) for i in ready], router="mf", threshold=thresholds
+            )
+        except Exception as e:
+            return failed_batch(len(prompts), e)
+        models = dict(zip(ready, (decision.model for decision in decisions)))
+        groups = {model: [ready[j] for j in indices] for model, indices in group_by_model(decisions).items()}
+        if errors:
+            groups[None] = list(errors)
+        
+        def call(i: int) -> str:
+            if i in errors:
+                raise errors[i]
+            return self._completion(models[i], messages[i])
+        
+        return run_batch(call, len(prompts), concurrency, groups)
+    
+    def _complete(self, messages: list, has_image: bool) -> str:
+        decision = self.route(prompt_text(messages), has_image=has_image)
+        return self._completion(decision.model, messages)
+    
+    def _completion(self, model: str, messages: list) -> str:
+        response = litellm.completion(
+            model=model,
+            messages=messages,
+            api_base=self.client.api_base,
+            api_key=self.client.api_key,
         )
         return response.choices[0].message.content
     
-    def _process_multimodal(self, prompt: str, image_path: str) -> str:
-        """Process multimodal (text + image) input"""
-        # Read and encode the image
-        with open(image_path, "rb") as image_file:
-            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+    def _process_text(self, prompt: str) -> str:
+        """Process text-only input"""
+        return self._complete([{"role": "user", "content": prompt}], has_image=False)
+    
+    def _multimodal_messages(self, prompt: str, image_path: str) -> list:
+        """Build a user message carrying the prompt and an inline image"""
+        # Downscale and re-encode the image; repeated images come from cache
+        image = prepare_image(image_path)
         
         # Create messages with image content
         messages = [
@@ -62,17 +152,17 @@ class MultimodalLLMRouter:
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_data}"
+                            "url": image.data_url
                         }
                     }
                 ]
             }
         ]
+        return messages
+    
+    def _process_multimodal(self, prompt: str, image_path: str) -> str:
+        """Process multimodal (text + image) input"""
+        messages = self._multimodal_messages(prompt, image_path)
         
         # Route with lower threshold to prefer the stronger model for complex multimodal tasks
-        response = self.client.chat.completions.create(
-            model=f"router-mf-{self.image_threshold}",
-            messages=messages
-        )
-        
-        return response.choices[0].message.content
\ No newline at end of file
+        return self._complete(messages, has_image=True)
\ No newline at end of file
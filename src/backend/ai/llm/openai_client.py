@@ -1,4 +1,10 @@
+import logging
+from typing import List, Sequence
 from openai import OpenAI
+from llm.batch import BATCH_CONCURRENCY, BatchResult, run_batch
+from llm.router_scoring import load_threshold
+
+logger = logging.getLogger(__name__)
 
 class OpenAIClient:
     def __init__(self):
@@ -6,15 +12,27 @@ class OpenAIClient:
             base_url="http://localhost:6060/v1",
             api_key="no_api_key"  # No API key needed for local server
         )
+        self.model = f"router-mf-{load_threshold('text')}"
 
     def generate_response(self, prompt: str) -> str:
         """
         Generate a response using the routed LLM
         """
         response = self.client.chat.completions.create(
-            model="router-mf-0.11593",
+            model=self.model,
             messages=[
                 {"role": "user", "content": prompt}
             ]
         )
-        return response.choices[0].message.content 
\ No newline at end of file
+        # The routing server reports the model it picked
+        logger.info(f"Routed to {response.model}")
+        return response.choices[0].message.content
+
+    def generate_batch(self, prompts: Sequence[str], concurrency: int = BATCH_CONCURRENCY) -> List[BatchResult]:
+        """
+        Generate responses for many prompts with at most ``concurrency`` in flight
+        Routing happens on the server; results keep the input order and carry
+        per-prompt errors
+        """
+        prompts = list(prompts)
+        return run_batch(lambda i: self.generate_response(prompts[i]), len(prompts), concurrency)
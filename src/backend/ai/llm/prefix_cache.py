@@ -0,0 +1,115 @@
+# src/backend/ai/llm/prefix_cache.py
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import torch
+
+PastKeyValues = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+class PrefixCache:
+    """LRU cache of prompt-prefix key/values, stored in fixed-size token blocks.
+
+    Each block is keyed by a hash chained over every token before it, so a
+    block is only reused when the whole prefix up to and including it
+    matches. Prompts that share a template preamble share its blocks, and
+    the cache only has to hold each block once. A ``namespace`` keeps
+    key/values computed under different weights, such as different LoRA
+    adapters, apart.
+    """
+
+    def __init__(self, max_bytes: int, block_size: int = 32):
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self._blocks: "OrderedDict[int, PastKeyValues]" = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.hit_tokens = 0
+
+    def _chain(self, input_ids: List[int], max_blocks: int, namespace: Optional[str]) -> List[int]:
+        keys, previous = [], namespace
+        for i in range(max_blocks):
+            block = tuple(input_ids[i * self.block_size:(i + 1) * self.block_size])
+            previous = hash((previous, block))
+            keys.append(previous)
+        return keys
+
+    def lookup(self, input_ids: List[int], namespace: Optional[str] = None) -> Tuple[int, Optional[PastKeyValues]]:
+        """Return the longest cached prefix of ``input_ids`` and its key/values.
+
+        At least one token is always left uncached so the caller still gets
+        logits for the last prompt position.
+        """
+        keys = self._chain(input_ids, (len(input_ids) - 1) // self.block_size, namespace)
+        with self._lock:
+            found = []
+            for key in keys:
+                block = self._blocks.get(key)
+                if block is None:
+                    break
+                found.append(block)
+            # Touch deepest blocks first so a prefix outlives its extensions
+            for key in reversed(keys[:len(found)]):
+                self._blocks.move_to_end(key)
+
+            if not found:
+                self.misses += 1
+                return 0, None
+            self.hits += 1
+            self.hit_tokens += len(found) * self.block_size
+
+        past = tuple(
+            (
+                torch.cat([block[layer][0] for block in found], dim=2),
+                torch.cat([block[layer][1] for block in found], dim=2),
+            )
+            for layer in range(len(found[0]))
+        )
+        return len(found) * self.block_size, past
+
+    def insert(self, input_ids: List[int], past: PastKeyValues, namespace: Optional[str] = None):
+        """Store every complete block of a prefilled prompt that is not cached yet."""
+        keys = self._chain(input_ids, len(input_ids) // self.block_size, namespace)
+        with self._lock:
+            for i, key in reversed(list(enumerate(keys))):
+                if key in self._blocks:
+                    self._blocks.move_to_end(key)
+                    continue
+                start, end = i * self.block_size, (i + 1) * self.block_size
+                block = tuple(
+                    (k[:, :, start:end].clone(), v[:, :, start:end].clone()) for k, v in past
+                )
+                size = sum(k.numel() * k.element_size() + v.numel() * v.element_size() for k, v in block)
+                if size > self.max_bytes:
+                    return
+                self._blocks[key] = block
+                self._sizes[key] = size
+                self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._blocks:
+            key, _ = self._blocks.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_tokens": self.hit_tokens,
+            "blocks": len(self._blocks),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,167 @@
+# src/backend/ai/llm/response_cache.py
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import torch
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially different spellings share a cache entry.
+
+    Surrounding whitespace is kept: it changes the tokens, and so the output.
+    """
+    return unicodedata.normalize("NFC", prompt).replace("\r\n", "\n")
+
+
+def cache_key(prompt: str, params: Dict[str, Any]) -> str:
+    """Hash a normalized prompt together with the parameters that shape the output."""
+    payload = json.dumps({"prompt": normalize_prompt(prompt), **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over prompt embeddings.
+
+    Entries are only compared with entries generated under the same
+    parameters, and a hit requires cosine similarity above ``threshold``.
+    Entries expire after ``ttl`` seconds, like the exact-match tier.
+    """
+
+    def __init__(self, embed: Callable[[str], Awaitable[List[float]]], threshold: float, max_entries: int, ttl: float):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, List[tuple]]" = OrderedDict()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    async def get(self, prompt: str, params_key: str) -> Optional[Any]:
+        with self._lock:
+            entries = self._entries.get(params_key, [])
+            # Entries are appended in insertion order, so expired ones lead the list
+            now = time.monotonic()
+            expired = 0
+            while expired < len(entries) and entries[expired][0] < now:
+                expired += 1
+            if expired:
+                del entries[:expired]
+                self._count -= expired
+                if not entries:
+                    del self._entries[params_key]
+            entries = list(entries)
+        if not entries:
+            return None
+
+        query = torch.nn.functional.normalize(torch.tensor(await self.embed(prompt)), dim=0)
+        matrix = torch.stack([vector for _, vector, _ in entries])
+        scores = matrix @ query
+        best = int(scores.argmax())
+        if float(scores[best]) < self.threshold:
+            return None
+        return entries[best][2]
+
+    async def set(self, prompt: str, params_key: str, value: Any):
+        vector = torch.nn.functional.normalize(torch.tensor(await self.embed(prompt)), dim=0)
+        with self._lock:
+            self._entries.setdefault(params_key, []).append((time.monotonic() + self.ttl, vector, value))
+            self._entries.move_to_end(params_key)
+            self._count += 1
+            while self._count > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._entries[oldest].pop(0)
+                self._count -= 1
+                if not self._entries[oldest]:
+                    del self._entries[oldest]
+
+
+class ResponseCache:
+    """Tiered cache of /generate responses.
+
+    Lookups go to the in-process LRU first, then Redis when configured,
+    then, for deterministic requests only, the optional semantic tier.
+    Redis and embedding failures are logged and treated as misses so the
+    cache can never fail a request.
+    """
+
+    def __init__(
+        self,
+        local: LRUCache,
+        redis_client=None,
+        semantic: Optional[SemanticCache] = None,
+        prefix: str = "llm_response",
+    ):
+        self.local = local
+        self.redis = redis_client
+        self.semantic = semantic
+        self.prefix = prefix
+        self.hits = {"local": 0, "redis": 0, "semantic": 0}
+        self.misses = 0
+
+    async def get(self, prompt: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = cache_key(prompt, params)
+        value = self.local.get(key)
+        if value is not None:
+            self.hits["local"] += 1
+            return value
+
+        if self.redis is not None:
+            try:
+                stored = await self.redis.get(f"{self.prefix}:{key}")
+            except Exception as e:
+                logger.warning(f"Response cache Redis lookup failed: {str(e)}")
+                stored = None
+            if stored:
+                value = json.loads(stored)
+                self.local.set(key, value)
+                self.hits["redis"] += 1
+                return value
+
+        if self.semantic is not None and params.get("temperature") == 0:
+            try:
+                value = await self.semantic.get(normalize_prompt(prompt), cache_key("", params))
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.hits["semantic"] += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, prompt: str, params: Dict[str, Any], value: Dict[str, Any]):
+        key = cache_key(prompt, params)
+        self.local.set(key, value)
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(f"{self.prefix}:{key}", json.dumps(value), ex=int(self.local.ttl))
+            except Exception as e:
+                logger.warning(f"Response cache Redis write failed: {str(e)}")
+
+        if self.semantic is not None and params.get("temperature") == 0:
+            try:
+                await self.semantic.set(normalize_prompt(prompt), cache_key("", params), value)
+            except Exception as e:
+                logger.warning(f"Semantic cache write failed: {str(e)}")
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "entries": len(self.local),
+            "redis": self.redis is not None,
+            "semantic": self.semantic is not None,
+        }
@@ -1,21 +1,89 @@
- from routellm.controller import Controller
+import os
+from typing import List, Optional, Sequence
+import litellm
+from llm.batch import BATCH_CONCURRENCY, BatchResult, failed_batch, group_by_model, run_batch
+from llm.cascade import Cascade
+from llm.router_pool import decide, decide_batch, get_controller, get_router_client
+from llm.router_scoring import RoutingDecision, load_threshold
+
+# "route" picks one model up front; "cascade" tries the local weak model first
+ROUTER_MODE = os.getenv("ROUTER_MODE", "route")
 
 class LLMRouter:
-    def __init__(self):
-        self.client = Controller(
+    def __init__(self, mode: Optional[str] = None):
+        # Controllers are shared per configuration, so constructing a router
+        # per request does not reload the router model
+        self.client = get_controller(
             routers=["mf"],  # Use the "mf" (model family) router
             strong_model="gpt-4-1106-preview",  # Your strong model
             weak_model="ollama_chat/llama3",    # Your weak model (using Ollama)
         )
+        self.async_client = get_router_client(
+            routers=["mf"],
+            strong_model="gpt-4-1106-preview",
+            weak_model="ollama_chat/llama3",
+        )
+        self.threshold = load_threshold("text")  # The threshold determines routing percentage
+        self.mode = mode or ROUTER_MODE
+        self.cascade = Cascade(self.client)
+
+    def route(self, prompt: str) -> RoutingDecision:
+        """
+        Decide between the strong and weak model, returning the win-rate score used
+        """
+        return decide(self.client, prompt, router="mf", threshold=self.threshold)
 
     def generate_response(self, prompt: str) -> str:
         """
         Generate a response using the appropriate model based on complexity
         """
-        response = self.client.chat.completions.create(
-            model="router-mf-0.11593",  # The threshold determines routing percentage
+        if self.mode == "cascade":
+            return self.cascade.run([{"role": "user", "content": prompt}]).content
+        
+        decision = self.route(prompt)
+        return self._complete(decision.model, prompt)
+
+    def _complete(self, model: str, prompt: str) -> str:
+        response = litellm.completion(
+            model=model,
             messages=[
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            api_base=self.client.api_base,
+            api_key=self.client.api_key,
         )
         return response.choices[0].message.content
+
+    def generate_batch(self, prompts: Sequence[str], concurrency: int = BATCH_CONCURRENCY) -> List[BatchResult]:
+        """
+        Generate responses for many prompts, returned in order with per-prompt errors.
+        All prompts are routed in one scoring pass, then the weak and strong
+        groups run side by side with at most ``concurrency`` requests each
+        """
+        prompts = list(prompts)
+        if self.mode == "cascade":
+            return run_batch(
+                lambda i: self.cascade.run([{"role": "user", "content": prompts[i]}]).content,
+                len(prompts),
+                concurrency,
+            )
+
+        try:
+            decisions = decide_batch(self.client, prompts, router="mf", threshold=self.threshold)
+        except Exception as e:
+            return failed_batch(len(prompts), e)
+        return run_batch(
+            lambda i: self._complete(decisions[i].model, prompts[i]),
+            len(prompts),
+            concurrency,
+            group_by_model(decisions),
+        )
+
+    async def agenerate_response(self, prompt: str) -> str:
+        """
+        Async variant of generate_response for use from request handlers
+        """
+        if self.mode == "cascade":
+            result = await self.async_client.acascade([{"role": "user", "content": prompt}])
+            return result.content
+        return await self.async_client.agenerate_response(prompt, router="mf", threshold=self.threshold)
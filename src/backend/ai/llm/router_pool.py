@@ -0,0 +1,227 @@
+# src/backend/ai/llm/router_pool.py
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+import litellm
+from routellm.controller import Controller
+
+from llm.cascade import Cascade, CascadeResult, cascade_stats
+from llm.router_scoring import RoutingDecision, WinRateScorer, load_threshold, prompt_text
+
+logger = logging.getLogger(__name__)
+
+ROUTER_MAX_CONCURRENCY = int(os.getenv("ROUTER_MAX_CONCURRENCY", "64"))
+ROUTER_SCORING_WORKERS = int(os.getenv("ROUTER_SCORING_WORKERS", "4"))
+ROUTER_MAX_CONNECTIONS = int(os.getenv("ROUTER_MAX_CONNECTIONS", "100"))
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", "120"))
+
+ControllerKey = Tuple[Tuple[str, ...], str, str, Optional[str]]
+
+_controllers: Dict[ControllerKey, Controller] = {}
+_clients: Dict[ControllerKey, "AsyncRouterClient"] = {}
+_scorers: Dict[Tuple[int, str], WinRateScorer] = {}
+_lock = threading.Lock()
+_scoring_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_controller(
+    routers: Sequence[str] = ("mf",),
+    strong_model: str = "gpt-4-1106-preview",
+    weak_model: str = "ollama_chat/llama3",
+    api_base: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> Controller:
+    """Return the process-wide Controller for a configuration, building it once.
+
+    Building a Controller loads the router checkpoints, so every client
+    with the same routers and model pair shares one instance.
+    """
+    key = (tuple(routers), strong_model, weak_model, api_base)
+    with _lock:
+        controller = _controllers.get(key)
+        if controller is None:
+            logger.info(f"Loading RouteLLM controller {routers} ({strong_model} / {weak_model})")
+            controller = Controller(
+                routers=list(routers),
+                strong_model=strong_model,
+                weak_model=weak_model,
+                api_base=api_base,
+                api_key=api_key,
+            )
+            _controllers[key] = controller
+        return controller
+
+
+def get_scorer(controller: Controller, router: str = "mf") -> WinRateScorer:
+    """Return the cached, batched win-rate scorer for one of a controller's routers."""
+    if router not in controller.routers:
+        raise ValueError(f"Invalid router {router}. Available routers are {list(controller.routers)}.")
+    key = (id(controller), router)
+    with _lock:
+        scorer = _scorers.get(key)
+        if scorer is None:
+            scorer = WinRateScorer(controller.routers[router], router)
+            _scorers[key] = scorer
+        return scorer
+
+
+def decide(controller: Controller, prompt: str, router: str = "mf", threshold: Optional[float] = None) -> RoutingDecision:
+    """Route a prompt through the shared scorer and count the decision.
+
+    ``threshold`` defaults to the calibrated text threshold, read on every
+    call so a recalibration takes effect without a restart.
+    """
+    if threshold is None:
+        threshold = load_threshold("text")
+    decision = get_scorer(controller, router).decide(prompt, threshold, controller.model_pair)
+    controller.model_counts[router][decision.model] += 1
+    logger.info(
+        f"Routed to {decision.model} (router={router}, score={decision.score:.4f}, "
+        f"threshold={threshold}, cached={decision.cached})"
+    )
+    return decision
+
+
+def decide_batch(
+    controller: Controller,
+    prompts: Sequence[str],
+    router: str = "mf",
+    threshold: Union[float, Sequence[float], None] = None,
+) -> List[RoutingDecision]:
+    """Route many prompts in one scoring pass and count the decisions."""
+    if threshold is None:
+        threshold = load_threshold("text")
+    decisions = get_scorer(controller, router).decide_batch(prompts, threshold, controller.model_pair)
+    for decision in decisions:
+        controller.model_counts[router][decision.model] += 1
+    strong = sum(decision.strong for decision in decisions)
+    logger.info(
+        f"Routed batch of {len(decisions)} (router={router}): {strong} to {controller.model_pair.strong}, "
+        f"{len(decisions) - strong} to {controller.model_pair.weak}"
+    )
+    return decisions
+
+
+def _get_scoring_pool() -> ThreadPoolExecutor:
+    global _scoring_pool
+    with _lock:
+        if _scoring_pool is None:
+            _scoring_pool = ThreadPoolExecutor(
+                max_workers=ROUTER_SCORING_WORKERS, thread_name_prefix="router-scoring"
+            )
+        return _scoring_pool
+
+
+def _use_pooled_session():
+    """Give litellm one keep-alive connection pool for the strong and weak backends."""
+    if litellm.aclient_session is None:
+        litellm.aclient_session = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=ROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=ROUTER_MAX_CONNECTIONS,
+            ),
+            timeout=ROUTER_TIMEOUT,
+        )
+
+
+class AsyncRouterClient:
+    """Async RouteLLM client for use from FastAPI handlers.
+
+    Router scoring is batched, cached and run on a small dedicated thread
+    pool, so it never occupies the event loop or the default executor.
+    Completions go through litellm on a shared keep-alive connection pool,
+    and at most ``max_concurrency`` requests are in flight per client.
+    """
+
+    def __init__(self, controller: Controller, max_concurrency: int = ROUTER_MAX_CONCURRENCY):
+        self.controller = controller
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cascade = Cascade(controller)
+
+    async def decide(self, prompt: str, router: str = "mf", threshold: Optional[float] = None) -> RoutingDecision:
+        """Return the routing decision for a prompt."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_scoring_pool(), decide, self.controller, prompt, router, threshold
+        )
+
+    async def decide_batch(
+        self, prompts: Sequence[str], router: str = "mf", threshold: Optional[float] = None
+    ) -> List[RoutingDecision]:
+        """Return routing decisions for many prompts, scored in one batched pass."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_scoring_pool(), decide_batch, self.controller, list(prompts), router, threshold
+        )
+
+    async def route(self, prompt: str, router: str = "mf", threshold: Optional[float] = None) -> str:
+        """Return the model the router picks for a prompt."""
+        return (await self.decide(prompt, router, threshold)).model
+
+    async def acompletion(
+        self,
+        messages: List[Dict[str, Any]],
+        router: str = "mf",
+        threshold: Optional[float] = None,
+        **kwargs,
+    ):
+        """Route the conversation and run the completion on the chosen model."""
+        async with self._semaphore:
+            _use_pooled_session()
+            model = await self.route(prompt_text(messages), router, threshold)
+            return await litellm.acompletion(
+                model=model,
+                messages=messages,
+                api_base=self.controller.api_base,
+                api_key=self.controller.api_key,
+                **kwargs,
+            )
+
+    async def acascade(self, messages: List[Dict[str, Any]], **kwargs) -> CascadeResult:
+        """Answer with the weak model, escalating to the strong model on low confidence."""
+        async with self._semaphore:
+            _use_pooled_session()
+            return await self.cascade.arun(messages, **kwargs)
+
+    async def agenerate_response(self, prompt: str, router: str = "mf", threshold: Optional[float] = None) -> str:
+        """Generate a response using the appropriate model based on complexity"""
+        response = await self.acompletion(
+            [{"role": "user", "content": prompt}], router=router, threshold=threshold
+        )
+        return response.choices[0].message.content
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "available": self._semaphore._value,
+            "model_counts": {router: dict(counts) for router, counts in self.controller.model_counts.items()},
+            "cascade": cascade_stats.stats,
+            "scorers": {
+                router: get_scorer(self.controller, router).stats for router in self.controller.routers
+            },
+        }
+
+
+def get_router_client(
+    routers: Sequence[str] = ("mf",),
+    strong_model: str = "gpt-4-1106-preview",
+    weak_model: str = "ollama_chat/llama3",
+    api_base: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> AsyncRouterClient:
+    """Return the process-wide async router client for a configuration."""
+    key = (tuple(routers), strong_model, weak_model, api_base)
+    controller = get_controller(routers, strong_model, weak_model, api_base, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = AsyncRouterClient(controller)
+            _clients[key] = client
+        return client
@@ -0,0 +1,195 @@
+# src/backend/ai/llm/router_scoring.py
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import torch
+
+from llm.response_cache import normalize_prompt
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "100000"))
+ROUTER_CACHE_TTL = int(os.getenv("ROUTER_CACHE_TTL", "86400"))
+ROUTER_BATCH_SIZE = int(os.getenv("ROUTER_BATCH_SIZE", "512"))
+
+# Written by llm.calibrate_router; ROUTER_<NAME>_THRESHOLD overrides a value
+ROUTER_THRESHOLDS_FILE = os.getenv("ROUTER_THRESHOLDS_FILE", "/app/config/router_thresholds.json")
+DEFAULT_THRESHOLDS = {
+    "text": 0.11593,
+    "image": 0.05,  # Lower threshold for images (prefers strong model)
+}
+
+
+def load_threshold(name: str = "text") -> float:
+    """Routing threshold from the environment, the calibration file or the defaults."""
+    value = os.getenv(f"ROUTER_{name.upper()}_THRESHOLD")
+    if value:
+        return float(value)
+    try:
+        with open(ROUTER_THRESHOLDS_FILE, "r") as f:
+            return float(json.load(f)[name]["threshold"])
+    except FileNotFoundError:
+        pass
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"No usable {name} threshold in {ROUTER_THRESHOLDS_FILE}: {str(e)}")
+    return DEFAULT_THRESHOLDS[name]
+
+
+@dataclass
+class RoutingDecision:
+    """Which model a router picked for a prompt, and why."""
+    model: str
+    strong: bool
+    score: float
+    threshold: float
+    router: str
+    cached: bool = False
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def prompt_text(messages: List[Dict[str, Any]]) -> str:
+    """Text of the last turn, which is what the routers were trained to score."""
+    content = messages[-1]["content"]
+    if isinstance(content, str):
+        return content
+    return "\n".join(part.get("text", "") for part in content if part.get("type") == "text")
+
+
+def prompt_key(prompt: str) -> str:
+    # The router embedding is a pure function of the prompt text, so the
+    # text hash identifies the embedding without having to compute it
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+class WinRateScorer:
+    """Strong-model win rates for many prompts at once, with an LRU cache.
+
+    For the matrix-factorization router every uncached prompt in a batch
+    is embedded with one embeddings request per ``batch_size`` prompts,
+    and the win rates come from a single vectorized pass over the MF
+    model. Other routers fall back to scoring prompts one at a time.
+    Scores rather than decisions are cached, so one cache serves every
+    threshold.
+    """
+
+    def __init__(
+        self,
+        router,
+        router_name: str = "mf",
+        embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        cache: Optional[LRUCache] = None,
+        batch_size: int = ROUTER_BATCH_SIZE,
+    ):
+        self.router = router
+        self.router_name = router_name
+        self.embed = embed or self._openai_embed
+        self.cache = cache if cache is not None else LRUCache(ROUTER_CACHE_SIZE, ROUTER_CACHE_TTL)
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def vectorized(self) -> bool:
+        return hasattr(getattr(self.router, "model", None), "classifier")
+
+    def _openai_embed(self, prompts: List[str]) -> List[List[float]]:
+        from routellm.routers.similarity_weighted.utils import OPENAI_CLIENT
+        response = OPENAI_CLIENT.embeddings.create(input=prompts, model=self.router.model.embedding_model)
+        return [item.embedding for item in response.data]
+
+    @torch.no_grad()
+    def _mf_win_rates(self, prompts: List[str]) -> List[float]:
+        mf = self.router.model
+        device = mf.get_device()
+        model_ids = torch.tensor([self.router.strong_model_id, self.router.weak_model_id], device=device)
+        model_embed = torch.nn.functional.normalize(mf.P(model_ids), p=2, dim=1)
+
+        scores = []
+        for start in range(0, len(prompts), self.batch_size):
+            chunk = prompts[start:start + self.batch_size]
+            prompt_embed = torch.tensor(self.embed(chunk), dtype=model_embed.dtype, device=device)
+            if mf.use_proj:
+                prompt_embed = mf.text_proj(prompt_embed)
+            # (batch, 2 models, dim) -> one logit per model
+            logits = mf.classifier(model_embed.unsqueeze(0) * prompt_embed.unsqueeze(1)).squeeze(-1)
+            scores.extend(torch.sigmoid(logits[:, 0] - logits[:, 1]).tolist())
+        return scores
+
+    def score_uncached(self, prompts: Sequence[str]) -> List[float]:
+        """Score prompts without consulting or filling the cache."""
+        prompts = list(prompts)
+        if not prompts:
+            return []
+        if self.vectorized:
+            return self._mf_win_rates(prompts)
+        return [float(self.router.calculate_strong_win_rate(prompt)) for prompt in prompts]
+
+    def score_batch(self, prompts: Sequence[str]) -> List[float]:
+        """Win rate of the strong model for each prompt, in order."""
+        scores, _ = self._score_batch(prompts)
+        return scores
+
+    def _score_batch(self, prompts: Sequence[str]):
+        keys = [prompt_key(prompt) for prompt in prompts]
+        scores: List[Optional[float]] = [self.cache.get(key) for key in keys]
+        cached = [score is not None for score in scores]
+
+        missing = {}
+        for i, (key, score) in enumerate(zip(keys, scores)):
+            if score is None:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            fresh = self.score_uncached([prompts[indices[0]] for indices in missing.values()])
+            for (key, indices), score in zip(missing.items(), fresh):
+                self.cache.set(key, score)
+                for i in indices:
+                    scores[i] = score
+
+        self.hits += sum(cached)
+        self.misses += len(missing)
+        return scores, cached
+
+    def decide_batch(
+        self, prompts: Sequence[str], threshold: Union[float, Sequence[float]], model_pair
+    ) -> List[RoutingDecision]:
+        """Route many prompts; a score at or above the threshold picks the strong model.
+
+        ``threshold`` is either one value for the whole batch or one per prompt.
+        """
+        thresholds = [threshold] * len(prompts) if isinstance(threshold, (int, float)) else list(threshold)
+        if len(thresholds) != len(prompts):
+            raise ValueError(f"Got {len(thresholds)} thresholds for {len(prompts)} prompts.")
+        for value in set(thresholds):
+            if not 0 <= value <= 1:
+                raise ValueError(f"Invalid threshold {value}. Threshold must be between 0.0 and 1.0.")
+        scores, cached = self._score_batch(prompts)
+        return [
+            RoutingDecision(
+                model=model_pair.strong if score >= value else model_pair.weak,
+                strong=score >= value,
+                score=score,
+                threshold=value,
+                router=self.router_name,
+                cached=hit,
+            )
+            for score, value, hit in zip(scores, thresholds, cached)
+        ]
+
+    def decide(self, prompt: str, threshold: float, model_pair) -> RoutingDecision:
+        return self.decide_batch([prompt], threshold, model_pair)[0]
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.cache),
+            "vectorized": self.vectorized,
+        }
@@ -0,0 +1,513 @@
+# src/backend/ai/llm/scheduler.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, List, Optional, Tuple
+
+import torch
+
+from llm.stopping import IncrementalDetokenizer, StopSequenceMatcher
+
+logger = logging.getLogger(__name__)
+
+PastKeyValues = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+@dataclass
+class GenerationJob:
+    """A single generation request travelling through the batch scheduler."""
+    input_ids: List[int]
+    max_tokens: int
+    temperature: float
+    top_p: float
+    stop: List[str]
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    stream: Optional[asyncio.Queue] = None
+    detokenizer: Optional[IncrementalDetokenizer] = None
+    matcher: Optional[StopSequenceMatcher] = None
+    output_ids: List[int] = field(default_factory=list)
+    text: str = ""
+    emitted: int = 0
+    finish_reason: Optional[str] = None
+    stop_sequence: Optional[str] = None
+    speculative: Any = None
+    adapter: Optional[str] = None
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.cancelled()
+
+
+def token_probs(
+    logits: torch.Tensor,
+    temperatures: torch.Tensor,
+    top_ps: torch.Tensor,
+) -> torch.Tensor:
+    """Next-token distribution per row after temperature and top_p filtering.
+
+    Rows with ``temperature == 0`` get all their mass on the argmax,
+    matching ``do_sample=temperature > 0`` in the single-request path.
+    """
+    logits = logits.float()
+    probs = torch.softmax(logits / temperatures.clamp(min=1e-5).unsqueeze(1), dim=-1)
+    sorted_probs, sorted_idx = probs.sort(dim=-1, descending=True)
+    cumulative = sorted_probs.cumsum(dim=-1)
+    # Drop tokens outside the nucleus, always keeping the most likely one
+    sorted_probs[(cumulative - sorted_probs) > top_ps.unsqueeze(1)] = 0.0
+    filtered = torch.zeros_like(probs).scatter(1, sorted_idx, sorted_probs)
+    filtered = filtered / filtered.sum(dim=-1, keepdim=True)
+
+    greedy = torch.nn.functional.one_hot(logits.argmax(dim=-1), logits.shape[-1]).float()
+    return torch.where((temperatures > 0).unsqueeze(1), filtered, greedy)
+
+
+def sample_next_tokens(
+    logits: torch.Tensor,
+    temperatures: torch.Tensor,
+    top_ps: torch.Tensor,
+) -> torch.Tensor:
+    """Pick one token per row, honouring each row's temperature and top_p."""
+    return torch.multinomial(token_probs(logits, temperatures, top_ps), num_samples=1).squeeze(1)
+
+
+def to_legacy_cache(past: Any) -> PastKeyValues:
+    if hasattr(past, "to_legacy_cache"):
+        return past.to_legacy_cache()
+    return past
+
+
+def from_legacy_cache(past: PastKeyValues) -> Any:
+    from transformers import DynamicCache
+    return DynamicCache.from_legacy_cache(past)
+
+
+def _left_pad(past: PastKeyValues, pad: int) -> PastKeyValues:
+    """Left-pad every key/value tensor along the sequence dimension."""
+    if pad <= 0:
+        return past
+    padded = []
+    for key, value in past:
+        key_pad = key.new_zeros(key.shape[0], key.shape[1], pad, key.shape[3])
+        value_pad = value.new_zeros(value.shape[0], value.shape[1], pad, value.shape[3])
+        padded.append((torch.cat([key_pad, key], dim=2), torch.cat([value_pad, value], dim=2)))
+    return tuple(padded)
+
+
+class BatchScheduler:
+    """Continuous batching over a shared decode loop.
+
+    Requests are prefilled individually as they arrive and then join a
+    single left-padded batch that advances one token per step. Finished or
+    cancelled requests leave the batch at the next step, so a long
+    generation never holds up short ones queued behind it.
+
+    With a ``speculator`` the active requests are instead advanced one
+    after another by draft-and-verify steps, trading batch throughput for
+    per-token latency.
+
+    With ``adapters`` each request may name a LoRA adapter; rows for
+    different adapters still share one batch and one forward pass.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        device: str,
+        max_batch_size: int = 8,
+        prefix_cache=None,
+        speculator=None,
+        adapters=None,
+    ):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.prefix_cache = prefix_cache
+        self.speculator = speculator
+        self.adapters = adapters
+
+        eos = getattr(model.generation_config, "eos_token_id", None)
+        if eos is None:
+            eos = tokenizer.eos_token_id
+        self.eos_token_ids = set(eos if isinstance(eos, (list, tuple)) else [eos])
+
+        self._pending: Deque[GenerationJob] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Batch state, owned by the decode thread
+        self._active: List[GenerationJob] = []
+        self._past: Optional[PastKeyValues] = None
+        self._attention_mask: Optional[torch.Tensor] = None
+        self._next_tokens: Optional[torch.Tensor] = None
+
+    def start(self):
+        """Start the background decode loop."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="llm-batch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Batch scheduler started (max_batch_size={self.max_batch_size})")
+
+    def stop(self):
+        """Stop the decode loop and fail any requests still in flight."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        leftover = list(self._pending) + self._active
+        self._pending.clear()
+        self._reset_batch()
+        for job in leftover:
+            self._fail(job, RuntimeError("Scheduler stopped"))
+
+    @property
+    def stats(self) -> dict:
+        stats = {"active": len(self._active), "pending": len(self._pending)}
+        if self.speculator is not None:
+            stats["speculative"] = self.speculator.stats
+        if self.adapters is not None:
+            stats["adapters"] = self.adapters.stats
+        return stats
+
+    def enqueue(
+        self,
+        input_ids: List[int],
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[List[str]] = None,
+        stream: bool = False,
+        adapter: Optional[str] = None,
+    ) -> GenerationJob:
+        """Queue a tokenized prompt for decoding and return its job.
+
+        Must be called from the event loop that will await the job.
+        """
+        loop = asyncio.get_running_loop()
+        stop = [s for s in (stop or []) if s]
+        job = GenerationJob(
+            input_ids=input_ids,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=stop,
+            loop=loop,
+            future=loop.create_future(),
+            stream=asyncio.Queue() if stream else None,
+            detokenizer=IncrementalDetokenizer(self.tokenizer),
+            matcher=StopSequenceMatcher(stop) if stop else None,
+            adapter=adapter,
+        )
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Scheduler is not running")
+            self._pending.append(job)
+            self._condition.notify()
+        return job
+
+    async def submit(
+        self,
+        input_ids: List[int],
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[List[str]] = None,
+        adapter: Optional[str] = None,
+    ) -> GenerationJob:
+        """Queue a tokenized prompt and wait for its generation to finish."""
+        job = self.enqueue(input_ids, max_tokens, temperature, top_p, stop, adapter=adapter)
+        return await job.future
+
+    async def stream(self, job: GenerationJob) -> AsyncIterator[str]:
+        """Yield text deltas of a streaming job as they are decoded.
+
+        Closing the iterator early cancels the job, which frees its batch
+        slot at the next decode step.
+        """
+        try:
+            while True:
+                delta = await job.stream.get()
+                if delta is None:
+                    break
+                yield delta
+            await job.future
+        finally:
+            if not job.future.done():
+                job.future.cancel()
+
+    # ------------------------------------------------------------------
+    # Decode thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending and not self._active:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                admitted = []
+                while self._pending and len(self._active) + len(admitted) < self.max_batch_size:
+                    admitted.append(self._pending.popleft())
+
+            with torch.no_grad():
+                # A request that fails to prefill (bad parameters, a prompt
+                # too long for the model, OOM) fails alone, not the batch
+                for job in admitted:
+                    if job.cancelled:
+                        continue
+                    try:
+                        self._prefill(job)
+                    except Exception as e:
+                        logger.error(f"Error prefilling request: {str(e)}")
+                        self._drop(job, e)
+
+                try:
+                    if self._active and self.speculator is not None:
+                        self._speculative_step()
+                    elif self._active:
+                        self._decode_step()
+                except Exception as e:
+                    logger.error(f"Error in batch decode loop: {str(e)}")
+                    for job in self._active:
+                        self._fail(job, e)
+                    self._reset_batch()
+
+    def _forward(self, jobs: List[GenerationJob], **kwargs):
+        if self.adapters is None:
+            return self.model(**kwargs)
+        return self.adapters.forward([job.adapter for job in jobs], **kwargs)
+
+    def _prefill(self, job: GenerationJob):
+        """Run the prompt through the model and merge it into the batch.
+
+        When the prefix cache holds the start of the prompt, only the
+        remaining tokens are run through the model.
+        """
+        if self.adapters is not None:
+            try:
+                self.adapters.ensure([job.adapter], in_use=[active.adapter for active in self._active])
+            except Exception as e:
+                logger.error(f"Failed to load adapter {job.adapter}: {str(e)}")
+                self._fail(job, e)
+                return
+
+        cached_len, past = 0, None
+        if self.prefix_cache is not None:
+            cached_len, past = self.prefix_cache.lookup(job.input_ids, namespace=job.adapter)
+
+        input_ids = torch.tensor([job.input_ids[cached_len:]], device=self.device)
+        outputs = self._forward(
+            [job],
+            input_ids=input_ids,
+            past_key_values=from_legacy_cache(past) if past is not None else None,
+            use_cache=True,
+        )
+        past = to_legacy_cache(outputs.past_key_values)
+        if self.prefix_cache is not None:
+            self.prefix_cache.insert(job.input_ids, past, namespace=job.adapter)
+
+        first = sample_next_tokens(
+            outputs.logits[:, -1, :],
+            torch.tensor([job.temperature], device=self.device),
+            torch.tensor([job.top_p], device=self.device),
+        )
+        if self.speculator is not None:
+            job.speculative = self.speculator.start(job.input_ids, int(first), past)
+            self._active.append(job)
+        else:
+            mask = torch.ones(1, len(job.input_ids), dtype=torch.long, device=self.device)
+            self._merge(job, past, mask, first)
+        self._advance([job], first.tolist())
+
+    def _merge(self, job: GenerationJob, past: PastKeyValues, mask: torch.Tensor, next_token: torch.Tensor):
+        if self._past is None:
+            self._past, self._attention_mask, self._next_tokens = past, mask, next_token
+            self._active = [job]
+            return
+
+        batch_len, job_len = self._attention_mask.shape[1], mask.shape[1]
+        if job_len < batch_len:
+            past = _left_pad(past, batch_len - job_len)
+            mask = torch.cat([mask.new_zeros(1, batch_len - job_len), mask], dim=1)
+        elif batch_len < job_len:
+            self._past = _left_pad(self._past, job_len - batch_len)
+            self._attention_mask = torch.cat(
+                [self._attention_mask.new_zeros(self._attention_mask.shape[0], job_len - batch_len), self._attention_mask],
+                dim=1,
+            )
+
+        self._past = tuple(
+            (torch.cat([bk, k], dim=0), torch.cat([bv, v], dim=0))
+            for (bk, bv), (k, v) in zip(self._past, past)
+        )
+        self._attention_mask = torch.cat([self._attention_mask, mask], dim=0)
+        self._next_tokens = torch.cat([self._next_tokens, next_token], dim=0)
+        self._active.append(job)
+
+    def _decode_step(self):
+        """Advance every active request by one token."""
+        attention_mask = torch.cat(
+            [self._attention_mask, self._attention_mask.new_ones(self._attention_mask.shape[0], 1)], dim=1
+        )
+        position_ids = self._attention_mask.sum(dim=1, keepdim=True)
+
+        outputs = self._forward(
+            self._active,
+            input_ids=self._next_tokens.unsqueeze(1),
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=from_legacy_cache(self._past),
+            use_cache=True,
+        )
+        self._past = to_legacy_cache(outputs.past_key_values)
+        self._attention_mask = attention_mask
+
+        temperatures = torch.tensor([job.temperature for job in self._active], device=self.device)
+        top_ps = torch.tensor([job.top_p for job in self._active], device=self.device)
+        self._next_tokens = sample_next_tokens(outputs.logits[:, -1, :], temperatures, top_ps)
+        self._advance(self._active, self._next_tokens.tolist())
+
+    def _speculative_step(self):
+        """Advance every active request by one draft-and-verify step."""
+        for job in list(self._active):
+            if job.cancelled:
+                job.finish_reason = "cancelled"
+                continue
+            remaining = job.max_tokens - len(job.output_ids)
+            forward = None
+            if self.adapters is not None:
+                forward = lambda **kwargs: self._forward([job], **kwargs)
+            for token in self.speculator.step(
+                job.speculative, job.temperature, job.top_p, remaining, forward=forward
+            ):
+                self._record(job, token)
+                if job.finish_reason is not None:
+                    break
+        self._finish()
+
+    def _advance(self, jobs: List[GenerationJob], tokens: List[int]):
+        """Record one sampled token per job and evict requests that are done."""
+        for job, token in zip(jobs, tokens):
+            self._record(job, token)
+        self._finish()
+
+    def _record(self, job: GenerationJob, token: int):
+        if job.cancelled:
+            job.finish_reason = "cancelled"
+            return
+        if token in self.eos_token_ids:
+            self._append_text(job, job.detokenizer.step(job.output_ids, final=True))
+            job.finish_reason = "stop"
+            return
+
+        job.output_ids.append(token)
+        final = len(job.output_ids) >= job.max_tokens
+        if self._append_text(job, job.detokenizer.step(job.output_ids, final=final)):
+            job.finish_reason = "stop"
+        elif final:
+            job.finish_reason = "length"
+        else:
+            self._publish(job)
+
+    def _finish(self):
+        finished = [i for i, job in enumerate(self._active) if job.finish_reason is not None]
+        if finished:
+            for i in finished:
+                self._complete(self._active[i])
+            self._evict(finished)
+
+    def _append_text(self, job: GenerationJob, delta: str) -> bool:
+        """Add decoded text to a job, truncating it if a stop sequence completes."""
+        if not delta:
+            return False
+        job.text += delta
+        if job.matcher is None:
+            return False
+        match = job.matcher.feed(delta)
+        if match is None:
+            return False
+        start, job.stop_sequence = match
+        job.text = job.text[:start]
+        return True
+
+    def _evict(self, rows: List[int]):
+        keep = [i for i in range(len(self._active)) if i not in set(rows)]
+        if not keep:
+            self._reset_batch()
+            return
+        if self._past is None:
+            self._active = [self._active[i] for i in keep]
+            return
+
+        index = torch.tensor(keep, device=self.device)
+        self._active = [self._active[i] for i in keep]
+        self._attention_mask = self._attention_mask.index_select(0, index)
+        self._next_tokens = self._next_tokens.index_select(0, index)
+
+        # Drop leading columns that are padding for every remaining row
+        trim = int((self._attention_mask.sum(dim=0) == 0).long().cumprod(dim=0).sum().item())
+        self._attention_mask = self._attention_mask[:, trim:]
+        self._past = tuple(
+            (k.index_select(0, index)[:, :, trim:], v.index_select(0, index)[:, :, trim:])
+            for k, v in self._past
+        )
+
+    def _drop(self, job: GenerationJob, error: Exception):
+        """Fail one request, removing it from the batch if it already joined."""
+        rows = [i for i, active in enumerate(self._active) if active is job]
+        if rows:
+            self._evict(rows)
+        self._fail(job, error)
+
+    def _reset_batch(self):
+        self._active = []
+        self._past = None
+        self._attention_mask = None
+        self._next_tokens = None
+
+    def _publish(self, job: GenerationJob, final: bool = False):
+        """Push newly decoded text to a streaming job's queue.
+
+        Trailing text that is a partial match of a stop sequence is held
+        back until the matcher knows whether the stop completes.
+        """
+        if job.stream is None:
+            return
+        end = len(job.text)
+        if not final and job.matcher is not None:
+            end -= job.matcher.pending
+        if end > job.emitted:
+            delta = job.text[job.emitted:end]
+            job.emitted = end
+            job.loop.call_soon_threadsafe(job.stream.put_nowait, delta)
+        if final:
+            job.loop.call_soon_threadsafe(job.stream.put_nowait, None)
+
+    def _complete(self, job: GenerationJob):
+        self._publish(job, final=True)
+
+        def resolve():
+            if not job.future.done():
+                job.future.set_result(job)
+        job.loop.call_soon_threadsafe(resolve)
+
+    def _fail(self, job: GenerationJob, error: Exception):
+        def reject():
+            if not job.future.done():
+                job.future.set_exception(error)
+        job.loop.call_soon_threadsafe(reject)
+        if job.stream is not None:
+            job.loop.call_soon_threadsafe(job.stream.put_nowait, None)
@@ -1,12 +1,25 @@
 # src/backend/ai/llm/service.py
 import os
 import logging
-import asyncio
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import json
+from typing import List, Optional, Dict, Tuple
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import torch
 from transformers import AutoTokenizer, AutoModelForCausalLM
+from llm.scheduler import BatchScheduler, GenerationJob
+from llm.prefix_cache import PrefixCache
+from llm.executor import InferenceExecutor, QueueFullError
+from llm.response_cache import ResponseCache, SemanticCache
+from llm.speculative import SpeculativeDecoder, check_draft_model
+from llm.model_registry import ModelEntry, ModelNotFoundError, ModelRegistry
+from llm.lora import AdapterCache, AdapterNotFoundError
+from llm.metrics import record_usage, usage
+from utils import tracing
+from utils.cache import LRUCache
+from utils.http_client import get_client
+from utils.metrics import instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,91 +27,286 @@ logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(title="LLM Service")
+instrument(app, "llm")
+tracing.trace_app(app, "llm")
 
 # Model configuration
 MODEL_NAME = os.getenv("MODEL_NAME", "llama-3-2-instruct")
 MODEL_PATH = os.getenv("MODEL_PATH", "/app/model_registry/llama-3.2")
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "8192"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+PREFIX_CACHE_MAX_MB = int(os.getenv("PREFIX_CACHE_MAX_MB", "512"))
+PREFIX_CACHE_BLOCK_SIZE = int(os.getenv("PREFIX_CACHE_BLOCK_SIZE", "32"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_QUEUE_SIZE = int(os.getenv("MAX_QUEUE_SIZE", "64"))
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+
+# Additional models are loaded by name on first request; LoRA adapters
+# from fine-tuning jobs attach to the base model instead
+CHECKPOINTS_DIR = os.getenv("CHECKPOINTS_DIR", "/app/checkpoints")
+MODELS_DIR = os.getenv("MODELS_DIR", "/app/model_registry")
+MAX_RESIDENT_MODELS = int(os.getenv("MAX_RESIDENT_MODELS", "2"))
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+MAX_LORA_ADAPTERS = int(os.getenv("MAX_LORA_ADAPTERS", "8"))
+PRELOAD_MODELS = [m.strip() for m in os.getenv("PRELOAD_MODELS", MODEL_NAME).split(",") if m.strip()]
+
+# Speculative decoding: a small draft model sharing the main model's tokenizer
+DRAFT_MODEL_PATH = os.getenv("DRAFT_MODEL_PATH", "")
+SPECULATIVE_TOKENS = int(os.getenv("SPECULATIVE_TOKENS", "4"))
+
+# Response cache configuration
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_REDIS = os.getenv("RESPONSE_CACHE_REDIS", "false").lower() == "true"
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "http://embedding-layer:9000")
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
-# Initialize model and tokenizer
-tokenizer = None
-model = None
+response_cache = None
+
+# Requests beyond the running batch wait in a bounded queue
+executor = InferenceExecutor(
+    max_workers=INFERENCE_WORKERS,
+    max_in_flight=MAX_BATCH_SIZE + MAX_QUEUE_SIZE,
+)
+
+def load_model(name: str, path: str) -> ModelEntry:
+    """Load a model and start its decode loop."""
+    dtype = torch.float16 if DEVICE == "cuda" else torch.float32
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    model = AutoModelForCausalLM.from_pretrained(
+        path,
+        torch_dtype=dtype,
+        device_map="auto" if DEVICE == "cuda" else None,
+    )
+    model.eval()
+    logger.info(f"Model {name} loaded successfully on {DEVICE}")
+
+    speculator = None
+    if DRAFT_MODEL_PATH and name == MODEL_NAME:
+        logger.info(f"Loading draft model from {DRAFT_MODEL_PATH}")
+        draft_model = AutoModelForCausalLM.from_pretrained(
+            DRAFT_MODEL_PATH,
+            torch_dtype=dtype,
+            device_map="auto" if DEVICE == "cuda" else None,
+        )
+        draft_model.eval()
+        try:
+            check_draft_model(model, tokenizer, draft_model, AutoTokenizer.from_pretrained(DRAFT_MODEL_PATH))
+            speculator = SpeculativeDecoder(model, draft_model, DEVICE, num_tokens=SPECULATIVE_TOKENS)
+        except ValueError as e:
+            logger.error(f"Speculative decoding disabled, incompatible draft model: {str(e)}")
+
+    adapters = None
+    if MAX_LORA_ADAPTERS > 0 and name == MODEL_NAME:
+        adapters = AdapterCache(model, CHECKPOINTS_DIR, max_adapters=MAX_LORA_ADAPTERS)
+
+    prefix_cache = None
+    if PREFIX_CACHE_MAX_MB > 0:
+        prefix_cache = PrefixCache(
+            max_bytes=PREFIX_CACHE_MAX_MB * 1024 * 1024,
+            block_size=PREFIX_CACHE_BLOCK_SIZE,
+        )
+    scheduler = BatchScheduler(
+        model,
+        tokenizer,
+        DEVICE,
+        max_batch_size=MAX_BATCH_SIZE,
+        prefix_cache=prefix_cache,
+        speculator=speculator,
+        adapters=adapters,
+    )
+    scheduler.start()
+    return ModelEntry(
+        name=name,
+        path=path,
+        model=model,
+        tokenizer=tokenizer,
+        scheduler=scheduler,
+        prefix_cache=prefix_cache,
+        adapters=adapters,
+        size_bytes=model.get_memory_footprint(),
+    )
+
+registry = ModelRegistry(
+    load_model,
+    executor.run,
+    aliases={MODEL_NAME: MODEL_PATH},
+    checkpoints_dir=CHECKPOINTS_DIR,
+    models_dir=MODELS_DIR,
+    max_resident=MAX_RESIDENT_MODELS,
+    max_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+)
+
+async def embed_prompt(text: str) -> List[float]:
+    """Embed a prompt with the internal embedding service for the semantic cache."""
+    response = await get_client("embedding", EMBEDDING_SERVICE_URL, idempotent=True).apost(
+        "/embed", json={"texts": [text]}
+    )
+    response.raise_for_status()
+    return response.json()["embeddings"][0]
+
+def init_response_cache() -> Optional[ResponseCache]:
+    if RESPONSE_CACHE_SIZE <= 0:
+        return None
+    
+    redis_client = None
+    if RESPONSE_CACHE_REDIS:
+        try:
+            import redis.asyncio as redis
+            redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis response cache: {str(e)}")
+    
+    semantic = None
+    if SEMANTIC_CACHE_ENABLED:
+        semantic = SemanticCache(embed_prompt, SEMANTIC_CACHE_THRESHOLD, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+    
+    return ResponseCache(
+        LRUCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL),
+        redis_client=redis_client,
+        semantic=semantic,
+    )
 
 @app.on_event("startup")
 async def startup_event():
-    global tokenizer, model
+    global response_cache
     try:
-        logger.info(f"Loading model {MODEL_NAME} from {MODEL_PATH}")
-        tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-        model = AutoModelForCausalLM.from_pretrained(
-            MODEL_PATH,
-            torch_dtype=torch.float16 if DEVICE == "cuda" else torch.float32,
-            device_map="auto" if DEVICE == "cuda" else None,
-        )
-        logger.info(f"Model loaded successfully on {DEVICE}")
+        if TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(TORCH_NUM_THREADS)
+        for name in PRELOAD_MODELS:
+            registry.release(await registry.acquire(name))
+        response_cache = init_response_cache()
     except Exception as e:
         logger.error(f"Failed to load model: {str(e)}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    registry.close()
+    executor.shutdown()
+
 class GenerationRequest(BaseModel):
     prompt: str
     max_tokens: int = Field(1024, ge=1, le=MAX_TOKENS)
     temperature: float = Field(0.7, ge=0.0, le=2.0)
     top_p: float = Field(0.9, ge=0.0, le=1.0)
     stop: Optional[List[str]] = []
+    model: Optional[str] = None
+    adapter: Optional[str] = None
 
 class GenerationResponse(BaseModel):
     generated_text: str
     model_used: str
     tokens_generated: int
+    usage: Optional[Dict[str, int]] = None
+    finish_reason: Optional[str] = None
+    stop_sequence: Optional[str] = None
+    cached: bool = False
 
-async def generate_text_with_model(
+class InvalidRequestError(ValueError):
+    """A generation request the model cannot run as sent."""
+
+def validate_request(max_tokens, temperature, top_p, stop):
+    """Check the sampling parameters of an untyped request before it reaches the decode loop."""
+    def number(name, value, low, high, kind=(int, float)):
+        if isinstance(value, bool) or not isinstance(value, kind) or not low <= value <= high:
+            raise InvalidRequestError(f"{name} must be a number between {low} and {high}")
+    number("max_tokens", max_tokens, 1, MAX_TOKENS, kind=int)
+    number("temperature", temperature, 0.0, 2.0)
+    number("top_p", top_p, 0.0, 1.0)
+    if stop is not None and (not isinstance(stop, list) or not all(isinstance(s, str) for s in stop)):
+        raise InvalidRequestError("stop must be a list of strings")
+
+async def start_generation(
     prompt: str,
     max_tokens: int = 1024,
     temperature: float = 0.7,
     top_p: float = 0.9,
-    stop: Optional[List[str]] = None
-) -> str:
-    """Generate text using the loaded LLM model."""
-    if model is None or tokenizer is None:
-        raise RuntimeError("Model or tokenizer not initialized")
-    
-    stop_tokens = stop or []
-    
+    stop: Optional[List[str]] = None,
+    stream: bool = False,
+    model_name: str = MODEL_NAME,
+    adapter: Optional[str] = None,
+) -> Tuple[ModelEntry, GenerationJob]:
+    """Admit a request, tokenize it off the event loop and queue it for decoding.
+
+    The named model is loaded first if it is not resident, and stays pinned
+    until the request finishes. ``adapter`` names a LoRA adapter to apply on
+    top of it. Raises InvalidRequestError for parameters the model cannot
+    run, QueueFullError when the service already has as many requests in
+    flight as it will accept, and ModelNotFoundError when the model or
+    adapter name does not resolve.
+    """
+    validate_request(max_tokens, temperature, top_p, stop)
+    executor.acquire()
+    entry = None
     try:
-        # Tokenize the input
-        inputs = tokenizer(prompt, return_tensors="pt").to(DEVICE)
-        
-        # Generate
-        with torch.no_grad():
-            outputs = model.generate(
-                inputs.input_ids,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                do_sample=temperature > 0,
-                pad_token_id=tokenizer.eos_token_id
+        entry = await registry.acquire(model_name)
+        if adapter:
+            if entry.adapters is None:
+                raise AdapterNotFoundError(f"Model {model_name} does not serve LoRA adapters")
+            entry.adapters.resolve(adapter)
+        input_ids = await executor.run(lambda: entry.tokenizer(prompt)["input_ids"])
+        max_positions = getattr(entry.model.config, "max_position_embeddings", None)
+        if max_positions and len(input_ids) >= max_positions:
+            raise InvalidRequestError(
+                f"Prompt is {len(input_ids)} tokens, model {model_name} accepts at most {max_positions - 1}"
             )
-        
-        # Decode the generated text
-        generated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        # Remove the input prompt from the output
-        if generated_text.startswith(prompt):
-            generated_text = generated_text[len(prompt):]
-        
-        # Apply stop sequences
-        if stop_tokens:
-            for stop_token in stop_tokens:
-                if stop_token in generated_text:
-                    generated_text = generated_text.split(stop_token)[0]
-        
-        return generated_text
+        job = entry.scheduler.enqueue(
+            input_ids,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=stop or [],
+            stream=stream,
+            adapter=adapter or None,
+        )
+    except Exception:
+        if entry is not None:
+            registry.release(entry)
+        executor.release()
+        raise
+    def finished(_):
+        registry.release(entry)
+        executor.release()
+        record_usage(model_name, job, adapter)
+    job.future.add_done_callback(finished)
+    return entry, job
+
+async def generate_text_with_model(
+    prompt: str,
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    top_p: float = 0.9,
+    stop: Optional[List[str]] = None,
+    model_name: str = MODEL_NAME,
+    adapter: Optional[str] = None,
+) -> Tuple[ModelEntry, GenerationJob]:
+    """Generate text using the named LLM model.
+
+    The request is handed to the model's batch scheduler, which decodes it
+    together with any other in-flight requests. Returns the model entry and
+    the finished job, whose ``text`` is already cut at the first stop
+    sequence that appeared.
+    """
+    try:
+        entry, job = await start_generation(
+            prompt, max_tokens, temperature, top_p, stop, model_name=model_name, adapter=adapter
+        )
+        return entry, await job.future
     except Exception as e:
         logger.error(f"Error generating text: {str(e)}")
         raise
 
+def queue_full_response(e: QueueFullError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+def model_not_found_response(e: ModelNotFoundError) -> HTTPException:
+    return HTTPException(status_code=404, detail=e.args[0] if e.args else str(e))
+
 @app.post("/generate", response_model=GenerationResponse)
 async def generate_text(request: dict):
     """Endpoint for LangChain adapter to generate text"""
@@ -112,32 +320,125 @@ async def generate_text(request: dict):
         max_tokens = request.get("max_tokens", 1024)
         temperature = request.get("temperature", 0.7)
         top_p = request.get("top_p", 0.9)
+        model_name = request.get("model") or MODEL_NAME
+        adapter = request.get("adapter")
+        
+        # Serve repeated requests from the response cache. Only greedy
+        # requests are cached by default: a sampled request should get a
+        # fresh answer each time unless the caller sends "cache": true
+        params = {
+            "model": model_name,
+            "adapter": adapter,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            "stop": stop,
+        }
+        use_cache = response_cache is not None and request.get("cache", temperature == 0) is True
+        if use_cache:
+            cached = await response_cache.get(prompt, params)
+            if cached is not None:
+                return {**cached, "cached": True}
         
         # Generate text
-        generated_text = await generate_text_with_model(
+        _, job = await generate_text_with_model(
             prompt=prompt,
             stop=stop,
             max_tokens=max_tokens,
             temperature=temperature,
-            top_p=top_p
+            top_p=top_p,
+            model_name=model_name,
+            adapter=adapter,
         )
         
-        return {
-            "generated_text": generated_text,
-            "model_used": MODEL_NAME,
-            "tokens_generated": len(tokenizer.encode(generated_text))
+        result = {
+            "generated_text": job.text,
+            "model_used": model_name,
+            "tokens_generated": len(job.output_ids),
+            "usage": usage(job),
+            "finish_reason": job.finish_reason,
+            "stop_sequence": job.stop_sequence,
         }
+        if use_cache:
+            await response_cache.set(prompt, params, result)
+        return result
+    except HTTPException:
+        raise
+    except InvalidRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    except ModelNotFoundError as e:
+        raise model_not_found_response(e)
     except Exception as e:
         logger.error(f"Error generating text: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate/stream")
+async def generate_text_stream(request: dict):
+    """Stream generated text as Server-Sent Events while decoding runs"""
+    prompt = request.get("prompt", "")
+    if not prompt:
+        raise HTTPException(status_code=400, detail="No prompt provided")
+    model_name = request.get("model") or MODEL_NAME
+    
+    try:
+        entry, job = await start_generation(
+            prompt,
+            max_tokens=request.get("max_tokens", 1024),
+            temperature=request.get("temperature", 0.7),
+            top_p=request.get("top_p", 0.9),
+            stop=request.get("stop", []),
+            stream=True,
+            model_name=model_name,
+            adapter=request.get("adapter"),
+        )
+    except InvalidRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise queue_full_response(e)
+    except ModelNotFoundError as e:
+        raise model_not_found_response(e)
+    except Exception as e:
+        logger.error(f"Error starting stream: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def events():
+        try:
+            async for delta in entry.scheduler.stream(job):
+                yield f"data: {json.dumps({'text': delta})}\n\n"
+            done = {
+                "finish_reason": job.finish_reason,
+                "stop_sequence": job.stop_sequence,
+                "model_used": model_name,
+                "tokens_generated": len(job.output_ids),
+                "usage": usage(job),
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming text: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for the LLM service."""
-    if model is None or tokenizer is None:
+    if not registry.resident():
         raise HTTPException(status_code=503, detail="Model not loaded")
-    return {"status": "healthy", "model": MODEL_NAME}
+    return {
+        "status": "healthy",
+        "model": MODEL_NAME,
+        "models": registry.stats,
+        "executor": executor.stats,
+        "response_cache": response_cache.stats if response_cache else None,
+    }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("service:app", host="0.0.0.0", port=5000, reload=True)
\ No newline at end of file
+    uvicorn.run("llm.service:app", host="0.0.0.0", port=5000, reload=True)
\ No newline at end of file
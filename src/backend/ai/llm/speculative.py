@@ -0,0 +1,141 @@
+# src/backend/ai/llm/speculative.py
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import torch
+
+from llm.scheduler import PastKeyValues, from_legacy_cache, to_legacy_cache, token_probs
+
+
+def _crop(past: PastKeyValues, length: int) -> PastKeyValues:
+    return tuple((k[:, :, :length], v[:, :, :length]) for k, v in past)
+
+
+def check_draft_model(model, tokenizer, draft_model, draft_tokenizer):
+    """Raise ValueError unless a draft model can propose tokens for ``model``.
+
+    Verification compares both models' probabilities token id by token id,
+    so they need the same vocabulary size and the same token-to-id mapping.
+    """
+    if draft_model.config.vocab_size != model.config.vocab_size:
+        raise ValueError(
+            f"Draft model has {draft_model.config.vocab_size} tokens, main model {model.config.vocab_size}"
+        )
+    if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+        raise ValueError("Draft model tokenizer does not match the main model tokenizer")
+
+
+@dataclass
+class SpeculativeState:
+    """Per-request state for speculative decoding.
+
+    ``tokens`` holds the prompt and every token generated so far. Both
+    caches cover a prefix of ``tokens``; whatever they are missing is fed
+    at the start of the next step.
+    """
+    tokens: List[int]
+    target_past: PastKeyValues
+    draft_past: PastKeyValues
+
+
+class SpeculativeDecoder:
+    """Draft-and-verify decoding with a small draft model.
+
+    Each step the draft model proposes ``num_tokens`` tokens one at a time,
+    then the main model scores all of them in a single forward pass. Draft
+    tokens are accepted with probability ``min(1, p/q)`` and the first
+    rejection is resampled from the residual ``max(0, p - q)``, so outputs
+    follow the main model's distribution exactly. The draft model must
+    share the main model's tokenizer.
+    """
+
+    def __init__(self, model, draft_model, device: str, num_tokens: int = 4):
+        self.model = model
+        self.draft_model = draft_model
+        self.device = device
+        self.num_tokens = num_tokens
+        self.proposed = 0
+        self.accepted = 0
+
+    def start(self, input_ids: List[int], first_token: int, target_past: PastKeyValues) -> SpeculativeState:
+        """Prefill the draft model for a prompt the main model has already prefilled."""
+        outputs = self.draft_model(input_ids=torch.tensor([input_ids], device=self.device), use_cache=True)
+        return SpeculativeState(
+            tokens=list(input_ids) + [first_token],
+            target_past=target_past,
+            draft_past=to_legacy_cache(outputs.past_key_values),
+        )
+
+    def step(
+        self,
+        state: SpeculativeState,
+        temperature: float,
+        top_p: float,
+        max_new: int,
+        forward: Optional[Callable] = None,
+    ) -> List[int]:
+        """Generate between one and ``num_tokens + 1`` new tokens for a request.
+
+        ``forward`` replaces the main model's forward pass, e.g. to verify
+        with a LoRA adapter attached; acceptance keeps the outputs exact.
+        """
+        temperatures = torch.tensor([temperature], device=self.device)
+        top_ps = torch.tensor([top_p], device=self.device)
+        num_tokens = max(0, min(self.num_tokens, max_new - 1))
+
+        # Draft proposals
+        draft_past = state.draft_past
+        feed = state.tokens[draft_past[0][0].shape[2]:]
+        proposals, draft_probs = [], []
+        for _ in range(num_tokens):
+            outputs = self.draft_model(
+                input_ids=torch.tensor([feed], device=self.device),
+                past_key_values=from_legacy_cache(draft_past),
+                use_cache=True,
+            )
+            draft_past = to_legacy_cache(outputs.past_key_values)
+            q = token_probs(outputs.logits[:, -1, :], temperatures, top_ps)[0]
+            token = int(torch.multinomial(q, num_samples=1))
+            proposals.append(token)
+            draft_probs.append(q)
+            feed = [token]
+
+        # Verify every proposal with one forward pass of the main model
+        feed = state.tokens[state.target_past[0][0].shape[2]:] + proposals
+        outputs = (forward or self.model)(
+            input_ids=torch.tensor([feed], device=self.device),
+            past_key_values=from_legacy_cache(state.target_past),
+            use_cache=True,
+        )
+        logits = outputs.logits[0, -(num_tokens + 1):, :]
+        p = token_probs(logits, temperatures.expand(num_tokens + 1), top_ps.expand(num_tokens + 1))
+
+        new_tokens = []
+        for i, (token, q) in enumerate(zip(proposals, draft_probs)):
+            vocab = min(p.shape[-1], q.shape[-1])
+            if torch.rand(1).item() < min(1.0, float(p[i, token] / q[token])):
+                new_tokens.append(token)
+                continue
+            residual = (p[i, :vocab] - q[:vocab]).clamp(min=0)
+            new_tokens.append(int(torch.multinomial(residual / residual.sum(), num_samples=1)))
+            break
+        else:
+            new_tokens.append(int(torch.multinomial(p[-1], num_samples=1)))
+
+        self.proposed += num_tokens
+        self.accepted += len(new_tokens) - 1
+
+        # Keep cache entries for accepted tokens only
+        state.tokens.extend(new_tokens)
+        valid = len(state.tokens) - 1
+        state.target_past = _crop(to_legacy_cache(outputs.past_key_values), valid)
+        state.draft_past = _crop(draft_past, valid)
+        return new_tokens
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "proposed": self.proposed,
+            "accepted": self.accepted,
+            "acceptance_rate": self.accepted / self.proposed if self.proposed else None,
+        }
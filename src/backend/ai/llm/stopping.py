@@ -0,0 +1,95 @@
+# src/backend/ai/llm/stopping.py
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class IncrementalDetokenizer:
+    """Turns a growing list of token ids into text deltas.
+
+    Only a short window of recent tokens is decoded per step, so the cost
+    does not grow with the length of the output. Tokens that decode to an
+    incomplete multi-byte character are held until the character is whole.
+    """
+
+    def __init__(self, tokenizer, window: int = 6):
+        self.tokenizer = tokenizer
+        self.window = window
+        self.prefix_offset = 0
+        self.read_offset = 0
+
+    def step(self, token_ids: List[int], final: bool = False) -> str:
+        prefix_text = self.tokenizer.decode(
+            token_ids[self.prefix_offset:self.read_offset], skip_special_tokens=True
+        )
+        new_text = self.tokenizer.decode(token_ids[self.prefix_offset:], skip_special_tokens=True)
+        if len(new_text) <= len(prefix_text) or (new_text.endswith("\ufffd") and not final):
+            return ""
+        self.read_offset = len(token_ids)
+        self.prefix_offset = max(self.prefix_offset, self.read_offset - self.window)
+        return new_text[len(prefix_text):]
+
+
+class StopSequenceMatcher:
+    """Aho-Corasick matcher that scans generated text for stop sequences.
+
+    Text is fed in as it is decoded, so a stop sequence is found the moment
+    its last character appears, even when it spans several tokens.
+    """
+
+    def __init__(self, stops: List[str]):
+        self.stops = [s for s in stops if s]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        self._match: List[Optional[str]] = [None]
+        self._compile()
+
+        self.state = 0
+        self.position = 0
+
+    def _compile(self):
+        for stop in self.stops:
+            state = 0
+            for ch in stop:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._depth.append(self._depth[state] + 1)
+                    self._match.append(None)
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._match[state] = stop
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                # A stop ending here that started earliest is the longest one
+                if self._match[child] is None:
+                    self._match[child] = self._match[self._fail[child]]
+                queue.append(child)
+
+    def feed(self, text: str) -> Optional[Tuple[int, str]]:
+        """Scan new text, returning ``(start, stop)`` of the first completed stop.
+
+        ``start`` is the offset of the stop sequence in the full text fed so far.
+        """
+        for ch in text:
+            state = self.state
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            self.state = self._goto[state].get(ch, 0)
+            self.position += 1
+            stop = self._match[self.state]
+            if stop is not None:
+                return self.position - len(stop), stop
+        return None
+
+    @property
+    def pending(self) -> int:
+        """Number of trailing characters that could still begin a stop sequence."""
+        return self._depth[self.state]
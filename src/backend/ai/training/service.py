@@ -6,12 +6,16 @@ import logging
 from datetime import datetime
 import os
 import json
+from utils import tracing
+from utils.metrics import instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Training Layer Service")
+instrument(app, "training")
+tracing.trace_app(app, "training")
 
 class TrainingConfig(BaseModel):
     model_name: str
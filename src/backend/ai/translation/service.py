@@ -9,12 +9,16 @@ from typing import Optional, List, Dict, Any
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
+from utils import tracing
+from utils.metrics import CHARACTERS_PROCESSED, instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Translation Service")
+instrument(app, "translation")
+tracing.trace_app(app, "translation")
 
 # Models for requests and responses
 class TranslationRequest(BaseModel):
@@ -75,6 +79,7 @@ async def translate_text(request: TranslationRequest):
         
         # Perform translation
         translated_text = model.translate([request.text])[0]
+        CHARACTERS_PROCESSED.labels(service="translation", model=lang_pair).inc(len(request.text))
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -12,12 +12,16 @@ import json
 import numpy as np
 from datetime import datetime
 import base64
+from utils import tracing
+from utils.metrics import AUDIO_SECONDS, instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="TTS Service")
+instrument(app, "tts")
+tracing.trace_app(app, "tts")
 
 # Models for requests and responses
 class SynthesisRequest(BaseModel):
@@ -106,6 +110,7 @@ async def synthesize_speech(request: SynthesisRequest):
         # Process results
         audio_samples = np.frombuffer(response.audio, dtype=np.int16)
         duration = len(audio_samples) / request.sample_rate
+        AUDIO_SECONDS.labels(service="tts").inc(duration)
         
         # Determine output path
         output_path = request.output_path
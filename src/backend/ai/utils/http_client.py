@@ -0,0 +1,306 @@
+# src/backend/ai/utils/http_client.py
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Defaults for every service; <SERVICE>_HTTP_<SETTING> overrides one service,
+# e.g. LLM_HTTP_TIMEOUT=300 or EMBEDDING_HTTP_MAX_RETRIES=5
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "5"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_RESET = float(os.getenv("HTTP_BREAKER_RESET", "30"))
+
+# Responses that mean "try again later" rather than "this request is wrong"
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a service whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. Then one trial call is
+    let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = HTTP_BREAKER_FAILURES, reset_timeout: float = HTTP_BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial:
+                raise CircuitOpenError(f"Circuit for {self.name} is open")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit for {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def abandon(self):
+        """Forget an unfinished trial call, e.g. one that was cancelled, so another can run."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+def _setting(service: str, key: str, default):
+    value = os.getenv(f"{service.upper()}_HTTP_{key}")
+    return type(default)(value) if value else default
+
+
+class ServiceClient:
+    """Pooled sync and async HTTP client for one internal service.
+
+    Requests reuse keep-alive connections, are bounded by a connect and a
+    read timeout, and are retried with full-jitter exponential backoff on
+    connection errors and on 429/502/503/504. Read timeouts are only retried
+    for idempotent requests, so a slow generation is not started twice.
+    Failures feed a circuit breaker that makes callers fail fast while the
+    service is down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        pool_size: Optional[int] = None,
+        idempotent: bool = False,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = _setting(name, "TIMEOUT", timeout if timeout is not None else HTTP_TIMEOUT)
+        self.connect_timeout = _setting(
+            name, "CONNECT_TIMEOUT", connect_timeout if connect_timeout is not None else HTTP_CONNECT_TIMEOUT
+        )
+        self.max_retries = _setting(name, "MAX_RETRIES", max_retries if max_retries is not None else HTTP_MAX_RETRIES)
+        self.pool_size = _setting(name, "POOL_SIZE", pool_size if pool_size is not None else HTTP_POOL_SIZE)
+        self.idempotent = idempotent
+        self.breaker = CircuitBreaker(
+            name,
+            _setting(name, "BREAKER_FAILURES", HTTP_BREAKER_FAILURES),
+            _setting(name, "BREAKER_RESET", HTTP_BREAKER_RESET),
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._async_client
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+    def _retryable(self, method: str, error: Exception) -> bool:
+        if isinstance(error, (requests.ConnectTimeout, httpx.ConnectTimeout)):
+            return True
+        if isinstance(error, (requests.Timeout, httpx.TimeoutException)):
+            return self.idempotent or method.upper() in IDEMPOTENT_METHODS
+        return isinstance(error, (requests.ConnectionError, httpx.TransportError))
+
+    def _span(self, method: str, path: str):
+        """Client span for one call, retries included, whose context goes out in the headers."""
+        return tracing.span(
+            f"{method} {self.name}",
+            {"http.request.method": method, "server.address": self.base_url, "url.path": path},
+            kind="client",
+        )
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures; the caller checks the final status."""
+        kwargs.setdefault("timeout", (self.connect_timeout, self.timeout))
+        with self._span(method, path) as span:
+            kwargs["headers"] = tracing.inject(dict(kwargs.get("headers") or {}))
+            response = self._request(method, path, **kwargs)
+            tracing.set_status(span, response.status_code)
+            return response
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            try:
+                response = self.session.request(method, self.url(path), **kwargs)
+            except Exception as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries or not self._retryable(method, e):
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{self.name} {method} {path} failed ({str(e)}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.abandon()
+                raise
+
+            if response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success()
+                return response
+            self.breaker.record_failure()
+            if attempt == self.max_retries:
+                return response
+            delay = self.backoff(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"{self.name} {method} {path} returned {response.status_code}, retrying in {delay:.2f}s")
+            response.close()
+            time.sleep(delay)
+
+    async def arequest(self, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """Async variant of request; with ``stream=True`` the body is left unread until the caller closes it."""
+        with self._span(method, path) as span:
+            kwargs["headers"] = tracing.inject(dict(kwargs.get("headers") or {}))
+            response = await self._arequest(method, path, stream, **kwargs)
+            tracing.set_status(span, response.status_code)
+            return response
+
+    async def _arequest(self, method: str, path: str, stream: bool, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            try:
+                request = self.async_client.build_request(method, self.url(path), **kwargs)
+                response = await self.async_client.send(request, stream=stream)
+            except Exception as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries or not self._retryable(method, e):
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{self.name} {method} {path} failed ({str(e)}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (client gone, wait_for timeout): neither a success nor a failure
+                self.breaker.abandon()
+                raise
+
+            if response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success()
+                return response
+            self.breaker.record_failure()
+            if attempt == self.max_retries:
+                return response
+            delay = self.backoff(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"{self.name} {method} {path} returned {response.status_code}, retrying in {delay:.2f}s")
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    async def aget(self, path: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", path, **kwargs)
+
+    async def apost(self, path: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        self.session.close()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "timeout": self.timeout,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+
+_clients: Dict[Tuple[str, str], ServiceClient] = {}
+_lock = threading.Lock()
+
+
+def get_client(name: str, base_url: str, **kwargs) -> ServiceClient:
+    """Return the process-wide client for a service, creating it on first use.
+
+    Every caller of a service shares one connection pool and one circuit
+    breaker; ``kwargs`` only apply when the client is created.
+    """
+    key = (name, base_url.rstrip("/"))
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ServiceClient(name, base_url, **kwargs)
+            _clients[key] = client
+        return client
+
+
+def client_stats() -> dict:
+    with _lock:
+        return {f"{name} {url}": client.stats for (name, url), client in _clients.items()}
@@ -0,0 +1,96 @@
+# src/backend/ai/utils/metrics.py
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, make_asgi_app
+from starlette.routing import Match
+
+# Request metrics shared by every service; "route" is the path template
+# (e.g. /inference/{path:path}), never the raw path, to bound cardinality
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled",
+    ["service", "method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response body was sent",
+    ["service", "method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled",
+    ["service", "method", "route"],
+)
+
+# Work counters for the model-serving layers
+AUDIO_SECONDS = Counter(
+    "audio_seconds_processed_total",
+    "Seconds of audio transcribed or synthesized",
+    ["service"],
+)
+ROWS_PROCESSED = Counter(
+    "rows_processed_total",
+    "Dataset rows processed",
+    ["service", "operation"],
+)
+CHARACTERS_PROCESSED = Counter(
+    "characters_processed_total",
+    "Input characters processed",
+    ["service", "model"],
+)
+
+
+def route_template(app, scope) -> str:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class PrometheusMiddleware:
+    """ASGI middleware that counts and times every HTTP request.
+
+    Latency covers the whole response including streamed bodies, and
+    requests to the metrics endpoint itself are not recorded.
+    """
+
+    def __init__(self, app, service: str, fastapi_app, metrics_path: str = "/metrics"):
+        self.app = app
+        self.service = service
+        self.fastapi_app = fastapi_app
+        self.metrics_path = metrics_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.metrics_path):
+            await self.app(scope, receive, send)
+            return
+
+        labels = {
+            "service": self.service,
+            "method": scope["method"],
+            "route": route_template(self.fastapi_app, scope),
+        }
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.labels(**labels).inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            LATENCY.labels(**labels).observe(time.perf_counter() - start)
+            REQUESTS.labels(status=str(status["code"]), **labels).inc()
+            IN_FLIGHT.labels(**labels).dec()
+
+
+def instrument(app, service: str, metrics_path: str = "/metrics"):
+    """Export request metrics for a FastAPI app and serve them at ``metrics_path``."""
+    app.add_middleware(PrometheusMiddleware, service=service, fastapi_app=app, metrics_path=metrics_path)
+    app.mount(metrics_path, make_asgi_app())
+    return app
@@ -1,18 +1,20 @@
 # src/backend/ai/utils/rapids_client.py
-import requests
 import logging
 from typing import List, Dict, Any, Optional
+from utils.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
 class RapidsClient:
     def __init__(self, base_url: str = "http://rapids-processing:7500"):
         self.base_url = base_url
+        # Dataset processing can run for minutes
+        self.client = get_client("rapids", base_url, timeout=600)
     
     def process_data(self, data: List[Dict[str, Any]], operations: List[str], output_format: str = "json"):
         """Process data using RAPIDS service."""
         try:
-            response = requests.post(
+            response = self.client.post(
                 f"{self.base_url}/process",
                 json={
                     "data": data,
@@ -29,7 +31,7 @@ class RapidsClient:
     def analyze_dataset(self, dataset_path: str, analysis_type: str):
         """Analyze dataset using RAPIDS service."""
         try:
-            response = requests.post(
+            response = self.client.post(
                 f"{self.base_url}/analyze",
                 json={
                     "dataset_path": dataset_path,
@@ -45,7 +47,7 @@ class RapidsClient:
     def prepare_for_llm(self, data_path: str):
         """Prepare data for LLM consumption."""
         try:
-            response = requests.post(
+            response = self.client.post(
                 f"{self.base_url}/prepare-for-llm",
                 params={"data_path": data_path}
             )
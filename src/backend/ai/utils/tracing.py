@@ -0,0 +1,166 @@
+# src/backend/ai/utils/tracing.py
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # Tracing is optional: without the API every helper is a no-op
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+# "otlp" sends spans to OTEL_EXPORTER_OTLP_ENDPOINT, "file" appends them as
+# JSON lines to TRACING_FILE, "none" only propagates trace context
+TRACING_EXPORTER = os.getenv(
+    "TRACING_EXPORTER", "otlp" if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") else "none"
+)
+TRACING_FILE = os.getenv("TRACING_FILE", "/app/logs/traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+# W3C trace-context headers, replaced rather than forwarded by proxies
+TRACE_HEADERS = {"traceparent", "tracestate"}
+
+_configured = False
+
+
+def setup_tracing(service: str):
+    """Install the span exporter for this process; needs opentelemetry-sdk unless exporting is off."""
+    global _configured
+    if trace is None or _configured or TRACING_EXPORTER == "none":
+        return
+    _configured = True
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        if TRACING_EXPORTER == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        elif TRACING_EXPORTER == "file":
+            os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+            exporter = ConsoleSpanExporter(
+                out=open(TRACING_FILE, "a"),
+                formatter=lambda span: span.to_json(indent=None) + "\n",
+            )
+        else:
+            raise ValueError(f"Invalid TRACING_EXPORTER {TRACING_EXPORTER}. Use otlp, file or none.")
+    except ImportError as e:
+        logger.warning(f"Tracing export disabled, missing OpenTelemetry package: {str(e)}")
+        return
+    except OSError as e:
+        # An unwritable trace file must not stop the service from starting
+        logger.warning(f"Tracing export disabled, cannot open {TRACING_FILE}: {str(e)}")
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Exporting traces for {service} via {TRACING_EXPORTER}")
+
+
+def _tracer():
+    return trace.get_tracer("ai-platform")
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "internal"):
+    """Run a block inside a span that becomes the parent of any span started in it."""
+    if trace is None:
+        yield None
+        return
+    with _tracer().start_as_current_span(name, kind=getattr(SpanKind, kind.upper()), attributes=attributes) as current:
+        yield current
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "client"):
+    """Start a span that outlives the current block; finish it with end_span."""
+    if trace is None:
+        return None
+    return _tracer().start_span(name, kind=getattr(SpanKind, kind.upper()), attributes=attributes)
+
+
+def end_span(current, status_code: Optional[int] = None, error: Optional[BaseException] = None):
+    if current is None:
+        return
+    if status_code is not None:
+        set_status(current, status_code)
+    if error is not None:
+        current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR, str(error)))
+    current.end()
+
+
+def set_status(current, status_code: int):
+    if current is None:
+        return
+    current.set_attribute("http.response.status_code", status_code)
+    if status_code >= 500:
+        current.set_status(Status(StatusCode.ERROR))
+
+
+def inject(headers: Dict[str, str], current=None) -> Dict[str, str]:
+    """Add trace-context headers for the current span, or ``current`` if given."""
+    if trace is not None:
+        context = trace.set_span_in_context(current) if current is not None else None
+        propagate.inject(headers, context=context)
+    return headers
+
+
+def inject_list(headers: List[Tuple[str, str]], current=None) -> List[Tuple[str, str]]:
+    """Replace the trace-context entries of a header list with the current span's."""
+    kept = [(name, value) for name, value in headers if name.lower() not in TRACE_HEADERS]
+    return kept + list(inject({}, current).items())
+
+
+class TracingMiddleware:
+    """ASGI middleware that continues the caller's trace with a server span per request."""
+
+    def __init__(self, app, service: str, fastapi_app):
+        # Imported here so HTTP clients can use this module without prometheus_client
+        from utils.metrics import route_template
+
+        self.route_template = route_template
+        self.app = app
+        self.service = service
+        self.fastapi_app = fastapi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/metrics") or scope["path"] == "/health":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        route = self.route_template(self.fastapi_app, scope)
+        with _tracer().start_as_current_span(
+            f"{scope['method']} {route}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={
+                "service.name": self.service,
+                "http.request.method": scope["method"],
+                "http.route": route,
+                "url.path": scope["path"],
+            },
+        ) as current:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    set_status(current, message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+def trace_app(app, service: str):
+    """Trace every request to a FastAPI app and export spans as configured."""
+    setup_tracing(service)
+    if trace is not None:
+        app.add_middleware(TracingMiddleware, service=service, fastapi_app=app)
+    return app
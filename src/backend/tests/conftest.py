@@ -0,0 +1,7 @@
+# /src/backend/tests/conftest.py
+import os
+import sys
+
+# The AI services run with src/backend/ai on PYTHONPATH (see the Dockerfiles),
+# so their modules import each other as top-level packages like "llm" and "adapters"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ai"))
@@ -0,0 +1,144 @@
+# /src/backend/tests/unit/test_api_gateway.py
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from api_gateway import service
+from api_gateway.coalesce import BufferedResponse, SingleFlight
+
+async def chunks(*parts):
+    # A real upstream body arrives as a stream rather than preloaded bytes
+    for part in parts:
+        yield part
+
+@pytest.fixture
+def gateway(monkeypatch):
+    upstream_requests = []
+    for pool in service.upstreams.values():
+        monkeypatch.setattr(pool, "health_path", "")
+
+    def handler(request):
+        upstream_requests.append(request)
+        if request.url.path == "/synthesize":
+            return httpx.Response(
+                200,
+                content=chunks(b"\x00RIFF", b"\xffaudio"),
+                headers=[("content-type", "audio/wav"), ("set-cookie", "a=1"), ("set-cookie", "b=2")],
+            )
+        if request.url.path == "/analyze":
+            return httpx.Response(200, content=chunks(b'{"rows": 3}'), headers={"content-type": "application/json"})
+        if request.url.path == "/stream":
+            return httpx.Response(200, content=chunks(b"data: one\n\n", b"data: two\n\n"),
+                                  headers={"content-type": "text/event-stream"})
+        return httpx.Response(404, content=chunks(b'{"detail": "Not Found"}'))
+
+    with TestClient(service.app) as client:
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        yield client, upstream_requests
+
+def test_binary_responses_and_headers_pass_through(gateway):
+    """Test that non-JSON bodies, repeated headers and the request body reach their destination unchanged"""
+    client, upstream_requests = gateway
+    response = client.post("/tts/synthesize?voice=en", content=b"\x01\x02payload", headers={"x-request-id": "abc"})
+
+    assert response.status_code == 200
+    assert response.content == b"\x00RIFF\xffaudio"
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.headers.get_list("set-cookie") == ["a=1", "b=2"]
+
+    upstream = upstream_requests[0]
+    assert str(upstream.url) == f"{service.TTS_ENDPOINT}/synthesize?voice=en"
+    assert upstream.content == b"\x01\x02payload"
+    assert upstream.headers["x-request-id"] == "abc"
+
+def test_upstream_status_and_event_streams_pass_through(gateway):
+    """Test that upstream errors keep their status and server-sent events are relayed"""
+    client, _ = gateway
+    assert client.post("/inference/missing").status_code == 404
+
+    response = client.post("/v1/completions", json={"stream": True})
+    assert response.status_code == 404
+
+    response = client.post("/data/stream")
+    assert response.headers["content-type"] == "text/event-stream"
+    assert response.text == "data: one\n\ndata: two\n\n"
+
+def test_concurrent_identical_requests_share_one_upstream_call():
+    """Test that single-flight runs one fetch for concurrent callers and does not cache failures"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return BufferedResponse(200, [], b"result")
+
+    async def failing():
+        calls.append(1)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        flight = SingleFlight(ttl=60)
+        results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(5)])
+        assert len(calls) == 1
+        assert sorted(outcome for _, outcome in results) == ["COALESCED"] * 4 + ["MISS"]
+        assert {response.content for response, _ in results} == {b"result"}
+        assert (await flight.do("key", fetch))[1] == "HIT"
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await flight.do("other", failing)
+        assert len(calls) == 3
+
+    asyncio.run(run())
+
+def test_opted_in_routes_reuse_recent_responses(gateway, monkeypatch):
+    """Test that coalesced routes answer repeated requests from the short-TTL cache"""
+    client, upstream_requests = gateway
+    monkeypatch.setattr(service, "GATEWAY_COALESCE_ROUTES", {"data"})
+    monkeypatch.setattr(service, "single_flight", SingleFlight(ttl=60))
+
+    first = client.post("/data/analyze", json={"dataset": "a"})
+    second = client.post("/data/analyze", json={"dataset": "a"})
+    other = client.post("/data/analyze", json={"dataset": "b"})
+
+    assert first.json() == second.json() == {"rows": 3}
+    assert [r.headers["x-gateway-cache"] for r in (first, second, other)] == ["MISS", "HIT", "MISS"]
+    assert len(upstream_requests) == 2
+
+def test_trace_context_is_continued_upstream(gateway):
+    """Test that the caller's trace id reaches the upstream in a fresh traceparent header"""
+    pytest.importorskip("opentelemetry")
+    client, upstream_requests = gateway
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    client.post("/data/analyze", json={}, headers={"traceparent": traceparent})
+
+    forwarded = upstream_requests[0].headers.get_list("traceparent")
+    assert len(forwarded) == 1
+    assert forwarded[0].split("-")[1] == "4bf92f3577b34da6a3ce929d0e0e4736"
+
+def test_client_disconnect_mid_stream_releases_the_replica(gateway):
+    """Test that a client leaving mid-stream closes the upstream response and frees its replica"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/asr/stream", "raw_path": b"/asr/stream",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"testserver")],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            raise OSError("client went away")
+        sent.append(message)
+
+    async def run():
+        with pytest.raises(Exception):
+            await service.app(scope, receive, send)
+        # Checked before the event loop closes, which would finalize a leaked stream
+        return [replica.outstanding for replica in service.upstreams["asr"].replicas]
+
+    assert asyncio.run(run()) == [0]
+    assert sent[0]["type"] == "http.response.start"
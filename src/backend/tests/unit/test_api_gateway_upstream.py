@@ -0,0 +1,58 @@
+# /src/backend/tests/unit/test_api_gateway_upstream.py
+import asyncio
+import httpx
+from api_gateway.upstream import UpstreamPool, parse_replicas
+
+def make_pool(**kwargs):
+    return UpstreamPool("asr", parse_replicas("http://a:1, http://b:1/,http://c:1"), **kwargs)
+
+def test_requests_go_to_the_least_loaded_replica():
+    """Test that least-outstanding balancing spreads concurrent requests and follows releases"""
+    pool = make_pool()
+    first = [pool.acquire() for _ in range(3)]
+    assert sorted(replica.url for replica in first) == ["http://a:1", "http://b:1", "http://c:1"]
+
+    pool.release(first[1])
+    assert pool.acquire() is first[1]
+
+def test_ewma_prefers_faster_replicas():
+    """Test that EWMA balancing weighs outstanding requests by observed latency"""
+    pool = make_pool(strategy="ewma")
+    slow, fast, _ = pool.replicas
+    pool.observe(slow, 1.0, 200)
+    pool.observe(fast, 0.1, 200)
+    pool.replicas[2].ewma = 0.5
+
+    assert pool.acquire() is fast
+    assert pool.acquire() is fast  # 0.1 * 2 is still below 0.5 and 1.0
+
+def test_failing_replicas_are_ejected_but_never_all_of_them():
+    """Test that consecutive failures eject a replica, within the ejection limit"""
+    pool = make_pool(eject_failures=2, eject_max_percent=50)
+    a, b, c = pool.replicas
+    for replica in (a, a, b, b):
+        pool.observe(replica, None, None if replica is a else 503)
+
+    assert a.ejections == 1 and b.ejections == 0
+    assert {pool.acquire() for _ in range(10)} == {b, c}
+
+def test_active_health_checks_take_replicas_out_of_rotation():
+    """Test that replicas failing health checks stop receiving traffic until they recover"""
+    down = {"http://b:1"}
+
+    def handler(request):
+        replica = f"{request.url.scheme}://{request.url.host}:{request.url.port}"
+        return httpx.Response(503 if replica in down else 200)
+
+    async def run():
+        pool = make_pool(unhealthy_threshold=1)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await pool.check(client)
+            assert [replica.healthy for replica in pool.replicas] == [True, False, True]
+            assert pool.replicas[1] not in {pool.acquire() for _ in range(6)}
+
+            down.clear()
+            await pool.check(client)
+            assert pool.replicas[1].healthy
+
+    asyncio.run(run())
@@ -0,0 +1,86 @@
+# /src/backend/tests/unit/test_http_client.py
+import asyncio
+from unittest.mock import MagicMock
+import httpx
+import pytest
+import requests
+from utils.http_client import CircuitOpenError, ServiceClient
+
+def make_response(status):
+    response = MagicMock(status_code=status, headers={})
+    return response
+
+@pytest.fixture
+def client():
+    client = ServiceClient("test", "http://svc:9000", max_retries=2)
+    client.backoff = lambda attempt, retry_after=None: 0
+    return client
+
+def test_transient_failures_are_retried(client):
+    """Test that connection errors and 503s are retried until the service answers"""
+    client.session.request = MagicMock(side_effect=[
+        requests.ConnectionError("refused"), make_response(503), make_response(200),
+    ])
+    assert client.post("/embed", json={}).status_code == 200
+    assert client.session.request.call_count == 3
+    assert client.session.request.call_args.args == ("POST", "http://svc:9000/embed")
+
+def test_read_timeouts_are_only_retried_when_idempotent(client):
+    """Test that a timed-out generation is not sent twice"""
+    client.session.request = MagicMock(side_effect=requests.ReadTimeout("slow"))
+    with pytest.raises(requests.ReadTimeout):
+        client.post("/generate")
+    assert client.session.request.call_count == 1
+
+    client.idempotent = True
+    client.session.request.reset_mock()
+    with pytest.raises(requests.ReadTimeout):
+        client.post("/embed")
+    assert client.session.request.call_count == 3
+
+def test_circuit_opens_and_fails_fast(client):
+    """Test that repeated failures open the circuit so callers stop waiting on a dead service"""
+    client.breaker.failure_threshold = 3
+    client.session.request = MagicMock(side_effect=requests.ConnectionError("refused"))
+    with pytest.raises(requests.ConnectionError):
+        client.post("/generate")
+    assert client.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        client.post("/generate")
+    assert client.session.request.call_count == 3
+
+    client.breaker.reset_timeout = 0
+    client.session.request = MagicMock(return_value=make_response(200))
+    assert client.post("/generate").status_code == 200
+    assert client.breaker.state == "closed"
+
+def test_async_requests_share_the_retry_policy(client):
+    """Test that the async client retries 502s the same way as the sync one"""
+    statuses = iter([502, 200])
+    transport = httpx.MockTransport(lambda request: httpx.Response(next(statuses), json={"ok": True}))
+    client._async_client = httpx.AsyncClient(transport=transport)
+
+    response = asyncio.run(client.apost("/generate", json={}))
+    assert response.status_code == 200
+    assert client.breaker.failures == 0
+
+def test_cancelled_trial_call_does_not_wedge_the_circuit(client):
+    """Test that cancelling the half-open trial call lets the next call try again"""
+    client.breaker.failure_threshold = 1
+    client.breaker.record_failure()
+    client.breaker.reset_timeout = 0
+
+    async def slow(request):
+        await asyncio.sleep(10)
+
+    async def run():
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.apost("/generate"), 0.05)
+
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+        return await client.apost("/generate")
+
+    assert asyncio.run(run()).status_code == 200
+    assert client.breaker.state == "closed"
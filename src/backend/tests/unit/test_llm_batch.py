@@ -0,0 +1,41 @@
+# /src/backend/tests/unit/test_llm_batch.py
+import threading
+import time
+from llm.batch import run_batch
+
+def test_results_keep_order_and_errors_stay_per_item():
+    """Test that batch results come back in input order and one failure does not fail the batch"""
+    def call(i):
+        time.sleep(0.01 * (5 - i))
+        if i == 2:
+            raise RuntimeError("backend down")
+        return f"answer {i}"
+
+    results = run_batch(call, 5, concurrency=5)
+    assert [r.index for r in results] == [0, 1, 2, 3, 4]
+    assert [r.response for r in results] == ["answer 0", "answer 1", None, "answer 3", "answer 4"]
+    assert not results[2].ok and "backend down" in results[2].error
+
+def test_model_groups_run_concurrently_with_bounded_parallelism():
+    """Test that each model group runs at most `concurrency` calls while the groups overlap"""
+    lock = threading.Lock()
+    active = {"weak": 0, "strong": 0}
+    peak = {"weak": 0, "strong": 0, "both": 0}
+    groups = {"weak": [0, 2, 4, 6], "strong": [1, 3, 5, 7]}
+    model_of = {i: model for model, indices in groups.items() for i in indices}
+
+    def call(i):
+        model = model_of[i]
+        with lock:
+            active[model] += 1
+            peak[model] = max(peak[model], active[model])
+            peak["both"] = max(peak["both"], active["weak"] + active["strong"])
+        time.sleep(0.05)
+        with lock:
+            active[model] -= 1
+        return model
+
+    results = run_batch(call, 8, concurrency=2, groups=groups)
+    assert [r.model for r in results] == [model_of[i] for i in range(8)]
+    assert peak["weak"] <= 2 and peak["strong"] <= 2
+    assert peak["both"] > 2
@@ -0,0 +1,40 @@
+# /src/backend/tests/unit/test_llm_calibrate_router.py
+import json
+import numpy as np
+from llm.calibrate_router import calibrate, read_prompts, score_prompts, strong_fraction
+
+def test_strong_fraction_counts_scores_at_or_above_threshold():
+    """Test that the strong-model fraction is computed for every threshold at once"""
+    scores = np.array([0.1, 0.2, 0.2, 0.5, 0.9])
+    fractions = strong_fraction(scores, np.array([0.0, 0.2, 0.3, 0.9, 1.0]))
+    assert fractions.tolist() == [1.0, 0.8, 0.4, 0.2, 0.0]
+
+def test_calibrate_meets_cost_budget():
+    """Test that the chosen threshold keeps the mixed cost within budget"""
+    scores = np.random.default_rng(0).random(100000)
+    # Strong 10, weak 1: a budget of 4 allows a third of traffic on the strong model
+    result = calibrate(scores, cost_budget=4.0, strong_cost=10.0, weak_cost=1.0)
+    assert result["expected_cost"] <= 4.0
+    assert abs(result["strong_fraction"] - 1 / 3) < 0.001
+    assert abs(result["threshold"] - 2 / 3) < 0.01
+
+def test_calibrate_never_exceeds_fraction_with_ties():
+    """Test that tied scores at the cut-off never push traffic over the target"""
+    scores = np.array([0.5] * 10 + [0.9] * 2)
+    result = calibrate(scores, target_fraction=0.5)
+    assert result["strong_fraction"] == 2 / 12
+
+def test_log_replay_scores_every_prompt_in_order(tmp_path):
+    """Test that prompt and messages log lines are replayed in order through batched scoring"""
+    log = tmp_path / "prompts.jsonl"
+    lines = [{"prompt": "a" * i} if i % 2 else {"messages": [{"role": "user", "content": "a" * i}]} for i in range(1, 50)]
+    log.write_text("\n".join(json.dumps(line) for line in lines))
+
+    batches = []
+    def score_batch(prompts):
+        batches.append(len(prompts))
+        return [len(p) / 100 for p in prompts]
+
+    scores = score_prompts(score_batch, read_prompts(str(log)), chunk_size=8, workers=2)
+    assert scores.tolist() == [i / 100 for i in range(1, 50)]
+    assert max(batches) == 8
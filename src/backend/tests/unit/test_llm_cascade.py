@@ -0,0 +1,82 @@
+# /src/backend/tests/unit/test_llm_cascade.py
+from collections import defaultdict
+from types import SimpleNamespace
+import pytest
+
+litellm = pytest.importorskip("litellm")
+from llm.cascade import Cascade, escalation_messages
+
+def make_response(text, finish_reason="stop", logprobs=None):
+    choice = SimpleNamespace(
+        message=SimpleNamespace(content=text),
+        finish_reason=finish_reason,
+        logprobs=SimpleNamespace(content=[SimpleNamespace(logprob=lp) for lp in logprobs]) if logprobs else None,
+    )
+    return SimpleNamespace(choices=[choice])
+
+@pytest.fixture
+def cascade(monkeypatch):
+    calls = []
+    weak_answers = {
+        "easy": make_response("4", logprobs=[-0.01, -0.02]),
+        "hedge": make_response("I'm not sure, maybe 3"),
+        "long": make_response("First,", finish_reason="length"),
+        "plain": make_response("Paris"),
+        "tentative": make_response("It is probably 3, but it might be 5"),
+    }
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        if kwargs["model"] == "weak":
+            return weak_answers[kwargs["messages"][-1]["content"]]
+        return make_response("strong answer")
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    controller = SimpleNamespace(
+        model_pair=SimpleNamespace(strong="strong", weak="weak"),
+        api_base=None,
+        api_key=None,
+        model_counts=defaultdict(lambda: defaultdict(int)),
+    )
+    return Cascade(controller, confidence_threshold=0.6), calls
+
+def test_confident_weak_answer_is_returned_without_escalation(cascade):
+    """Test that a confident local answer never reaches the strong model"""
+    cascade, calls = cascade
+    result = cascade.run([{"role": "user", "content": "easy"}])
+    assert (result.content, result.model, result.escalated) == ("4", "weak", False)
+    assert [call["model"] for call in calls] == ["weak"]
+
+@pytest.mark.parametrize("prompt,reason", [("hedge", "hedging"), ("long", "truncated")])
+def test_low_confidence_escalates_with_draft_as_context(cascade, prompt, reason):
+    """Test that hedging or truncated drafts escalate and are passed to the strong model"""
+    cascade, calls = cascade
+    result = cascade.run([{"role": "user", "content": prompt}])
+    assert (result.content, result.model, result.escalated, result.reason) == ("strong answer", "strong", True, reason)
+    strong_messages = calls[-1]["messages"]
+    assert len(strong_messages) == 1
+    assert strong_messages[0]["role"] == "user"
+    assert strong_messages[0]["content"].startswith(prompt + "\n\n")
+    assert result.draft in strong_messages[0]["content"]
+
+def test_draft_never_becomes_a_system_message():
+    """Test that escalation keeps the caller's system prompt as the only one and the draft in the user turn"""
+    messages = [
+        {"role": "system", "content": "Answer in French."},
+        {"role": "user", "content": [{"type": "text", "text": "What is this?"}]},
+    ]
+    escalated = escalation_messages(messages, "A cat")
+
+    assert [m["role"] for m in escalated] == ["system", "user"]
+    assert escalated[0] == messages[0]
+    assert escalated[1]["content"][0] == {"type": "text", "text": "What is this?"}
+    assert "A cat" in escalated[1]["content"][-1]["text"]
+    assert messages[1]["content"] == [{"type": "text", "text": "What is this?"}]
+
+@pytest.mark.parametrize("prompt,escalated", [("plain", False), ("tentative", True)])
+def test_answers_without_logprobs_can_still_escalate(cascade, prompt, escalated):
+    """Test that the fallback heuristic trusts plain answers but not tentative ones"""
+    cascade, calls = cascade
+    result = cascade.run([{"role": "user", "content": prompt}])
+    assert (result.escalated, result.reason) == (escalated, "heuristic")
+    assert result.confidence < 1.0
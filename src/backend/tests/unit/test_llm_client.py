@@ -1,12 +1,17 @@
 # /src/backend/tests/unit/test_llm_client.py
+import os
+import subprocess
+import sys
 import pytest
 import json
 from unittest.mock import patch, MagicMock
 from src.backend.utils.llm_client import query_llm
+from llm.batch import BatchResult
 
 @pytest.fixture
 def mock_response():
     mock = MagicMock()
+    mock.status_code = 200
     mock.json.return_value = {
         "generated_text": "Quantum computing is like regular computing but with qubits instead of bits.",
         "model_used": "test-model",
@@ -16,14 +21,15 @@ def mock_response():
 
 def test_query_llm_parameters():
     """Test that query_llm constructs the correct payload with default parameters"""
-    with patch('requests.post') as mock_post:
+    with patch('src.backend.utils.llm_client.client.session.request') as mock_post:
+        mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {}
         
         query_llm("Test prompt")
         
         # Check that the request was made with the correct parameters
         args, kwargs = mock_post.call_args
-        assert args[0] == "http://localhost:5000/generate"
+        assert args == ("POST", "http://localhost:5000/generate")
         assert kwargs['json']['messages'][0]['content'] == "Test prompt"
         assert kwargs['json']['max_tokens'] == 500
         assert kwargs['json']['temperature'] == 0.7
@@ -32,7 +38,8 @@ def test_query_llm_parameters():
 
 def test_query_llm_custom_parameters():
     """Test that query_llm respects custom parameters"""
-    with patch('requests.post') as mock_post:
+    with patch('src.backend.utils.llm_client.client.session.request') as mock_post:
+        mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {}
         
         query_llm(
@@ -50,11 +57,70 @@ def test_query_llm_custom_parameters():
         assert kwargs['json']['router'] == "custom"
         assert kwargs['json']['threshold'] == 0.2
 
+def test_query_llm_uses_the_calibrated_threshold(monkeypatch):
+    """Test that the default routing threshold follows recalibration"""
+    monkeypatch.setenv("ROUTER_TEXT_THRESHOLD", "0.25")
+    with patch('src.backend.utils.llm_client.client.session.request') as mock_post:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {}
+
+        query_llm("Test prompt")
+
+        assert mock_post.call_args.kwargs['json']['threshold'] == 0.25
+
 def test_query_llm_response_handling(mock_response):
     """Test that query_llm correctly handles the response"""
-    with patch('requests.post', return_value=mock_response):
+    with patch('src.backend.utils.llm_client.client.session.request', return_value=mock_response):
         result = query_llm("Test prompt")
         
         assert "generated_text" in result
         assert result["model_used"] == "test-model"
-        assert result["tokens_generated"] == 15
\ No newline at end of file
+        assert result["tokens_generated"] == 15
+
+def test_query_llm_retries_unavailable_service(mock_response, monkeypatch):
+    """Test that query_llm goes through the shared client and retries a 503"""
+    from src.backend.utils.llm_client import client
+    monkeypatch.setattr(client, "backoff", lambda attempt, retry_after=None: 0)
+    unavailable = MagicMock(status_code=503, headers={})
+
+    with patch('src.backend.utils.llm_client.client.session.request', side_effect=[unavailable, mock_response]) as mock_request:
+        result = query_llm("Test prompt")
+
+    assert result["model_used"] == "test-model"
+    assert mock_request.call_count == 2
+    assert mock_request.call_args.kwargs["timeout"] == (client.connect_timeout, 300)
+    assert client.breaker.state == "closed"
+
+def test_query_llm_batch_keeps_order_and_reports_errors():
+    """Test that query_llm_batch returns one result per prompt in order with per-prompt errors"""
+    from src.backend.utils.llm_client import query_llm_batch
+
+    def post(method, url, json, **kwargs):
+        prompt = json["messages"][0]["content"]
+        if prompt == "bad":
+            raise ConnectionError("refused")
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"generated_text": prompt.upper(), "model_used": "test-model"}
+        return response
+
+    with patch('src.backend.utils.llm_client.client.session.request', side_effect=post):
+        results = query_llm_batch(["a", "bad", "c"], concurrency=2)
+
+    assert [(r.index, r.response, r.model) for r in results] == [(0, "A", "test-model"), (1, None, None), (2, "C", "test-model")]
+    assert not results[1].ok and "refused" in results[1].error
+    assert all(isinstance(r, BatchResult) for r in results)
+
+def test_llm_client_imports_like_the_worker_image():
+    """Test that llm_client imports with the worker's layout, where ai/utils and ai/llm are merged under /app"""
+    backend = os.path.join(os.path.dirname(__file__), "..", "..")
+    # Namespace packages merge utils/ from both entries, like the COPY steps in docker/worker/Dockerfile
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([backend, os.path.join(backend, "ai")])}
+    script = (
+        "import sys, llm.batch, utils.llm_client as c; "
+        "assert c.run_batch is llm.batch.run_batch; "
+        "assert not any(name.startswith('src') for name in sys.modules); "
+        "print(c.query_llm_batch([]))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], env=env, cwd="/", capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
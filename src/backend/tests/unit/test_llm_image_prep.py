@@ -0,0 +1,42 @@
+# /src/backend/tests/unit/test_llm_image_prep.py
+import base64
+import io
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+from llm.image_prep import prepare_image
+
+def decode(prepared):
+    return Image.open(io.BytesIO(base64.b64decode(prepared.data)))
+
+def test_large_photo_is_downscaled_and_reencoded(tmp_path):
+    """Test that oversized images are shrunk to the model input size and sent as JPEG"""
+    path = tmp_path / "photo.png"
+    Image.effect_noise((3000, 2000), 64).convert("RGB").save(path)
+
+    prepared = prepare_image(str(path))
+    assert prepared.mime_type == "image/jpeg"
+    assert (prepared.width, prepared.height) == (1152, 768)
+    assert decode(prepared).size == (1152, 768)
+    assert len(prepared.data) < prepared.source_bytes
+
+def test_format_is_detected_from_content(tmp_path):
+    """Test that a small JPEG is passed through with its real type whatever its name"""
+    path = tmp_path / "image.png"
+    Image.new("RGB", (64, 48), "red").save(path, format="JPEG")
+
+    prepared = prepare_image(str(path))
+    assert prepared.mime_type == "image/jpeg"
+    assert base64.b64decode(prepared.data) == path.read_bytes()
+
+def test_transparency_is_kept_and_results_are_cached(tmp_path):
+    """Test that images with alpha stay PNG and identical content is prepared once"""
+    first, second = tmp_path / "a.webp", tmp_path / "b.webp"
+    image = Image.new("RGBA", (4000, 1000), (0, 0, 255, 128))
+    image.save(first, format="TIFF")
+    image.save(second, format="TIFF")
+
+    prepared = prepare_image(str(first))
+    assert prepared.mime_type == "image/png"
+    assert decode(prepared).mode == "RGBA"
+    assert prepare_image(str(second)) is prepared
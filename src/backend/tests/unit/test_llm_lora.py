@@ -0,0 +1,84 @@
+# /src/backend/tests/unit/test_llm_lora.py
+import asyncio
+import copy
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+from llm.lora import AdapterCache, AdapterNotFoundError
+from llm.scheduler import BatchScheduler
+
+peft = pytest.importorskip("peft")
+
+def char_ids(text):
+    return [1] + [(ord(c) % 60) + 2 for c in text]
+
+class CharTokenizer:
+    eos_token_id = 63
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(ord("a") + (i % 26)) for i in ids if i > 1)
+
+@pytest.fixture(scope="module")
+def base_model():
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        eos_token_id=63,
+    )
+    return LlamaForCausalLM(config).eval()
+
+@pytest.fixture(scope="module")
+def checkpoints_dir(base_model, tmp_path_factory):
+    """Save LoRA adapters the way ModelTrainer does, under <job_id>/final"""
+    root = tmp_path_factory.mktemp("checkpoints")
+    for seed, job_id in enumerate(["job-a", "job-b"]):
+        torch.manual_seed(10 + seed)
+        config = peft.LoraConfig(r=4, lora_alpha=16, target_modules=["q_proj", "v_proj"], init_lora_weights=False)
+        peft.get_peft_model(copy.deepcopy(base_model), config).save_pretrained(str(root / job_id / "final"))
+    return root
+
+def reference_output(base_model, checkpoints_dir, adapter, prompt, max_tokens):
+    model = copy.deepcopy(base_model)
+    if adapter:
+        model = peft.PeftModel.from_pretrained(model, str(checkpoints_dir / adapter / "final")).eval()
+    input_ids = torch.tensor([char_ids(prompt)])
+    output = model.generate(input_ids, max_new_tokens=max_tokens, do_sample=False, eos_token_id=None)
+    return output[0, input_ids.shape[1]:].tolist()
+
+def test_mixed_adapter_batch_matches_single_adapter_generation(base_model, checkpoints_dir):
+    """Test that requests for different adapters and the base model share a batch without mixing weights"""
+    model = copy.deepcopy(base_model)
+    scheduler = BatchScheduler(model, CharTokenizer(), "cpu", adapters=AdapterCache(model, str(checkpoints_dir)))
+    scheduler.eos_token_ids = set()
+    scheduler.start()
+    requests = [("job-a", "hello world"), (None, "hello world"), ("job-b", "the quick brown fox")]
+
+    async def run():
+        return await asyncio.gather(*[
+            scheduler.submit(char_ids(prompt), 8, 0.0, 1.0, adapter=adapter) for adapter, prompt in requests
+        ])
+
+    try:
+        jobs = asyncio.run(run())
+    finally:
+        scheduler.stop()
+    for (adapter, prompt), job in zip(requests, jobs):
+        assert job.output_ids == reference_output(base_model, checkpoints_dir, adapter, prompt, 8)
+
+def test_least_recently_used_adapter_is_unloaded(base_model, checkpoints_dir):
+    """Test that idle adapters beyond the limit are unloaded and unknown adapters are rejected"""
+    cache = AdapterCache(copy.deepcopy(base_model), str(checkpoints_dir), max_adapters=1)
+    cache.ensure(["job-a"])
+    cache.ensure(["job-b"], in_use=["job-a"])
+    assert cache.loaded() == ["job-a", "job-b"]
+    cache.ensure(["job-b"])
+    assert cache.loaded() == ["job-b"]
+    assert cache.evictions == 1
+
+    with pytest.raises(AdapterNotFoundError):
+        cache.ensure(["missing"])
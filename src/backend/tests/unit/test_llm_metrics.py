@@ -0,0 +1,51 @@
+# /src/backend/tests/unit/test_llm_metrics.py
+import asyncio
+from prometheus_client import REGISTRY
+from llm.metrics import record_usage, usage
+from llm.scheduler import GenerationJob
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def make_job(loop, prompt_tokens, completion_tokens, finish_reason=None):
+    job = GenerationJob(
+        input_ids=list(range(prompt_tokens)),
+        max_tokens=16,
+        temperature=0.0,
+        top_p=1.0,
+        stop=[],
+        loop=loop,
+        future=loop.create_future(),
+    )
+    job.output_ids = list(range(completion_tokens))
+    job.finish_reason = finish_reason
+    return job
+
+def test_usage_counts_prompt_and_completion_tokens():
+    """Test that usage reports the token counts the scheduler actually ran"""
+    loop = asyncio.new_event_loop()
+    job = make_job(loop, prompt_tokens=7, completion_tokens=3, finish_reason="stop")
+    loop.close()
+
+    assert usage(job) == {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10}
+
+def test_record_usage_counts_tokens_per_model_and_adapter():
+    """Test that finished and cancelled jobs add to the counters of their own model and adapter"""
+    loop = asyncio.new_event_loop()
+    finished = make_job(loop, prompt_tokens=5, completion_tokens=2, finish_reason="length")
+    cancelled = make_job(loop, prompt_tokens=4, completion_tokens=1)
+    cancelled.future.cancel()
+    other = make_job(loop, prompt_tokens=9, completion_tokens=9, finish_reason="stop")
+
+    record_usage("usage-test", finished)
+    record_usage("usage-test", cancelled)
+    record_usage("usage-test", other, adapter="ft-a")
+    loop.close()
+
+    base = {"model": "usage-test", "adapter": ""}
+    assert sample("llm_prompt_tokens_total", **base) == 9
+    assert sample("llm_completion_tokens_total", **base) == 3
+    assert sample("llm_generations_total", finish_reason="length", **base) == 1
+    assert sample("llm_generations_total", finish_reason="cancelled", **base) == 1
+    assert sample("llm_prompt_tokens_total", model="usage-test", adapter="ft-a") == 9
+    assert sample("llm_tokens_per_second_count", model="usage-test") == 3
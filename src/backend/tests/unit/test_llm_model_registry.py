@@ -0,0 +1,116 @@
+# /src/backend/tests/unit/test_llm_model_registry.py
+import asyncio
+import threading
+import pytest
+from llm.model_registry import ModelEntry, ModelNotFoundError, ModelRegistry
+
+class FakeScheduler:
+    def __init__(self):
+        self.stopped = False
+        self.stopped_on = None
+
+    def stop(self):
+        self.stopped = True
+        self.stopped_on = threading.current_thread()
+
+    @property
+    def stats(self):
+        return {}
+
+def make_registry(tmp_path, **kwargs):
+    (tmp_path / "checkpoints" / "ft-a" / "final").mkdir(parents=True)
+    for name in ("base", "other"):
+        (tmp_path / "models" / name).mkdir(parents=True)
+
+    loaded = []
+    def loader(name, path):
+        loaded.append(name)
+        return ModelEntry(name=name, path=path, model=None, tokenizer=None, scheduler=FakeScheduler(), size_bytes=10)
+
+    async def run_blocking(fn, *args):
+        return fn(*args)
+
+    registry = ModelRegistry(
+        loader,
+        run_blocking,
+        checkpoints_dir=str(tmp_path / "checkpoints"),
+        models_dir=str(tmp_path / "models"),
+        **kwargs,
+    )
+    return registry, loaded
+
+def test_resolve_prefers_checkpoints_and_rejects_paths(tmp_path):
+    """Test that model names map to checkpoint directories and never escape them"""
+    registry, _ = make_registry(tmp_path)
+    assert registry.resolve("ft-a") == str(tmp_path / "checkpoints" / "ft-a" / "final")
+    assert registry.resolve("base") == str(tmp_path / "models" / "base")
+    for name in ("missing", "../models/base"):
+        with pytest.raises(ModelNotFoundError):
+            registry.resolve(name)
+
+def test_least_recently_used_idle_model_is_evicted(tmp_path):
+    """Test that loading past the residency limit unloads the least recently used model"""
+    registry, loaded = make_registry(tmp_path, max_resident=2)
+
+    async def use(name):
+        registry.release(await registry.acquire(name))
+
+    async def main():
+        await use("base")
+        await use("ft-a")
+        await use("base")
+        await use("other")
+    asyncio.run(main())
+
+    assert loaded == ["base", "ft-a", "other"]
+    assert registry.resident() == ["base", "other"]
+    assert registry.evictions == 1
+
+def test_models_in_use_are_not_evicted(tmp_path):
+    """Test that a model with requests in flight stays resident, and the limit is restored once it is released"""
+    registry, _ = make_registry(tmp_path, max_resident=1)
+
+    async def main():
+        busy = await registry.acquire("base")
+        other = await registry.acquire("other")
+        assert registry.resident() == ["base", "other"]
+        registry.release(other)
+        assert registry.resident() == ["base"]
+        registry.release(busy)
+        registry.release(await registry.acquire("ft-a"))
+    asyncio.run(main())
+
+    assert registry.resident() == ["ft-a"]
+
+def test_unknown_models_leave_no_lock_behind(tmp_path):
+    """Test that requests for names that do not resolve do not grow the per-model locks"""
+    registry, loaded = make_registry(tmp_path)
+
+    async def main():
+        for name in ("missing", "../etc", "also-missing"):
+            with pytest.raises(ModelNotFoundError):
+                await registry.acquire(name)
+    asyncio.run(main())
+
+    assert registry._locks == {}
+    assert loaded == []
+
+def test_evicted_models_are_closed_off_the_event_loop(tmp_path):
+    """Test that stopping an evicted model's scheduler never blocks the event loop thread"""
+    registry, _ = make_registry(tmp_path, max_resident=1)
+
+    async def main():
+        base = await registry.acquire("base")
+        other = await registry.acquire("other")
+        registry.release(other)  # Evicted on release
+        while registry._closing:
+            await asyncio.sleep(0.01)
+        registry.release(base)
+        registry.release(await registry.acquire("ft-a"))  # Evicts base on load
+        return threading.current_thread(), base, other
+
+    loop_thread, base, other = asyncio.run(main())
+    for entry in (base, other):
+        assert entry.scheduler.stopped
+        assert entry.scheduler.stopped_on is not loop_thread
+    assert registry.resident() == ["ft-a"]
@@ -0,0 +1,47 @@
+# /src/backend/tests/unit/test_llm_prefix_cache.py
+import torch
+from llm.prefix_cache import PrefixCache
+
+def make_past(length, layers=2):
+    """Build fake key/values whose values encode the token position"""
+    positions = torch.arange(length, dtype=torch.float32).view(1, 1, length, 1)
+    return tuple((positions.clone(), positions.clone()) for _ in range(layers))
+
+def test_lookup_returns_longest_shared_prefix():
+    """Test that a prompt sharing whole blocks with a cached prompt reuses them"""
+    cache = PrefixCache(max_bytes=1024 * 1024, block_size=4)
+    cache.insert(list(range(10)), make_past(10))
+
+    cached_len, past = cache.lookup(list(range(9)) + [99, 100])
+    assert cached_len == 8
+    assert past[0][0].shape[2] == 8
+    assert past[0][0].flatten().tolist() == list(range(8))
+    assert cache.hits == 1
+
+def test_lookup_leaves_last_token_uncached():
+    """Test that an identical prompt still leaves a token for the prefill"""
+    cache = PrefixCache(max_bytes=1024 * 1024, block_size=4)
+    cache.insert(list(range(8)), make_past(8))
+
+    cached_len, _ = cache.lookup(list(range(8)))
+    assert cached_len == 4
+
+def test_divergent_prefix_misses():
+    """Test that blocks are only reused when everything before them matches"""
+    cache = PrefixCache(max_bytes=1024 * 1024, block_size=4)
+    cache.insert(list(range(8)), make_past(8))
+
+    cached_len, past = cache.lookup([42] + list(range(1, 9)))
+    assert cached_len == 0
+    assert past is None
+    assert cache.misses == 1
+
+def test_memory_budget_evicts_least_recently_used():
+    """Test that the cache never grows beyond its memory budget"""
+    block_bytes = 2 * 2 * 4 * 4  # layers * (key, value) * tokens * float32
+    cache = PrefixCache(max_bytes=3 * block_bytes, block_size=4)
+    cache.insert(list(range(8)), make_past(8))
+    cache.insert(list(range(100, 108)), make_past(8))
+
+    assert cache.stats["bytes"] <= 3 * block_bytes
+    assert cache.lookup(list(range(100, 109)))[0] == 8
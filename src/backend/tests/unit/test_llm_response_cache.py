@@ -0,0 +1,72 @@
+# /src/backend/tests/unit/test_llm_response_cache.py
+import asyncio
+from llm.response_cache import ResponseCache, SemanticCache
+from utils.cache import LRUCache
+
+PARAMS = {"model": "test-model", "max_tokens": 64, "temperature": 0, "top_p": 0.9, "stop": []}
+RESULT = {"generated_text": "Paris", "model_used": "test-model", "tokens_generated": 1}
+
+def test_local_tier_hits_on_normalized_prompt():
+    """Test that line endings are normalized but surrounding whitespace, which changes the tokens, is not"""
+    cache = ResponseCache(LRUCache(max_entries=8, ttl=60))
+
+    async def run():
+        await cache.set("Capital of France?\n", PARAMS, RESULT)
+        return await cache.get("Capital of France?\r\n", PARAMS), await cache.get("  Capital of France?\n", PARAMS)
+
+    assert asyncio.run(run()) == (RESULT, None)
+    assert cache.hits["local"] == 1
+
+def test_different_sampling_parameters_miss():
+    """Test that the sampling parameters are part of the cache key"""
+    cache = ResponseCache(LRUCache(max_entries=8, ttl=60))
+
+    async def run():
+        await cache.set("Capital of France?", PARAMS, RESULT)
+        return await cache.get("Capital of France?", {**PARAMS, "max_tokens": 128})
+
+    assert asyncio.run(run()) is None
+    assert cache.misses == 1
+
+def test_lru_evicts_oldest_entry():
+    """Test that the local tier keeps at most max_entries entries"""
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+def test_semantic_tier_only_serves_deterministic_requests():
+    """Test that similar prompts hit the semantic tier when temperature is 0"""
+    async def embed(text):
+        return [1.0, 0.0] if "France" in text else [0.0, 1.0]
+
+    cache = ResponseCache(LRUCache(max_entries=8, ttl=60), semantic=SemanticCache(embed, 0.9, 8, ttl=60))
+
+    async def run():
+        await cache.set("Capital of France?", PARAMS, RESULT)
+        deterministic = await cache.get("What is the capital of France?", PARAMS)
+        sampled = await cache.get("What is the capital of France?", {**PARAMS, "temperature": 0.7})
+        unrelated = await cache.get("Capital of Spain?", PARAMS)
+        return deterministic, sampled, unrelated
+
+    assert asyncio.run(run()) == (RESULT, None, None)
+    assert cache.hits["semantic"] == 1
+
+def test_semantic_entries_expire_after_the_ttl():
+    """Test that the semantic tier stops serving entries older than its TTL"""
+    async def embed(text):
+        return [1.0, 0.0]
+
+    fresh = SemanticCache(embed, 0.9, 8, ttl=60)
+    stale = SemanticCache(embed, 0.9, 8, ttl=0)
+
+    async def run():
+        for cache in (fresh, stale):
+            await cache.set("Capital of France?", "params", RESULT)
+        return await fresh.get("Capital of France?", "params"), await stale.get("Capital of France?", "params")
+
+    assert asyncio.run(run()) == (RESULT, None)
+    assert stale._count == 0
@@ -0,0 +1,105 @@
+# /src/backend/tests/unit/test_llm_router_pool.py
+import asyncio
+import os
+from collections import defaultdict
+from types import SimpleNamespace
+import pytest
+
+litellm = pytest.importorskip("litellm")
+# routellm creates an OpenAI client when it is imported
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+pytest.importorskip("routellm.controller")
+from llm import router_pool
+
+class FakeController:
+    def __init__(self, routers, strong_model, weak_model, api_base=None, api_key=None):
+        self.routers = {router: None for router in routers}
+        self.model_pair = SimpleNamespace(strong=strong_model, weak=weak_model)
+        self.api_base = api_base
+        self.api_key = api_key
+        self.model_counts = defaultdict(lambda: defaultdict(int))
+
+@pytest.fixture
+def built(monkeypatch):
+    controllers = []
+    def controller(**kwargs):
+        controllers.append(FakeController(**kwargs))
+        return controllers[-1]
+
+    monkeypatch.setattr(router_pool, "Controller", controller)
+    monkeypatch.setattr(router_pool, "_controllers", {})
+    monkeypatch.setattr(router_pool, "_clients", {})
+    return controllers
+
+def test_clients_share_one_controller_per_configuration(built):
+    """Test that the router model is loaded once per configuration, however many clients ask for it"""
+    first = router_pool.get_router_client(strong_model="strong", weak_model="weak")
+    second = router_pool.get_router_client(strong_model="strong", weak_model="weak")
+    assert first is second
+    assert router_pool.get_controller(strong_model="strong", weak_model="weak") is first.controller
+    assert len(built) == 1
+
+    other = router_pool.get_router_client(strong_model="strong", weak_model="other-weak")
+    assert other.controller is not first.controller
+    assert len(built) == 2
+
+def test_completions_in_flight_are_bounded_by_max_concurrency(built, monkeypatch):
+    """Test that a burst of completions never has more than max_concurrency requests in flight"""
+    running = []
+    peak = []
+
+    async def acompletion(**kwargs):
+        running.append(kwargs["model"])
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return kwargs["model"]
+
+    monkeypatch.setattr(router_pool.litellm, "acompletion", acompletion)
+    monkeypatch.setattr(router_pool.litellm, "aclient_session", None)
+
+    async def main():
+        client = router_pool.AsyncRouterClient(FakeController(["mf"], "strong", "weak"), max_concurrency=2)
+        client.route = lambda prompt, router, threshold: asyncio.sleep(0, result="weak")
+        results = await asyncio.gather(
+            *(client.acompletion([{"role": "user", "content": str(i)}]) for i in range(6))
+        )
+        await router_pool.litellm.aclient_session.aclose()
+        return client, results
+
+    client, results = asyncio.run(main())
+    assert results == ["weak"] * 6
+    assert max(peak) == 2
+    assert client.stats["available"] == 2
+
+def test_thresholds_default_to_the_calibrated_value(built, monkeypatch):
+    """Test that callers without a threshold pick up the current calibration on every call"""
+    seen = []
+
+    class Scorer:
+        def decide(self, prompt, threshold, model_pair):
+            seen.append(threshold)
+            return SimpleNamespace(model="weak", score=0.5, cached=False)
+
+    monkeypatch.setattr(router_pool, "get_scorer", lambda controller, router: Scorer())
+    client = router_pool.AsyncRouterClient(FakeController(["mf"], "strong", "weak"))
+
+    monkeypatch.setenv("ROUTER_TEXT_THRESHOLD", "0.3")
+    asyncio.run(client.route("hello"))
+    monkeypatch.setenv("ROUTER_TEXT_THRESHOLD", "0.4")
+    asyncio.run(client.route("hello"))
+    asyncio.run(client.route("hello", threshold=0.9))
+    assert seen == [0.3, 0.4, 0.9]
+
+def test_batch_decisions_are_counted_per_model(built, monkeypatch):
+    """Test that batched routing updates the controller's per-model counters like single decisions"""
+    class Scorer:
+        def decide_batch(self, prompts, threshold, model_pair):
+            return [SimpleNamespace(model="strong" if "hard" in p else "weak", strong="hard" in p) for p in prompts]
+
+    monkeypatch.setattr(router_pool, "get_scorer", lambda controller, router: Scorer())
+    client = router_pool.AsyncRouterClient(FakeController(["mf"], "strong", "weak"))
+
+    decisions = asyncio.run(client.decide_batch(["easy", "hard", "easy"], threshold=0.5))
+    assert [d.model for d in decisions] == ["weak", "strong", "weak"]
+    assert dict(client.controller.model_counts["mf"]) == {"weak": 2, "strong": 1}
@@ -0,0 +1,67 @@
+# /src/backend/tests/unit/test_llm_router_scoring.py
+from types import SimpleNamespace
+import torch
+from llm.router_scoring import WinRateScorer
+
+class TinyMF(torch.nn.Module):
+    """Same layers as RouteLLM's MFModel, with a fixed embedding function"""
+    embedding_model = "test"
+    use_proj = True
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.P = torch.nn.Embedding(4, 8)
+        self.text_proj = torch.nn.Sequential(torch.nn.Linear(16, 8, bias=False))
+        self.classifier = torch.nn.Sequential(torch.nn.Linear(8, 1, bias=False))
+
+    def get_device(self):
+        return self.P.weight.device
+
+    def pred_win_rate(self, model_a, model_b, prompt_embed):
+        # RouteLLM's per-prompt scoring path
+        model_embed = torch.nn.functional.normalize(self.P(torch.tensor([model_a, model_b])), p=2, dim=1)
+        logits = self.classifier(model_embed * self.text_proj(torch.tensor(prompt_embed))).squeeze()
+        return torch.sigmoid(logits[0] - logits[1]).item()
+
+def fake_embed(prompts):
+    return [[float((len(p) * (i + 1)) % 7) - 3 for i in range(16)] for p in prompts]
+
+def make_scorer(calls):
+    def embed(prompts):
+        calls.append(list(prompts))
+        return fake_embed(prompts)
+    router = SimpleNamespace(model=TinyMF().eval(), strong_model_id=1, weak_model_id=2)
+    return WinRateScorer(router, "mf", embed=embed, batch_size=2)
+
+def test_batched_scores_match_per_prompt_scores():
+    """Test that vectorized scoring gives the same win rates as scoring prompts one by one"""
+    scorer = make_scorer([])
+    prompts = ["hi", "explain quantum computing", "a" * 40, "what is 2 + 2?", "x"]
+    expected = [scorer.router.model.pred_win_rate(1, 2, embed) for embed in fake_embed(prompts)]
+    assert all(abs(a - b) < 1e-6 for a, b in zip(scorer.score_batch(prompts), expected))
+
+def test_decisions_are_cached_by_prompt():
+    """Test that repeated prompts are neither re-embedded nor re-scored"""
+    calls = []
+    scorer = make_scorer(calls)
+    pair = SimpleNamespace(strong="strong", weak="weak")
+
+    first = scorer.decide_batch(["hi", "hello there", "hi"], 0.5, pair)
+    assert calls == [["hi", "hello there"]]
+    assert first[0].score == first[2].score
+
+    again = scorer.decide("hello there", 0.0, pair)
+    assert len(calls) == 1
+    assert again.cached and again.strong and again.model == "strong"
+
+def test_batch_decisions_use_per_prompt_thresholds():
+    """Test that one scoring pass can route prompts against different thresholds"""
+    calls = []
+    scorer = make_scorer(calls)
+    pair = SimpleNamespace(strong="strong", weak="weak")
+
+    decisions = scorer.decide_batch(["hi", "hi"], [0.0, 1.0], pair)
+    assert len(calls) == 1
+    assert [d.model for d in decisions] == ["strong", "weak"]
+    assert [d.threshold for d in decisions] == [0.0, 1.0]
@@ -0,0 +1,144 @@
+# /src/backend/tests/unit/test_llm_scheduler.py
+import asyncio
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+from llm.scheduler import BatchScheduler, sample_next_tokens
+from llm.speculative import SpeculativeDecoder, check_draft_model
+
+class CharTokenizer:
+    """Minimal tokenizer mapping characters to ids of a tiny test model"""
+    eos_token_id = 63
+
+    def __call__(self, text):
+        return {"input_ids": [1] + [(ord(c) % 60) + 2 for c in text]}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(ord("a") + (i % 26)) for i in ids if i > 1)
+
+    def get_vocab(self):
+        return {chr(ord("a") + (i % 26)) + str(i): i for i in range(64)}
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        eos_token_id=63,
+    )
+    return LlamaForCausalLM(config).eval()
+
+@pytest.fixture
+def scheduler(tiny_model):
+    scheduler = BatchScheduler(tiny_model, CharTokenizer(), "cpu", max_batch_size=3)
+    # Ignore EOS so that every request runs to max_tokens
+    scheduler.eos_token_ids = set()
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+def test_sample_next_tokens_greedy_when_temperature_zero():
+    """Test that rows with temperature 0 are decoded greedily"""
+    logits = torch.tensor([[0.1, 3.0, 0.2], [2.0, 0.1, 0.3]])
+    tokens = sample_next_tokens(logits, torch.tensor([0.0, 0.0]), torch.tensor([0.9, 0.9]))
+    assert tokens.tolist() == [1, 0]
+
+def test_sample_next_tokens_top_p_keeps_most_likely():
+    """Test that a tiny top_p always keeps the most likely token"""
+    logits = torch.tensor([[0.1, 5.0, 0.2]] * 8)
+    tokens = sample_next_tokens(logits, torch.full((8,), 1.0), torch.full((8,), 0.01))
+    assert tokens.tolist() == [1] * 8
+
+def test_batched_generation_matches_sequential(tiny_model, scheduler):
+    """Test that requests joining the batch at different steps decode like single requests"""
+    tokenizer = CharTokenizer()
+    prompts = ["hello world", "a", "the quick brown fox", "xyz" * 10]
+
+    expected = []
+    for i, prompt in enumerate(prompts):
+        input_ids = torch.tensor([tokenizer(prompt)["input_ids"]])
+        output = tiny_model.generate(input_ids, max_new_tokens=10 - i, do_sample=False, eos_token_id=None)
+        expected.append(output[0, input_ids.shape[1]:].tolist())
+
+    async def run():
+        async def submit(i, prompt):
+            await asyncio.sleep(i * 0.01)
+            return await scheduler.submit(tokenizer(prompt)["input_ids"], 10 - i, 0.0, 1.0)
+        return await asyncio.gather(*[submit(i, p) for i, p in enumerate(prompts)])
+
+    jobs = asyncio.run(run())
+    assert [job.output_ids for job in jobs] == expected
+    assert all(job.finish_reason == "length" for job in jobs)
+
+def test_stream_yields_deltas_and_withholds_stop_sequence(scheduler):
+    """Test that streamed deltas add up to the final text and never leak a stop sequence"""
+    tokenizer = CharTokenizer()
+
+    async def run():
+        reference = await scheduler.submit(tokenizer("hello world")["input_ids"], 10, 0.0, 1.0)
+        stop = reference.text[3:5]
+        job = scheduler.enqueue(tokenizer("hello world")["input_ids"], 10, 0.0, 1.0, stop=[stop], stream=True)
+        deltas = [delta async for delta in scheduler.stream(job)]
+        return reference, job, deltas
+
+    reference, job, deltas = asyncio.run(run())
+    assert job.finish_reason == "stop"
+    assert "".join(deltas) == job.text == reference.text[:3]
+
+def test_failed_prefill_only_fails_that_request(scheduler):
+    """Test that a request which cannot be prefilled fails alone while the batch keeps decoding"""
+    tokenizer = CharTokenizer()
+
+    async def run():
+        good = scheduler.enqueue(tokenizer("hello world")["input_ids"], 200, 0.0, 1.0, stream=True)
+        await good.stream.get()  # Decoding has started
+        bad = scheduler.enqueue(tokenizer("oops")["input_ids"], 10, "0.7", 1.0)
+        with pytest.raises(ValueError):
+            await bad.future
+        return await good.future
+
+    job = asyncio.run(run())
+    assert job.finish_reason == "length"
+    assert len(job.output_ids) == 200
+
+def test_speculative_decoding_matches_greedy_output(tiny_model):
+    """Test that draft-and-verify decoding leaves greedy outputs unchanged"""
+    tokenizer = CharTokenizer()
+    torch.manual_seed(1)
+    draft_model = LlamaForCausalLM(tiny_model.config).eval()
+    speculator = SpeculativeDecoder(tiny_model, draft_model, "cpu", num_tokens=3)
+    scheduler = BatchScheduler(tiny_model, tokenizer, "cpu", speculator=speculator)
+    scheduler.eos_token_ids = set()
+    scheduler.start()
+
+    prompt = tokenizer("hello world")["input_ids"]
+    input_ids = torch.tensor([prompt])
+    expected = tiny_model.generate(input_ids, max_new_tokens=12, do_sample=False, eos_token_id=None)
+
+    try:
+        job = asyncio.run(scheduler.submit(prompt, 12, 0.0, 1.0))
+    finally:
+        scheduler.stop()
+    assert job.output_ids == expected[0, input_ids.shape[1]:].tolist()
+    assert speculator.stats["proposed"] > 0
+
+def test_incompatible_draft_models_are_rejected(tiny_model):
+    """Test that a draft model with another vocabulary or tokenizer is refused for speculation"""
+    tokenizer = CharTokenizer()
+    check_draft_model(tiny_model, tokenizer, LlamaForCausalLM(tiny_model.config), CharTokenizer())
+
+    wider = LlamaConfig(**{**tiny_model.config.to_dict(), "vocab_size": 128})
+    with pytest.raises(ValueError, match="128 tokens"):
+        check_draft_model(tiny_model, tokenizer, LlamaForCausalLM(wider), CharTokenizer())
+
+    class ShiftedTokenizer(CharTokenizer):
+        def get_vocab(self):
+            return {token: i + 1 for token, i in super().get_vocab().items()}
+
+    with pytest.raises(ValueError, match="tokenizer does not match"):
+        check_draft_model(tiny_model, tokenizer, LlamaForCausalLM(tiny_model.config), ShiftedTokenizer())
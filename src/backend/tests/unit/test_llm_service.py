@@ -0,0 +1,83 @@
+# /src/backend/tests/unit/test_llm_service.py
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from llm import service
+from utils.http_client import get_client
+
+@pytest.fixture
+def client():
+    # No startup event: these requests must be rejected before any model is needed
+    return TestClient(service.app)
+
+@pytest.mark.parametrize("params", [
+    {"temperature": "0.7"},
+    {"temperature": 5},
+    {"top_p": None},
+    {"max_tokens": 0},
+    {"max_tokens": 1.5},
+    {"stop": "END"},
+])
+def test_invalid_sampling_parameters_are_rejected(client, params):
+    """Test that unusable parameters get a 400 instead of reaching the decode loop"""
+    response = client.post("/generate", json={"prompt": "hello", **params})
+    assert response.status_code == 400
+    assert service.executor.in_flight == 0
+
+def test_only_greedy_requests_are_cached_by_default(client, monkeypatch):
+    """Test that sampled requests bypass the response cache unless the caller opts in"""
+    lookups = []
+
+    class Cache:
+        async def get(self, prompt, params):
+            lookups.append(params["temperature"])
+            return {"generated_text": "cached", "model_used": "m", "tokens_generated": 1}
+
+    monkeypatch.setattr(service, "response_cache", Cache())
+    assert client.post("/generate", json={"prompt": "hi", "temperature": 0}).json()["cached"]
+    assert client.post("/generate", json={"prompt": "hi", "temperature": 0.7, "cache": True}).json()["cached"]
+
+    monkeypatch.setattr(service, "start_generation", None)  # A cache miss would fail here
+    assert client.post("/generate", json={"prompt": "hi", "temperature": 0.7}).status_code == 500
+    assert lookups == [0, 0.7]
+
+def test_health_is_unavailable_until_a_model_is_resident(client):
+    """Test that /health returns 503 while no model is loaded"""
+    assert service.registry.resident() == []
+    assert client.get("/health").status_code == 503
+
+def test_requests_over_capacity_get_429_with_retry_after(client, monkeypatch):
+    """Test that a full inference queue rejects new requests up front with Retry-After"""
+    executor = service.InferenceExecutor(max_workers=1, max_in_flight=1)
+    monkeypatch.setattr(service, "executor", executor)
+    executor.acquire()
+
+    for path in ("/generate", "/generate/stream"):
+        response = client.post(path, json={"prompt": "hello", "temperature": 0})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+    assert executor.stats["rejected"] == 2
+    assert executor.in_flight == 1
+    executor.shutdown()
+
+def test_embed_prompt_reuses_the_pooled_embedding_client():
+    """Test that semantic-cache embeddings go through the shared embedding client"""
+    calls = []
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"embeddings": [[0.5, 0.5]]})
+
+    client = get_client("embedding", service.EMBEDDING_SERVICE_URL, idempotent=True)
+
+    async def run():
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        first = await service.embed_prompt("hello")
+        pool = client._async_client
+        await service.embed_prompt("hello again")
+        assert client._async_client is pool
+        await client.aclose()
+        return first
+
+    assert asyncio.run(run()) == [0.5, 0.5]
+    assert calls == ["/embed", "/embed"]
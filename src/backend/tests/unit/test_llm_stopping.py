@@ -0,0 +1,46 @@
+# /src/backend/tests/unit/test_llm_stopping.py
+from llm.stopping import IncrementalDetokenizer, StopSequenceMatcher
+
+class ByteTokenizer:
+    """Tokenizer with one token per UTF-8 byte, so characters span several tokens"""
+
+    def encode(self, text):
+        return list(text.encode("utf-8"))
+
+    def decode(self, ids, skip_special_tokens=True):
+        return bytes(ids).decode("utf-8", errors="replace")
+
+def test_matcher_finds_stop_across_feeds():
+    """Test that a stop sequence split over several chunks is matched when it completes"""
+    matcher = StopSequenceMatcher(["\n\nUser:"])
+    assert matcher.feed("Sure!\n\nUs") is None
+    assert matcher.pending == 4
+    assert matcher.feed("er: hi") == (5, "\n\nUser:")
+
+def test_matcher_reports_first_completed_stop():
+    """Test that with several stops the one completing first wins"""
+    matcher = StopSequenceMatcher(["abcd", "bc", "xyz"])
+    assert matcher.feed("zzab") is None
+    assert matcher.feed("cd") == (3, "bc")
+
+def test_matcher_handles_overlapping_prefixes():
+    """Test that a failed partial match does not hide a stop starting inside it"""
+    matcher = StopSequenceMatcher(["aab"])
+    assert matcher.feed("aaab") == (1, "aab")
+
+def test_matcher_pending_is_zero_without_partial_match():
+    """Test that text which cannot start a stop sequence is not held back"""
+    matcher = StopSequenceMatcher(["###"])
+    matcher.feed("plain text")
+    assert matcher.pending == 0
+
+def test_detokenizer_waits_for_complete_characters():
+    """Test that multi-byte characters are only emitted once all their tokens arrived"""
+    tokenizer = ByteTokenizer()
+    text = "naïve 😀 café"
+    ids = tokenizer.encode(text)
+    detokenizer = IncrementalDetokenizer(tokenizer)
+
+    deltas = [detokenizer.step(ids[:i]) for i in range(1, len(ids) + 1)]
+    assert all("�" not in delta for delta in deltas)
+    assert "".join(deltas) == text
@@ -0,0 +1,33 @@
+# /src/backend/tests/unit/test_metrics.py
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from utils.metrics import instrument
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_instrument_records_route_templates_and_serves_metrics():
+    """Test that one instrument call counts, times and exports requests by route template"""
+    app = FastAPI()
+    instrument(app, "test-service")
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="missing")
+        return {"id": item_id}
+
+    labels = {"service": "test-service", "method": "GET", "route": "/items/{item_id}"}
+    client = TestClient(app)
+    for item_id in (1, 2, 0):
+        client.get(f"/items/{item_id}")
+
+    assert sample("http_requests_total", status="200", **labels) == 2
+    assert sample("http_requests_total", status="404", **labels) == 1
+    assert sample("http_request_duration_seconds_count", **labels) == 3
+    assert sample("http_requests_in_flight", **labels) == 0
+
+    body = client.get("/metrics/").text
+    assert 'route="/items/{item_id}"' in body
+    assert 'route="/metrics"' not in body
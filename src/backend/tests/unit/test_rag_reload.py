@@ -0,0 +1,108 @@
+# /src/backend/tests/unit/test_rag_reload.py
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from adapters import service
+
+class FakeClient:
+    def __init__(self, url):
+        self.url = url
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+class FakeChain:
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+
+    def close(self):
+        self.client.close()
+
+@pytest.fixture
+def builds(tmp_path, monkeypatch):
+    """Point the service at a temporary config file and count chain builds"""
+    config = tmp_path / "rag.env"
+    config.write_text("RAG_TOP_K=5\n")
+    monkeypatch.setattr(service, "RAG_CONFIG_FILE", str(config))
+    monkeypatch.setattr(service, "rag_chain", None)
+    monkeypatch.setattr(service, "rag_settings", None)
+
+    built = []
+    def get_rag_chain(settings, client=None):
+        built.append(settings["RAG_TOP_K"])
+        return FakeChain(f"chain-{len(built)}", client or FakeClient(settings["WEAVIATE_URL"]))
+    monkeypatch.setattr(service, "get_rag_chain", get_rag_chain)
+    return config, built
+
+def test_chain_is_built_once_and_rebuilt_when_the_config_changes(builds):
+    """Test that queries share one chain and a config change triggers exactly one rebuild"""
+    config, built = builds
+
+    async def main():
+        assert (await service.get_chain()).name == "chain-1"
+        assert (await service.get_chain()).name == "chain-1"
+        assert await service.reload_chain() is False
+
+        config.write_text("RAG_TOP_K=3\n")
+        assert await service.reload_chain() is True
+        assert await service.reload_chain() is False
+        return await service.get_chain()
+
+    assert asyncio.run(main()).name == "chain-2"
+    assert built == ["5", "3"]
+
+def test_failed_rebuild_keeps_the_current_chain(builds, monkeypatch):
+    """Test that a chain that fails to build does not replace the one serving queries"""
+    config, _ = builds
+
+    def broken(settings, client=None):
+        raise ConnectionError("weaviate unreachable")
+
+    async def main():
+        await service.get_chain()
+        config.write_text("RAG_TOP_K=3\n")
+        monkeypatch.setattr(service, "get_rag_chain", broken)
+        with pytest.raises(ConnectionError):
+            await service.reload_chain()
+        return await service.get_chain()
+
+    chain = asyncio.run(main())
+    assert chain.name == "chain-1"
+    assert chain.client.closed == 0
+    assert service.rag_settings["RAG_TOP_K"] == "5"
+
+def test_reload_reuses_the_weaviate_client_for_the_same_url(builds):
+    """Test that a settings change on the same Weaviate URL keeps the open connection"""
+    config, _ = builds
+
+    async def main():
+        first = await service.get_chain()
+        config.write_text("RAG_TOP_K=3\n")
+        await service.reload_chain()
+        return first, await service.get_chain()
+
+    first, second = asyncio.run(main())
+    assert second.client is first.client
+    assert first.client.closed == 0
+
+def test_reload_closes_the_previous_weaviate_client(builds):
+    """Test that a new Weaviate URL or a forced reload closes the replaced connection exactly once"""
+    config, _ = builds
+
+    async def main():
+        first = await service.get_chain()
+        config.write_text("RAG_TOP_K=5\nWEAVIATE_URL=http://weaviate-2:8080\n")
+        await service.reload_chain()
+        second = await service.get_chain()
+        await service.reload_chain(force=True)
+        return first, second, await service.get_chain()
+
+    first, second, third = asyncio.run(main())
+    assert second.client.url == "http://weaviate-2:8080"
+    assert first.client.closed == 1
+    assert second.client.closed == 1
+    assert third.client.closed == 0
@@ -0,0 +1,87 @@
+# /src/backend/tests/unit/test_rag_retrieval_cache.py
+import asyncio
+import pytest
+from adapters.retrieval_cache import RetrievalCache
+
+def test_queries_and_results_are_cached_per_model_and_index():
+    """Test that repeated queries skip embedding and search, and other models or indexes do not share entries"""
+    cache = RetrievalCache(max_entries=8, embedding_ttl=60, retrieval_ttl=60)
+    cache.set_embedding("bge-small", "What is RAG?", [0.1, 0.2])
+    cache.set_documents("docs", 5, [0.1, 0.2], ["a", "b"])
+
+    assert cache.get_embedding("bge-small", "  What is RAG?\n") == [0.1, 0.2]
+    assert cache.get_embedding("bge-large", "What is RAG?") is None
+    assert cache.get_documents("docs", 5, [0.1, 0.2]) == ["a", "b"]
+    assert cache.get_documents("docs", 3, [0.1, 0.2]) is None
+    assert cache.get_documents("other", 5, [0.1, 0.2]) is None
+    assert cache.stats["hits"] == {"embedding": 1, "documents": 1}
+
+def test_invalidation_drops_documents_but_keeps_embeddings():
+    """Test that writing to the index only invalidates retrieval results"""
+    cache = RetrievalCache(max_entries=8, embedding_ttl=60, retrieval_ttl=60)
+    cache.set_embedding("bge-small", "q", [1.0])
+    cache.set_documents("docs", 5, [1.0], ["a"])
+
+    cache.invalidate()
+    assert cache.get_documents("docs", 5, [1.0]) is None
+    assert cache.get_embedding("bge-small", "q") == [1.0]
+
+def test_results_expire_and_least_recently_used_entries_are_evicted():
+    """Test that TTL and the size limit bound how stale and how large the cache gets"""
+    cache = RetrievalCache(max_entries=2, embedding_ttl=60, retrieval_ttl=0)
+    cache.set_documents("docs", 5, [1.0], ["a"])
+    assert cache.get_documents("docs", 5, [1.0]) is None
+
+    for query in ("a", "b", "c"):
+        cache.set_embedding("m", query, [1.0])
+    assert cache.get_embedding("m", "a") is None
+    assert cache.get_embedding("m", "c") == [1.0]
+
+def test_cached_retriever_runs_the_same_hybrid_search_as_the_store():
+    """Test that cached and uncached retrieval return the same documents for a hybrid store"""
+    pytest.importorskip("langchain_core")
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.vectorstores import VectorStore
+    from adapters.custom_retriever import CachedRetriever
+
+    class FixedEmbeddings(Embeddings):
+        def embed_documents(self, texts):
+            return [[1.0, 0.0] for _ in texts]
+
+        def embed_query(self, text):
+            return [1.0, 0.0]
+
+    class HybridStore(VectorStore):
+        """Ranks like Weaviate: hybrid for similarity_search, vector-only for similarity_search_by_vector"""
+        corpus = [("banana bread", [1.0, 0.0]), ("apple pie", [0.5, 0.0]), ("cherry tart", [0.0, 0.0])]
+
+        @property
+        def embeddings(self):
+            return FixedEmbeddings()
+
+        def _rank(self, score, k):
+            ranked = sorted(self.corpus, key=score, reverse=True)[:k]
+            return [Document(page_content=text) for text, _ in ranked]
+
+        def similarity_search(self, query, k=4, vector=None, **kwargs):
+            vector = vector or self.embeddings.embed_query(query)
+            words = set(query.split())
+            return self._rank(lambda d: len(words & set(d[0].split())) + sum(a * b for a, b in zip(d[1], vector)), k)
+
+        def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+            return self._rank(lambda d: sum(a * b for a, b in zip(d[1], embedding)), k)
+
+        @classmethod
+        def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+            raise NotImplementedError
+
+    store = HybridStore()
+    cache = RetrievalCache(max_entries=8, embedding_ttl=60, retrieval_ttl=60)
+    retriever = CachedRetriever(vector_store=store, cache=cache, model="m", index="docs", k=2)
+    expected = store.as_retriever(search_kwargs={"k": 2}).invoke("apple pie")
+
+    assert [d.page_content for d in expected] == ["apple pie", "banana bread"]
+    assert retriever.invoke("apple pie") == expected
+    assert asyncio.run(retriever.ainvoke("apple pie")) == expected
+    assert cache.stats["hits"] == {"embedding": 1, "documents": 1}
@@ -0,0 +1,94 @@
+# /src/backend/tests/unit/test_rag_streaming.py
+import asyncio
+import io
+import json
+import httpx
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from utils.http_client import ServiceClient
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake import FakeStreamingListLLM
+from langchain_core.runnables import RunnableLambda
+from adapters.custom_llm import InternalLLMService
+
+DONE_BODY = (
+    'data: {"text": "Hel"}\n\n'
+    'data: {"text": "lo"}\n\n'
+    'data: [DONE]\n\n'
+    'data: {"text": " after done"}\n\n'
+)
+ERROR_BODY = 'data: {"text": "Hel"}\n\nevent: error\ndata: {"detail": "decode failed"}\n\n'
+
+class SSEAdapter(BaseAdapter):
+    """Answers every request with a fixed event-stream body"""
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/event-stream; charset=utf-8"
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(self.body.encode("utf-8"))
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+def make_llm(monkeypatch, body):
+    client = ServiceClient("llm", "http://llm-layer:5000", max_retries=0)
+    client.session.mount("http://", SSEAdapter(body))
+    client._async_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+    )
+    monkeypatch.setattr(InternalLLMService, "client", property(lambda self: client))
+    return InternalLLMService(base_url="http://llm-layer:5000")
+
+def test_llm_stream_stops_at_done(monkeypatch):
+    """Test that sync and async streaming yield the text deltas and stop at [DONE]"""
+    llm = make_llm(monkeypatch, DONE_BODY)
+
+    async def collect():
+        return [chunk async for chunk in llm.astream("hi")]
+
+    assert list(llm.stream("hi")) == ["Hel", "lo"]
+    assert asyncio.run(collect()) == ["Hel", "lo"]
+
+def test_llm_stream_raises_on_error_event(monkeypatch):
+    """Test that an error event from the LLM service raises instead of ending the answer early"""
+    llm = make_llm(monkeypatch, ERROR_BODY)
+
+    async def collect():
+        return [chunk async for chunk in llm.astream("hi")]
+
+    with pytest.raises(RuntimeError, match="decode failed"):
+        list(llm.stream("hi"))
+    with pytest.raises(RuntimeError, match="decode failed"):
+        asyncio.run(collect())
+
+def test_query_stream_sends_sources_before_tokens(monkeypatch):
+    """Test that /query/stream sends the retrieved documents, then the answer, then [DONE]"""
+    pytest.importorskip("langchain_community")
+    from fastapi.testclient import TestClient
+    from adapters import service
+
+    chain = service.RAGChain(
+        retriever=RunnableLambda(lambda query: [Document(page_content="Paris is in France", metadata={"id": 1})]),
+        prompt=RunnableLambda(lambda values: values["question"]),
+        llm=FakeStreamingListLLM(responses=["Paris"]),
+    )
+    monkeypatch.setattr(service, "rag_chain", chain)
+
+    response = TestClient(service.app).post("/query/stream", json={"query": "Where is Paris?"})
+    events = [event for event in response.text.split("\n\n") if event]
+
+    assert events[0] == 'event: sources\ndata: ' + json.dumps([{"content": "Paris is in France", "metadata": {"id": 1}}])
+    assert "".join(json.loads(event[len("data: "):])["text"] for event in events[1:-1]) == "Paris"
+    assert events[-1] == "data: [DONE]"
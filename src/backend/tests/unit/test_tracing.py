@@ -0,0 +1,52 @@
+# /src/backend/tests/unit/test_tracing.py
+from unittest.mock import MagicMock
+import pytest
+from utils import tracing
+from utils.http_client import ServiceClient
+
+pytest.importorskip("opentelemetry")
+from opentelemetry import context, propagate
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+def test_service_client_sends_the_current_trace_context():
+    """Test that internal HTTP calls carry the caller's trace id and keep their own headers"""
+    client = ServiceClient("test", "http://svc:9000")
+    client.session.request = MagicMock(return_value=MagicMock(status_code=200, headers={}))
+
+    token = context.attach(propagate.extract({"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}))
+    try:
+        client.post("/embed", json={}, headers={"x-request-id": "abc"})
+    finally:
+        context.detach(token)
+
+    headers = client.session.request.call_args.kwargs["headers"]
+    assert headers["x-request-id"] == "abc"
+    assert headers["traceparent"].split("-")[1] == TRACE_ID
+
+def test_inject_list_replaces_incoming_trace_headers():
+    """Test that a proxy forwards one traceparent, not the caller's plus its own"""
+    token = context.attach(propagate.extract({"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}))
+    try:
+        headers = tracing.inject_list([("Traceparent", "00-stale"), ("accept", "*/*")])
+    finally:
+        context.detach(token)
+
+    assert ("accept", "*/*") in headers
+    assert [value.split("-")[1] for name, value in headers if name.lower() == "traceparent"] == [TRACE_ID]
+
+@pytest.mark.parametrize("name", ["logs/traces.jsonl", "readonly"])
+def test_file_exporter_creates_its_directory_or_stays_off(tmp_path, monkeypatch, name):
+    """Test that a missing log directory is created and an unopenable trace file disables export instead of raising"""
+    pytest.importorskip("opentelemetry.sdk")
+    (tmp_path / "readonly").mkdir()
+    provider = MagicMock()
+    monkeypatch.setattr(tracing.trace, "set_tracer_provider", provider)
+    monkeypatch.setattr(tracing, "_configured", False)
+    monkeypatch.setattr(tracing, "TRACING_EXPORTER", "file")
+    monkeypatch.setattr(tracing, "TRACING_FILE", str(tmp_path / name))
+
+    tracing.setup_tracing("test")
+
+    assert provider.called == (name != "readonly")
+    assert (tmp_path / "logs").is_dir() == (name != "readonly")
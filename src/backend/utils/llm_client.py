@@ -1,8 +1,17 @@
 # /src/backend/utils/llm_client.py
-import requests
+import os
 import json
+from llm.batch import BATCH_CONCURRENCY, run_batch
+from llm.router_scoring import load_threshold
+from utils.http_client import get_client
 
-def query_llm(prompt, max_tokens=500, temperature=0.7, router="mf", threshold=0.11593):
+LLM_SERVICE_URL = os.getenv("LLM_SERVICE_URL", "http://localhost:5000")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "300"))  # Generation can take minutes
+
+# Shared pool, retries and circuit breaker for every query
+client = get_client("llm", LLM_SERVICE_URL, timeout=LLM_TIMEOUT)
+
+def query_llm(prompt, max_tokens=500, temperature=0.7, router="mf", threshold=None):
     """
     Send a query to the LLM service
     
@@ -11,12 +20,13 @@ def query_llm(prompt, max_tokens=500, temperature=0.7, router="mf", threshold=0.
         max_tokens (int): Maximum number of tokens to generate
         temperature (float): Controls randomness (0.0-1.0)
         router (str): Routing strategy ('mf' for matrix factorization)
-        threshold (float): Threshold for routing to stronger model
+        threshold (float): Threshold for routing to stronger model (default: the calibrated text threshold)
         
     Returns:
         dict: The JSON response from the LLM service
     """
-    endpoint = "http://localhost:5000/generate"
+    if threshold is None:
+        threshold = load_threshold("text")
     payload = {
         "messages": [
             {"role": "user", "content": prompt}
@@ -27,9 +37,36 @@ def query_llm(prompt, max_tokens=500, temperature=0.7, router="mf", threshold=0.
         "threshold": threshold  # Calibrated threshold for ~50% routing to strong model
     }
 
-    response = requests.post(endpoint, json=payload)
+    response = client.post("/generate", json=payload)
     return response.json()
 
+def query_llm_batch(prompts, concurrency=BATCH_CONCURRENCY, **kwargs):
+    """
+    Send many queries to the LLM service with at most `concurrency` in flight
+    
+    Args:
+        prompts (list): The user prompts
+        concurrency (int): Maximum number of requests in flight
+        **kwargs: Passed to query_llm for every prompt
+        
+    Returns:
+        list: One BatchResult per prompt, in order, with the generated text and model or the error
+    """
+    prompts = list(prompts)
+    models = [None] * len(prompts)
+
+    def query(index):
+        result = query_llm(prompts[index], **kwargs)
+        if "generated_text" not in result:
+            raise RuntimeError(result.get("detail", str(result)))
+        models[index] = result.get("model_used")
+        return result["generated_text"]
+
+    results = run_batch(query, len(prompts), concurrency)
+    for result in results:
+        result.model = models[result.index]
+    return results
+
 if __name__ == "__main__":
     # Example usage
     prompt = "Explain quantum computing in simple terms"